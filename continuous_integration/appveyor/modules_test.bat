@@ -48,12 +48,21 @@ for /r "%SPYDERLIB%" %%f in (*.py) do (
     ) else if "%%f"=="%SPYDERLIB%\utils\bsdsocket.py" (
         echo --- NOT testing %%f ---
         echo.
+    ) else if "%%f"=="%SPYDERLIB%\utils\analysisworker.py" (
+        echo --- NOT testing %%f ---
+        echo.
+    ) else if "%%f"=="%SPYDERLIB%\utils\searchworker.py" (
+        echo --- NOT testing %%f ---
+        echo.
     ) else if "%%f"=="%SPYDERLIB%\utils\introspection\__init__.py" (
         echo --- NOT testing %%f ---
         echo.
     ) else if "%%f"=="%SPYDERLIB%\utils\introspection\module_completion.py" (
         echo --- NOT testing %%f ---
         echo.
+    ) else if "%%f"=="%SPYDERLIB%\utils\introspection\plugin_server.py" (
+        echo --- NOT testing %%f ---
+        echo.
     ) else if "%%f"=="%SPYDERLIB%\widgets\externalshell\systemshell.py" (
         echo --- NOT testing %%f ---
         echo.
@@ -52,6 +52,12 @@ for f in spyderlib/*/*.py; do
     if [[ $f == spyderlib/utils/windows.py ]]; then
         continue
     fi
+    if [[ $f == spyderlib/utils/analysisworker.py ]]; then
+        continue
+    fi
+    if [[ $f == spyderlib/utils/searchworker.py ]]; then
+        continue
+    fi
     # TODO: Understand why formlayout is failing in Travis!!
     if [[ $f == spyderlib/widgets/formlayout.py ]]; then
         continue
@@ -77,6 +83,9 @@ for f in spyderlib/*/*/*.py; do
     if [[ $f == spyderlib/utils/introspection/__init__.py ]]; then
         continue
     fi
+    if [[ $f == spyderlib/utils/introspection/plugin_server.py ]]; then
+        continue
+    fi
     if [[ $f == spyderlib/widgets/externalshell/systemshell.py ]]; then
         continue
     fi
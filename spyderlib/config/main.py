@@ -326,6 +326,7 @@ DEFAULTS = [
               'exclude_unsupported': True,
               'truncate': True,
               'minmax': False,
+              'minmax_threshold': 1000000,
               'remote_editing': False,
               }),
             ('editor',
@@ -360,6 +361,7 @@ DEFAULTS = [
               'indent_chars': '*    *',
               'tab_stop_width': 40,
               'object_inspector': True,
+              'introspection_server': True,
               'codecompletion/auto': True,
               'codecompletion/enter_key': True,
               'codecompletion/case_sensitive': True,
@@ -471,6 +473,8 @@ DEFAULTS = [
               'search_text_samples': [codeanalysis.TASKS_PATTERN],
               'in_python_path': False,
               'more_options': True,
+              'use_index': False,
+              'gitignore': True,
               }),
             ('workingdir',
              {
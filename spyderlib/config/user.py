@@ -9,15 +9,20 @@
 This module provides user configuration file management features for Spyder
 
 It's based on the ConfigParser module (present in the standard library).
+
+Option values are kept once converted to their type, and changes are saved
+to the .ini file in a thread, shortly after the last one.
 """
 
 from __future__ import print_function
 
 # Std imports
+import copy
 import os
 import re
 import os.path as osp
 import shutil
+import threading
 import time
 
 # Local imports
@@ -26,7 +31,8 @@ from spyderlib.config.base import (DEV, TEST, get_module_source_path,
                                    get_home_dir)
 from spyderlib.utils.programs import check_version
 from spyderlib.py3compat import configparser as cp
-from spyderlib.py3compat import PY2, is_text_string, to_text_string
+from spyderlib.py3compat import (PY2, is_text_string, is_binary_string,
+                                  to_text_string)
 
 # Std imports for Python 2
 if PY2:
@@ -39,6 +45,14 @@ class NoDefault:
     pass
 
 
+def copy_value(value):
+    """Return a copy of option *value*, unless it can't be modified"""
+    if value is None or isinstance(value, (bool, int, float)) \
+      or is_text_string(value) or is_binary_string(value):
+        return value
+    return copy.deepcopy(value)
+
+
 #==============================================================================
 # Defaults class
 #==============================================================================
@@ -47,10 +61,15 @@ class DefaultsConfig(cp.ConfigParser):
     Class used to save defaults to a file and as base class for
     UserConfig
     """
+    SAVE_DELAY = 0.5  # Seconds between the last change and its saving
+
     def __init__(self, name, subfolder):
         cp.ConfigParser.__init__(self)
         self.name = name
         self.subfolder = subfolder
+        self._lock = threading.RLock()
+        self._save_time = None      # Time of the next save, if any
+        self._save_thread = None
 
     def _write(self, fp):
         """
@@ -77,13 +96,14 @@ class DefaultsConfig(cp.ConfigParser):
         """
         Private set method
         """
-        if not self.has_section(section):
-            self.add_section( section )
         if not is_text_string(value):
             value = repr( value )
         if verbose:
             print('%s[ %s ] = %s' % (section, option, value))
-        cp.ConfigParser.set(self, section, option, value)
+        with self._lock:
+            if not self.has_section(section):
+                self.add_section( section )
+            cp.ConfigParser.set(self, section, option, value)
 
     def _save(self):
         """
@@ -94,27 +114,66 @@ class DefaultsConfig(cp.ConfigParser):
         fname = self.filename()
 
         def _write_file(fname):
+            # The file is replaced once written, not to be left truncated
+            tmp_fname = fname + '.tmp'
             if PY2:
                 # Python 2
-                with codecs.open(fname, 'w', encoding='utf-8') as configfile:
+                with codecs.open(tmp_fname, 'w',
+                                 encoding='utf-8') as configfile:
                     self._write(configfile)
             else:
                 # Python 3
-                with open(fname, 'w', encoding='utf-8') as configfile:
+                with open(tmp_fname, 'w', encoding='utf-8') as configfile:
                     self.write(configfile)
+            if os.name == 'nt' and osp.isfile(fname):
+                os.remove(fname)
+            os.rename(tmp_fname, fname)
 
-        try: # the "easy" way
-            _write_file(fname)
-        except IOError:
-            try: # the "delete and sleep" way
-                if osp.isfile(fname):
-                    os.remove(fname)
-                time.sleep(0.05)
+        with self._lock:
+            self._save_time = None
+            try: # the "easy" way
                 _write_file(fname)
-            except Exception as e:
-                print("Failed to write user configuration file.")
-                print("Please submit a bug report.")
-                raise(e)
+            except (IOError, OSError):
+                try: # the "delete and sleep" way
+                    if osp.isfile(fname):
+                        os.remove(fname)
+                    time.sleep(0.05)
+                    _write_file(fname)
+                except Exception as e:
+                    print("Failed to write user configuration file.")
+                    print("Please submit a bug report.")
+                    raise(e)
+
+    def _save_later(self):
+        """
+        Save config in a thread, SAVE_DELAY seconds after the last call
+        """
+        with self._lock:
+            self._save_time = time.time() + self.SAVE_DELAY
+            if self._save_thread is None:
+                self._save_thread = threading.Thread(target=self._wait_save)
+                self._save_thread.start()
+
+    def _wait_save(self):
+        while True:
+            with self._lock:
+                if self._save_time is None:
+                    # Already saved by sync
+                    self._save_thread = None
+                    return
+                delay = self._save_time - time.time()
+                if delay <= 0:
+                    self._save_thread = None
+                    break
+            time.sleep(delay)
+        self._save()
+
+    def sync(self):
+        """
+        Save changes which are waiting to be saved, if any
+        """
+        if self._save_time is not None:
+            self._save()
 
     def filename(self):
         """
@@ -191,12 +250,14 @@ class UserConfig(DefaultsConfig):
                  subfolder=None, backup=False, raw_mode=False,
                  remove_obsolete=False):
         DefaultsConfig.__init__(self, name, subfolder)
+        self._values = {}   # {(section, option): value}
         self.raw = 1 if raw_mode else 0
         if (version is not None) and (re.match('^(\d+).(\d+).(\d+)$', version) is None):
             raise ValueError("Version number %r is incorrect - must be in X.Y.Z format" % version)
         if isinstance(defaults, dict):
             defaults = [ (self.DEFAULT_SECTION_NAME, defaults) ]
         self.defaults = defaults
+        self.__index_defaults()
         if defaults is not None:
             self.reset_to_defaults(save=False)
         fname = self.filename()
@@ -245,21 +306,24 @@ class UserConfig(DefaultsConfig):
         """
         Load config from the associated .ini file
         """
-        try:
-            if PY2:
-                # Python 2
-                fname = self.filename()
-                if osp.isfile(fname):
-                    try:
-                        with codecs.open(fname, encoding='utf-8') as configfile:
-                            self.readfp(configfile)
-                    except IOError:
-                        print("Failed reading file", fname)
-            else:
-                # Python 3
-                self.read(self.filename(), encoding='utf-8')
-        except cp.MissingSectionHeaderError:
-            print("Warning: File contains no section headers.")
+        with self._lock:
+            self._values.clear()
+            try:
+                if PY2:
+                    # Python 2
+                    fname = self.filename()
+                    if osp.isfile(fname):
+                        try:
+                            with codecs.open(fname, encoding='utf-8'
+                                             ) as configfile:
+                                self.readfp(configfile)
+                        except IOError:
+                            print("Failed reading file", fname)
+                else:
+                    # Python 3
+                    self.read(self.filename(), encoding='utf-8')
+            except cp.MissingSectionHeaderError:
+                print("Warning: File contains no section headers.")
     
     def __load_old_defaults(self, old_version):
         """Read old defaults"""
@@ -322,6 +386,17 @@ class UserConfig(DefaultsConfig):
             for option, value in self.items(section, raw=self.raw):
                 secdict[option] = value
             self.defaults.append( (section, secdict) )
+        self.__index_defaults()
+        self._values.clear()
+
+    def __index_defaults(self):
+        """
+        Index default options by section (see 'get_default')
+        """
+        self._default_options = {}
+        for section, options in self.defaults or []:
+            if section not in self._default_options:
+                self._default_options[section] = options
 
     def reset_to_defaults(self, save=True, verbose=False, section=None):
         """
@@ -334,6 +409,13 @@ class UserConfig(DefaultsConfig):
                     self._set(sec, option, value, verbose)
         if save:
             self._save()
+
+    def _set(self, section, option, value, verbose):
+        """
+        Private set method
+        """
+        DefaultsConfig._set(self, section, option, value, verbose)
+        self._values.pop((section, option), None)
         
     def __check_section_option(self, section, option):
         """
@@ -353,12 +435,8 @@ class UserConfig(DefaultsConfig):
         -> useful for type checking in 'get' method
         """
         section = self.__check_section_option(section, option)
-        for sec, options in self.defaults:
-            if sec == section:
-                if option in options:
-                    return options[ option ]
-        else:
-            return NoDefault
+        options = self._default_options.get(section, {})
+        return options.get(option, NoDefault)
                 
     def get(self, section, option, default=NoDefault):
         """
@@ -368,19 +446,22 @@ class UserConfig(DefaultsConfig):
         will be raised if option doesn't exist)
         """
         section = self.__check_section_option(section, option)
+        if (section, option) in self._values:
+            return copy_value(self._values[(section, option)])
 
-        if not self.has_section(section):
-            if default is NoDefault:
-                raise cp.NoSectionError(section)
-            else:
-                self.add_section(section)
-        
-        if not self.has_option(section, option):
-            if default is NoDefault:
-                raise cp.NoOptionError(option, section)
-            else:
-                self.set(section, option, default)
-                return default
+        with self._lock:
+            if not self.has_section(section):
+                if default is NoDefault:
+                    raise cp.NoSectionError(section)
+                else:
+                    self.add_section(section)
+
+            if not self.has_option(section, option):
+                if default is NoDefault:
+                    raise cp.NoOptionError(option, section)
+                else:
+                    self.set(section, option, default)
+                    return default
             
         value = cp.ConfigParser.get(self, section, option, raw=self.raw)
         default_value = self.get_default(section, option)
@@ -401,7 +482,8 @@ class UserConfig(DefaultsConfig):
                 value = eval(value)
             except:
                 pass
-        return value
+        self._values[(section, option)] = value
+        return copy_value(value)
 
     def set_default(self, section, option, default_value):
         """
@@ -409,9 +491,11 @@ class UserConfig(DefaultsConfig):
         -> called when a new (section, option) is set and no default exists
         """
         section = self.__check_section_option(section, option)
-        for sec, options in self.defaults:
-            if sec == section:
-                options[ option ] = default_value
+        with self._lock:
+            for sec, options in self.defaults:
+                if sec == section:
+                    options[ option ] = default_value
+            self._values.pop((section, option), None)
 
     def set(self, section, option, value, verbose=False, save=True):
         """
@@ -438,12 +522,16 @@ class UserConfig(DefaultsConfig):
             value = repr(value)
         self._set(section, option, value, verbose)
         if save:
-            self._save()
+            self._save_later()
             
     def remove_section(self, section):
-        cp.ConfigParser.remove_section(self, section)
+        with self._lock:
+            cp.ConfigParser.remove_section(self, section)
+        self._values.clear()
         self._save()
             
     def remove_option(self, section, option):
-        cp.ConfigParser.remove_option(self, section, option)
+        with self._lock:
+            cp.ConfigParser.remove_option(self, section, option)
+        self._values.pop((section, option), None)
         self._save()
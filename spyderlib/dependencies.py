@@ -4,15 +4,111 @@
 # Licensed under the terms of the MIT License
 # (see spyderlib/__init__.py for details)
 
-"""Module checking Spyder runtime dependencies"""
+"""Module checking Spyder runtime dependencies
+
+Installed versions are only looked for when they are needed (e.g. by the
+dependencies dialog box). They are read from the metadata of the packages
+installed in site-packages folders, which are cached until one of these
+folders changes: modules are only imported when they have no metadata.
+"""
 
 
 import os
+import os.path as osp
+import sys
 
 # Local imports
+from spyderlib.config.base import get_conf_path
+from spyderlib.py3compat import pickle
 from spyderlib.utils import programs
 
 
+# Metadata folder extensions of installed packages
+METADATA_EXTENSIONS = ('.dist-info', '.egg-info')
+
+# Installed versions, by module name (see get_installed_versions)
+_VERSIONS = {}
+
+
+def get_site_packages():
+    """Return the site-packages folders of sys.path"""
+    return [path for path in sys.path if path and osp.isdir(path)
+            and osp.basename(path) in ('site-packages', 'dist-packages')]
+
+
+def read_installed_versions(dirnames):
+    """
+    Return the versions of the packages installed in folders *dirnames*,
+    by name of the top-level modules they provide, from their metadata
+    """
+    versions = {}
+    for dirname in dirnames:
+        try:
+            names = sorted(os.listdir(dirname))
+        except OSError:
+            continue
+        for name in names:
+            base, ext = osp.splitext(name)
+            parts = base.split('-')
+            if ext not in METADATA_EXTENSIONS or len(parts) < 2:
+                continue
+            modnames = [parts[0], parts[0].lower()]
+            try:
+                with open(osp.join(dirname, name, 'top_level.txt')) as fd:
+                    modnames = fd.read().split() or modnames
+            except (IOError, OSError):
+                pass
+            for modname in modnames:
+                # Packages found first in sys.path are the ones imported
+                versions.setdefault(modname, parts[1])
+    return versions
+
+
+def get_installed_versions():
+    """
+    Return the versions of the packages installed in site-packages, by name
+    of the top-level modules they provide
+
+    Versions are cached on disk, until the modification time of one of the
+    site-packages folders changes.
+    """
+    if not _VERSIONS:
+        dirnames = get_site_packages()
+        key = [sys.executable, sys.version]
+        for dirname in dirnames:
+            key.append((dirname, os.stat(dirname).st_mtime))
+        filename = get_conf_path('dependencies.pickle')
+        try:
+            with open(filename, 'rb') as fd:
+                cached_key, versions = pickle.load(fd)
+        except Exception:
+            cached_key, versions = None, None
+        if cached_key != key:
+            versions = read_installed_versions(dirnames)
+            try:
+                with open(filename, 'wb') as fd:
+                    pickle.dump((key, versions), fd, pickle.HIGHEST_PROTOCOL)
+            except (IOError, OSError):
+                pass
+        _VERSIONS[None] = versions
+    return _VERSIONS[None]
+
+
+def get_module_version(modname):
+    """
+    Return the version of module *modname*, or None if it is not installed
+    or its version can't be retrieved
+    """
+    version = get_installed_versions().get(modname)
+    if version is None:
+        try:
+            version = programs.get_module_version(modname)
+        except ImportError:
+            # Module is not installed
+            pass
+    return version
+
+
 class Dependency(object):
     """Spyder's dependency
 
@@ -27,14 +123,16 @@ class Dependency(object):
         self.modname = modname
         self.features = features
         self.required_version = required_version
-        if installed_version is None:
-            try:
-                self.installed_version = programs.get_module_version(modname)
-            except ImportError:
-                # Module is not installed
-                self.installed_version = None
-        else:
-            self.installed_version = installed_version
+        self._installed_version = installed_version
+        self._probed = installed_version is not None
+
+    @property
+    def installed_version(self):
+        """Installed version, looked for the first time it is needed"""
+        if not self._probed:
+            self._installed_version = get_module_version(self.modname)
+            self._probed = True
+        return self._installed_version
 
     def check(self):
         """Check if dependency is installed"""
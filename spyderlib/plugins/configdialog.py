@@ -886,6 +886,8 @@ class MainConfigPage(GeneralConfigPage):
         self.setLayout(vlayout)
 
     def apply_settings(self, options):
+        if 'icon_theme' in options:
+            ima.reset_icon_cache()
         self.main.apply_settings()
 
     def _save_lang(self):
@@ -184,6 +184,12 @@ class EditorConfigPage(PluginConfigPage):
                   tip=_("If this option is enabled, clicking on an object\n"
                         "name (left-click + Ctrl key) will go this object\n"
                         "definition (if resolved)."))
+            server_box = newcb(_("Run introspection in a separate process"),
+                  'introspection_server',
+                  tip=_("If this option is enabled, code completion,\n"
+                        "calltips and go-to-definition are computed in\n"
+                        "a separate process, so that they never slow\n"
+                        "down the editor (requires a restart)."))
         else:
             rope_label = QLabel(_("<b>Warning:</b><br>"
                                   "The Python module <i>rope</i> is not "
@@ -280,6 +286,7 @@ class EditorConfigPage(PluginConfigPage):
             introspection_layout.addWidget(case_comp_box)
             introspection_layout.addWidget(comp_enter_box)
             introspection_layout.addWidget(gotodef_box)
+            introspection_layout.addWidget(server_box)
         else:
             introspection_layout.addWidget(rope_label)
         introspection_group.setLayout(introspection_layout)
@@ -495,6 +502,8 @@ class Editor(SpyderPluginWidget):
         
     def set_projectexplorer(self, projectexplorer):
         self.projectexplorer = projectexplorer
+        for editorstack in self.editorstacks:
+            editorstack.set_projectexplorer(projectexplorer)
 
     @Slot()
     def show_hide_project_explorer(self):
@@ -1102,6 +1111,7 @@ class Editor(SpyderPluginWidget):
             editorstack.refresh_eol_chars.connect(self.eol_status.eol_changed)
             
         editorstack.set_inspector(self.inspector)
+        editorstack.set_projectexplorer(self.projectexplorer)
         editorstack.set_io_actions(self.new_action, self.open_action,
                                    self.save_action, self.revert_action)
         editorstack.set_tempfile_path(self.TEMPFILE_PATH)
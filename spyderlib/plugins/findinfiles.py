@@ -50,12 +50,15 @@ class FindInFiles(FindInFilesWidget, SpyderPluginMixin):
         exclude_regexp = self.get_option('exclude_regexp')
         in_python_path = self.get_option('in_python_path')
         more_options = self.get_option('more_options')
+        use_index = self.get_option('use_index', False)
+        gitignore = self.get_option('gitignore', True)
         FindInFilesWidget.__init__(self, parent,
                                    search_text, search_text_regexp, search_path,
                                    include, include_idx, include_regexp,
                                    exclude, exclude_idx, exclude_regexp,
                                    supported_encodings,
-                                   in_python_path, more_options)
+                                   in_python_path, more_options, use_index,
+                                   gitignore)
         SpyderPluginMixin.__init__(self, parent)
         
         # Initialize plugin
@@ -141,7 +144,7 @@ class FindInFiles(FindInFilesWidget, SpyderPluginMixin):
             search_text, text_re, search_path, \
             include, include_idx, include_re, \
             exclude, exclude_idx, exclude_re, \
-            in_python_path, more_options = options
+            in_python_path, more_options, use_index, gitignore = options
             hist_limit = 15
             search_text = search_text[:hist_limit]
             search_path = search_path[:hist_limit]
@@ -158,4 +161,6 @@ class FindInFiles(FindInFilesWidget, SpyderPluginMixin):
             self.set_option('exclude_regexp', exclude_re)
             self.set_option('in_python_path', in_python_path)
             self.set_option('more_options', more_options)
+            self.set_option('use_index', use_index)
+            self.set_option('gitignore', gitignore)
         return True
@@ -27,7 +27,7 @@ from spyderlib.config.gui import (get_shortcut, set_shortcut,
 from spyderlib.plugins.configdialog import GeneralConfigPage
 from spyderlib.utils import icon_manager as ima
 from spyderlib.utils.qthelpers import get_std_icon
-from spyderlib.utils.stringmatching import get_search_regex, get_search_scores
+from spyderlib.utils.stringmatching import get_search_regex, SearchMatcher
 from spyderlib.widgets.helperwidgets import HTMLDelegate
 from spyderlib.widgets.helperwidgets import HelperToolButton
 
@@ -441,6 +441,7 @@ class ShortcutsModel(QAbstractTableModel):
         self.rich_text = []
         self.normal_text = []
         self.letters = ''
+        self.matcher = None
         self.label = QLabel()
         self.widths = []
 
@@ -545,7 +546,9 @@ class ShortcutsModel(QAbstractTableModel):
         """Update search letters with text input in search box."""
         self.letters = text
         names = [shortcut.name for shortcut in self.shortcuts]
-        results = get_search_scores(text, names, template='<b>{0}</b>')
+        if self.matcher is None or self.matcher.choices != names:
+            self.matcher = SearchMatcher(names, template='<b>{0}</b>')
+        results = self.matcher.get_scores(text)
         self.normal_text, self.rich_text, self.scores = zip(*results)
         self.reset()
 
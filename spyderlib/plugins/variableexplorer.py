@@ -51,6 +51,14 @@ class VariableExplorerConfigPage(PluginConfigPage):
                             )
         display_boxes = [self.create_checkbox(text, option, tip=tip)
                          for option, text, tip in display_data]
+        if programs.is_module_installed('numpy'):
+            minmax_spin = self.create_spinbox(
+                    _("Estimate min/max of arrays larger than: "),
+                    _(" elements"), 'minmax_threshold',
+                    min_=1000, max_=1000000000, step=100000,
+                    tip=_("The min/max values of larger arrays are computed "
+                          "from a sample of this number of elements"))
+            display_boxes.insert(2, minmax_spin)
         
         ar_layout = QVBoxLayout()
         ar_layout.addWidget(ar_box)
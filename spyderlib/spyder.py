@@ -145,6 +145,7 @@ from spyderlib.utils.iofuncs import load_session, save_session, reset_session
 from spyderlib.utils.programs import is_module_installed
 from spyderlib.utils.introspection import module_completion
 from spyderlib.utils.misc import select_port
+from spyderlib.utils.bsdsocket import clean_shared_arrays
 from spyderlib.py3compat import (PY3, to_text_string, is_text_string, getcwd,
                                  u, qbytearray_to_str, configparser as cp)
 
@@ -2187,6 +2188,7 @@ class MainWindow(QMainWindow):
         self.dialog_manager.close_all()
         if self.toolbars_visible:
             self.save_visible_toolbars()
+        CONF.sync()
         self.already_closed = True
         return True
 
@@ -2999,6 +3001,10 @@ def run_spyder(app, options, args):
     Start QApplication event loop
     """
     #TODO: insert here
+    # Remove the files of the arrays sent by consoles which were killed
+    # before they were loaded
+    clean_shared_arrays()
+
     # Main window
     main = MainWindow(options)
     try:
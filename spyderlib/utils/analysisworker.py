@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Code analysis worker
+
+This script is started by Spyder (see codeanalysis.py) to run the code
+checkers in a separate process, so that they never hold the GIL of the
+process running the Qt event loop.
+
+Every packet exchanged with Spyder is a dict:
+    * requests: {'checker': 'pyflakes', 'source_code': b'...'}
+    * replies: {'results': [('message', 1), ...]}
+"""
+
+import socket
+import sys
+
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+from spyderlib.utils.codeanalysis import CHECKERS
+
+
+def main(port):
+    """Connect to Spyder on *port* and run the checks it sends"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.connect(("127.0.0.1", port))
+    except socket.error:
+        # Spyder went away before we could connect
+        return
+    try:
+        while True:
+            cdict = read_packet(sock)
+            if cdict is None:
+                break
+            checker = CHECKERS[cdict['checker']]
+            try:
+                results = checker(cdict['source_code'])
+            except Exception:
+                results = []
+            write_packet(sock, dict(results=results))
+    finally:
+        sock.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]))
@@ -11,18 +11,35 @@
 # and failure to read out buffers will most likely lock up Spyder.
 
 import os
+import sys
 import socket
 import struct
+import tempfile
 import threading
 import errno
+import fnmatch
+import time
 import traceback
+from io import BytesIO
 
 # Local imports
 from spyderlib.config.base import DEBUG, STDERR
 DEBUG_EDITOR = DEBUG >= 3
-from spyderlib.py3compat import pickle
+from spyderlib.py3compat import pickle, PY2, PY33
 PICKLE_HIGHEST_PROTOCOL = 2
 
+# NumPy arrays bigger than this (in bytes) are not pickled: they are passed
+# through memory-mapped temporary files (see dumps)
+SHARED_ARRAY_THRESHOLD = 2**20
+
+# Prefix of the temporary files of shared arrays, followed by the id of the
+# process which created them
+SHARED_ARRAY_PREFIX = 'spyder-'
+
+# Temporary files of shared arrays older than this (in seconds) were never
+# loaded (e.g. the receiving process was killed)
+SHARED_ARRAY_MAX_AGE = 3600
+
 
 def temp_fail_retry(error, fun, *args):
     """Retry to execute function, ignoring EINTR error (interruptions)"""
@@ -39,16 +56,154 @@ def temp_fail_retry(error, fun, *args):
 SZ = struct.calcsize("l")
 
 
+def _save_shared_array(array, filenames):
+    """
+    Save *array* to a temporary file and return its name, or None
+
+    The file name is appended to list *filenames*.
+    """
+    import numpy as np
+    fd, filename = tempfile.mkstemp(prefix='%s%d-' % (SHARED_ARRAY_PREFIX,
+                                                       os.getpid()),
+                                    suffix='.npy')
+    try:
+        with os.fdopen(fd, 'wb') as fdesc:
+            np.save(fdesc, array)
+    except Exception:
+        remove_shared_arrays([filename])
+        return
+    filenames.append(filename)
+    return filename
+
+
+def remove_shared_arrays(filenames):
+    """Remove the temporary files *filenames* of shared arrays"""
+    for filename in filenames:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+
+def clean_shared_arrays(pid=None, max_age=SHARED_ARRAY_MAX_AGE):
+    """
+    Remove the temporary files of shared arrays which were not loaded
+
+    These are the files created by process *pid* if it is given (e.g. when
+    it exits), or else the files older than *max_age* seconds.
+    """
+    dirname = tempfile.gettempdir()
+    if pid is None:
+        pattern = SHARED_ARRAY_PREFIX + '*.npy'
+    else:
+        pattern = '%s%d-*.npy' % (SHARED_ARRAY_PREFIX, pid)
+    try:
+        names = fnmatch.filter(os.listdir(dirname), pattern)
+    except OSError:
+        return
+    filenames = [os.path.join(dirname, name) for name in names]
+    if pid is None:
+        now = time.time()
+        for filename in filenames[:]:
+            try:
+                if now - os.path.getmtime(filename) < max_age:
+                    filenames.remove(filename)
+            except OSError:
+                filenames.remove(filename)
+    remove_shared_arrays(filenames)
+
+
+def load_shared_array(filename):
+    """Load an array saved by _save_shared_array and remove its file"""
+    import numpy as np
+    if os.name == 'nt':
+        # Mapped files can't be removed on Windows
+        array = np.load(filename)
+    else:
+        # Pages are shared with the page cache until they are modified
+        array = np.load(filename, mmap_mode='c').view(np.ndarray)
+    os.remove(filename)
+    return array
+
+
+def _reduce_array(array, filenames):
+    """Reduce *array*, passing it through a file if it is big"""
+    if array.nbytes >= SHARED_ARRAY_THRESHOLD and not array.dtype.hasobject:
+        filename = _save_shared_array(array, filenames)
+        if filename is not None:
+            return (load_shared_array, (filename,))
+    return array.__reduce_ex__(PICKLE_HIGHEST_PROTOCOL)
+
+
+def _persistent_id(obj, filenames):
+    """Return the persistent id of big arrays (Python 2 version of
+    _reduce_array)"""
+    np = sys.modules['numpy']
+    if type(obj) is np.ndarray and not obj.dtype.hasobject \
+      and obj.nbytes >= SHARED_ARRAY_THRESHOLD:
+        return _save_shared_array(obj, filenames)
+
+
+def dumps(data, filenames=None):
+    """
+    Pickle *data*
+
+    Big NumPy arrays (including the blocks of pandas objects) are saved to
+    temporary files, so that only their file names are pickled: the
+    receiving process maps them instead of unpickling a copy (see loads).
+    The names of these files are appended to list *filenames*, if given, so
+    that they can be removed if the data is not sent. They are removed if
+    pickling fails.
+    """
+    np = sys.modules.get('numpy')
+    if np is None or not (PY2 or PY33):
+        return pickle.dumps(data, PICKLE_HIGHEST_PROTOCOL)
+    created = []
+    output = BytesIO()
+    pickler = pickle.Pickler(output, PICKLE_HIGHEST_PROTOCOL)
+    if PY2:
+        # Only called for instances of Python classes, unlike persistent_id
+        pickler.inst_persistent_id = lambda obj: _persistent_id(obj, created)
+    else:
+        import copyreg
+        pickler.dispatch_table = copyreg.dispatch_table.copy()
+        pickler.dispatch_table[np.ndarray] = \
+                                lambda array: _reduce_array(array, created)
+    try:
+        pickler.dump(data)
+    except BaseException:
+        remove_shared_arrays(created)
+        raise
+    if filenames is not None:
+        filenames.extend(created)
+    return output.getvalue()
+
+
+def loads(data):
+    """Unpickle *data* pickled by dumps"""
+    if PY2:
+        unpickler = pickle.Unpickler(BytesIO(data))
+        unpickler.persistent_load = load_shared_array
+        return unpickler.load()
+    else:
+        return pickle.loads(data)
+
+
 def write_packet(sock, data, already_pickled=False):
     """Write *data* to socket *sock*"""
+    filenames = []
     if already_pickled:
         sent_data = data
     else:
-        sent_data = pickle.dumps(data, PICKLE_HIGHEST_PROTOCOL)
+        sent_data = dumps(data, filenames)
     sent_data = struct.pack("l", len(sent_data)) + sent_data
     nsend = len(sent_data)
-    while nsend > 0:
-        nsend -= temp_fail_retry(socket.error, sock.send, sent_data)
+    try:
+        while nsend > 0:
+            nsend -= temp_fail_retry(socket.error, sock.send, sent_data)
+    except BaseException:
+        remove_shared_arrays(filenames)
+        raise
 
 
 def read_packet(sock, timeout=None):
@@ -84,7 +239,7 @@ def read_packet(sock, timeout=None):
         sock.settimeout(None)
     if data is not None:
         try:
-            return pickle.loads(data)
+            return loads(data)
         except Exception:
             # Catch all exceptions to avoid locking spyder
             if DEBUG_EDITOR:
@@ -176,6 +331,32 @@ if __name__ == '__main__':
         write_packet(client, "a tiny piece of data")
         print('..got "%s" from read_packet()' % (read_packet(accsock)))
         
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            print("-- Testing big NumPy arrays transport --")
+            array = np.arange(SHARED_ARRAY_THRESHOLD, dtype=float)
+            write_packet(client, {'array': array})
+            received = read_packet(accsock)['array']
+            assert type(received) is np.ndarray
+            assert (received == array).all()
+            print('..got an array of %d bytes' % received.nbytes)
+
+            print("-- Testing the removal of unsent arrays files --")
+            filenames = []
+            try:
+                dumps([array, lambda: None], filenames)
+            except Exception:
+                pass
+            assert filenames == []
+            dumps(array, filenames)
+            assert len(filenames) == 1 and os.path.isfile(filenames[0])
+            clean_shared_arrays(os.getpid())
+            assert not os.path.isfile(filenames[0])
+            print('..ok')
+        
         client.close()
         server.close()
         
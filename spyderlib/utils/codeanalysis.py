@@ -11,14 +11,22 @@ Source code analysis utilities
 import sys
 import re
 import os
+import os.path as osp
 from subprocess import Popen, PIPE
+import socket
 import tempfile
+import threading
 import traceback
+import hashlib
+from collections import OrderedDict
 
 # Local import
-from spyderlib.config.base import _, DEBUG
+from spyderlib.config.base import (_, DEBUG, debug_print,
+                                   get_module_source_path)
 from spyderlib.utils import programs, encoding
-from spyderlib.py3compat import to_text_string, to_binary_string, PY3
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+from spyderlib.py3compat import (to_text_string, to_binary_string, PY3,
+                                 is_text_string)
 from spyderlib import dependencies
 DEBUG_EDITOR = DEBUG >= 3
 
@@ -163,11 +171,50 @@ def check(args, source_code, filename=None, options=None):
     return results
 
 
+def check_with_pep8_module(source_code):
+    """Check source code with the pep8 module, in this process
+    Returns None if the pep8 module can't be imported"""
+    try:
+        import pep8
+        pep8.StyleGuide
+    except (ImportError, AttributeError):
+        return
+
+    class Report(pep8.BaseReport):
+        """Collect the (message, line number) tuples of pep8 errors"""
+        def __init__(self, options):
+            pep8.BaseReport.__init__(self, options)
+            self.results = []
+
+        def error(self, line_number, offset, text, check):
+            code = pep8.BaseReport.error(self, line_number, offset, text,
+                                         check)
+            if code:
+                self.results.append((text, line_number))
+            return code
+
+    if PY3:
+        source_code = encoding.decode(source_code)[0]
+    lines = source_code.splitlines(True)
+    style = pep8.StyleGuide(reporter=Report, repeat=True)
+    style.input_file('<string>', lines=lines)
+    results = []
+    for message, lineno in style.options.report.results:
+        if lineno > len(lines) or 'analysis:ignore' not in lines[lineno-1]:
+            results.append((message, lineno))
+    return results
+
+
 def check_with_pep8(source_code, filename=None):
     """Check source code with pep8"""
     try:
-        args = get_checker_executable('pep8')
-        results = check(args, source_code, filename=filename, options=['-r'])
+        results = None
+        if filename is None:
+            results = check_with_pep8_module(source_code)
+        if results is None:
+            args = get_checker_executable('pep8')
+            results = check(args, source_code, filename=filename,
+                            options=['-r'])
     except Exception:
         # Never return None to avoid lock in spyderlib/widgets/editor.py
         # See Issue 1547
@@ -177,6 +224,184 @@ def check_with_pep8(source_code, filename=None):
     return results
 
 
+#==============================================================================
+# Analysis process pool
+#==============================================================================
+CHECKERS = {
+    'pyflakes': check_with_pyflakes,
+    'pep8': check_with_pep8,
+    'todo': find_tasks,
+    }
+
+ANALYSIS_CACHE_SIZE = 128
+ANALYSIS_WORKERS = 2
+CONNECT_TIMEOUT_SEC = 20
+
+
+class AnalysisCache(object):
+    """Cache of analysis results, indexed by checker and source code hash"""
+    def __init__(self, maxsize=ANALYSIS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(checker_name, source_code):
+        """Return the cache key of *source_code* analysed by checker
+        *checker_name*"""
+        if is_text_string(source_code):
+            source_code = to_binary_string(source_code, 'utf-8')
+        return (checker_name, hashlib.sha1(source_code).hexdigest())
+
+    def get(self, key):
+        """Return the results cached for *key*, or None"""
+        with self._lock:
+            results = self._results.pop(key, None)
+            if results is not None:
+                self._results[key] = results
+            return results
+
+    def set(self, key, results):
+        """Cache *results* for *key*"""
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = results
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+ANALYSIS_CACHE = AnalysisCache()
+
+
+class AnalysisPool(object):
+    """
+    Pool of processes running the code checkers (see analysisworker.py)
+
+    Checks are blocking, they are meant to be run from threads.
+    """
+    def __init__(self, nworkers):
+        self.nworkers = nworkers
+        self.workers = []
+        self.connecting = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        """Start the worker processes, they connect in the background"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(self.nworkers)
+        port = server.getsockname()[1]
+        env = os.environ.copy()
+        spyder_path = osp.dirname(get_module_source_path('spyderlib'))
+        env['PYTHONPATH'] = os.pathsep.join([spyder_path] +
+                             [p for p in [env.get('PYTHONPATH')] if p])
+        script = get_module_source_path('spyderlib.utils',
+                                        'analysisworker.py')
+        try:
+            for _i in range(self.nworkers):
+                Popen([sys.executable, script, str(port)], env=env)
+        except (OSError, ValueError):
+            server.close()
+            raise
+        self.connecting = True
+        thread = threading.Thread(target=self._accept, args=(server,))
+        thread.setDaemon(True)
+        thread.start()
+
+    def _accept(self, server):
+        """Accept the connections of the workers"""
+        server.settimeout(CONNECT_TIMEOUT_SEC)
+        started = self.nworkers
+        connected = 0
+        try:
+            for _i in range(started):
+                sock, _addr = server.accept()
+                sock.settimeout(None)
+                connected += 1
+                with self._condition:
+                    self.workers.append(sock)
+                    self._condition.notify()
+        except socket.error as e:
+            debug_print('Analysis worker did not connect: %s' % e)
+        finally:
+            server.close()
+            with self._condition:
+                self.connecting = False
+                # Forget about the workers which did not connect
+                self.nworkers -= started - connected
+                self._condition.notify_all()
+
+    def run(self, checker_name, source_code):
+        """Run checker *checker_name* on *source_code* in a worker
+        Returns None if no worker is available"""
+        with self._condition:
+            while not self.workers and self.nworkers and \
+              (self.connecting or len(self.workers) < self.nworkers):
+                self._condition.wait()
+            if not self.workers:
+                return
+            sock = self.workers.pop()
+        try:
+            write_packet(sock, dict(checker=checker_name,
+                                    source_code=source_code))
+            reply = read_packet(sock)
+        except socket.error:
+            reply = None
+        with self._condition:
+            if reply is None:
+                # The worker went away
+                debug_print('Analysis worker connection closed')
+                self.nworkers -= 1
+                sock.close()
+            else:
+                self.workers.append(sock)
+            self._condition.notify()
+        if reply is not None:
+            return reply['results']
+
+ANALYSIS_POOL = None
+_ANALYSIS_POOL_LOCK = threading.Lock()
+
+def get_analysis_pool():
+    """Return the analysis pool, starting it the first time
+    Returns None if its workers could not be started"""
+    global ANALYSIS_POOL
+    with _ANALYSIS_POOL_LOCK:
+        if ANALYSIS_POOL is None and not getattr(sys, 'frozen', False):
+            pool = AnalysisPool(ANALYSIS_WORKERS)
+            try:
+                pool.start()
+            except (OSError, socket.error, ValueError) as e:
+                debug_print('Could not start analysis workers: %s' % e)
+                pool.nworkers = 0
+            ANALYSIS_POOL = pool
+        if ANALYSIS_POOL is not None and ANALYSIS_POOL.nworkers:
+            return ANALYSIS_POOL
+
+
+def get_cached_results(checker_name, source_code):
+    """Return the cached results of checker *checker_name* on *source_code*,
+    or None"""
+    return ANALYSIS_CACHE.get(AnalysisCache.get_key(checker_name,
+                                                    source_code))
+
+
+def run_checker(checker_name, source_code):
+    """Run checker *checker_name* (see CHECKERS) on *source_code*
+
+    The checker is run in the analysis pool when possible, and its results
+    are cached. This is blocking: it is meant to be called from a thread."""
+    key = AnalysisCache.get_key(checker_name, source_code)
+    results = ANALYSIS_CACHE.get(key)
+    if results is None:
+        pool = get_analysis_pool()
+        if pool is not None:
+            results = pool.run(checker_name, source_code)
+        if results is None:
+            results = CHECKERS[checker_name](source_code)
+        ANALYSIS_CACHE.set(key, results)
+    return results
+
+
 if __name__ == '__main__':
 #    fname = __file__
     fname = os.path.join(os.path.dirname(__file__),
@@ -187,3 +412,5 @@ if __name__ == '__main__':
 #    check_results = check_with_pep8(code, fname)
     for message, line in check_results:
         sys.stdout.write("Message: %s -- Line: %s\n" % (message, line))
+    assert run_checker('todo', code) == find_tasks(code)
+    assert get_cached_results('todo', code) == find_tasks(code)
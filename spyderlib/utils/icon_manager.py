@@ -20,6 +20,12 @@ _resource = {
     'loaded': False,
 }
 
+# Icon theme and icons already created for it (see reset_icon_cache)
+_cache = {
+    'theme': None,
+    'icons': {},
+}
+
 _qtaargs = {
     'log':                     [('fa.file-text-o',), {}],
     'configure':               [('fa.wrench',), {}],
@@ -246,8 +252,32 @@ def get_icon(name, default=None, resample=False):
         return icon
 
 
+def get_icon_theme():
+    """Return the icon theme, as read from the configuration the first time"""
+    if _cache['theme'] is None:
+        _cache['theme'] = CONF.get('main', 'icon_theme')
+    return _cache['theme']
+
+
+def reset_icon_cache():
+    """Forget the icon theme and the icons created for it
+    Must be called when the icon theme option changes"""
+    _cache['theme'] = None
+    _cache['icons'].clear()
+
+
 def icon(name, resample=False, icon_path=None):
-    theme = CONF.get('main', 'icon_theme')
+    """Return icon *name* of the icon theme
+    Icons are created once per theme: copies of them are returned"""
+    key = (name, resample, icon_path)
+    icons = _cache['icons']
+    if key not in icons:
+        icons[key] = _create_icon(get_icon_theme(), name, resample, icon_path)
+    icon = icons[key]
+    return QIcon(icon) if icon is not None else None
+
+
+def _create_icon(theme, name, resample, icon_path):
     if theme == 'spyder 3':
         if not _resource['loaded']:
             qta.load_font('spyder', 'spyder.ttf', 'spyder-charmap.json',
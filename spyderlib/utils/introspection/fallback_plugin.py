@@ -70,7 +70,6 @@ class FallbackPlugin(IntrospectionPlugin):
         (e.g. cython and enaml) for a goto definition
         """
         token = info.obj
-        lines = info.lines
         source_code = info.source_code
         filename = info.filename
 
@@ -81,7 +80,7 @@ class FallbackPlugin(IntrospectionPlugin):
             token = token.split('.')[-1]
 
         line_nr = get_definition_with_regex(source_code, token,
-                                            len(lines))
+                                            info.line_num)
         if line_nr is None:
             return
         line = info.line
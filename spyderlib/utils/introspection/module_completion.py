@@ -21,10 +21,10 @@
 import imp
 import inspect
 import os.path
-import pkgutil
 import re
 from time import time
 import sys
+import threading
 from zipimport import zipimporter
 
 from spyderlib.config.base import get_conf_path, running_in_mac_app
@@ -39,11 +39,13 @@ from pickleshare import PickleShareDB
 # Path to the modules database
 MODULES_PATH = get_conf_path('db')
 
-# Time in seconds after which we give up
-if os.name == 'nt':
-    TIMEOUT_GIVEUP = 30
-else:
-    TIMEOUT_GIVEUP = 20
+# Time in seconds we wait for unknown path entries to be indexed, the first
+# time modules are listed, before returning the modules found so far (the
+# rest is indexed in the background). Next calls never wait.
+INDEX_TIMEOUT = 2
+
+# Minimum time in seconds between two checks of the path entries mtime
+INDEX_REFRESH_INTERVAL = 10
 
 # Py2app only uses .pyc files for the stdlib when optimize=0,
 # so we need to add it as another suffix here
@@ -61,6 +63,13 @@ import_re = re.compile(r'(?P<name>[a-zA-Z_][a-zA-Z0-9_]*?)'
 # Modules database
 modules_db = PickleShareDB(MODULES_PATH)
 
+# Index of the modules of each path entry: {path: (mtime, modules)}
+_index = None
+_index_lock = threading.Lock()
+_index_thread = None
+_index_time = 0
+_index_waited = False
+
 #-----------------------------------------------------------------------------
 # Utility functions
 #-----------------------------------------------------------------------------
@@ -104,6 +113,73 @@ def module_list(path):
     return list(set(modules))
 
 
+def _path_mtime(path):
+    """Return the modification time of a path entry, or None"""
+    try:
+        return os.stat(path or '.').st_mtime
+    except OSError:
+        return None
+
+
+def _get_index():
+    """Return the modules index, loading it from the database if needed"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = dict(modules_db.get('rootmodules_index', {}))
+            except Exception:
+                _index = {}
+        return _index
+
+
+def _update_index(paths):
+    """Rescan the path entries whose modification time has changed"""
+    index = _get_index()
+    changed = False
+    for path in paths:
+        mtime = _path_mtime(path)
+        entry = index.get(path)
+        if entry is not None and entry[0] == mtime:
+            continue
+        modules = module_list(path) if mtime is not None else []
+        with _index_lock:
+            index[path] = (mtime, modules)
+        changed = True
+    if changed:
+        with _index_lock:
+            snapshot = dict(index)
+        try:
+            modules_db['rootmodules_index'] = snapshot
+        except Exception:
+            pass
+
+
+def refresh_index(paths, timeout=None):
+    """
+    Update the modules index of the path entries *paths* in a thread
+
+    The path entries are checked at most every INDEX_REFRESH_INTERVAL seconds,
+    unless some of them were never indexed. Wait at most *timeout* seconds for
+    the update to finish.
+    """
+    global _index_thread, _index_time
+    index = _get_index()
+    missing = [path for path in paths if path not in index]
+    with _index_lock:
+        running = _index_thread is not None and _index_thread.is_alive()
+        if not running and (missing or
+                            time() - _index_time > INDEX_REFRESH_INTERVAL):
+            _index_time = time()
+            _index_thread = threading.Thread(target=_update_index,
+                                             args=(list(paths),))
+            _index_thread.setDaemon(True)
+            _index_thread.start()
+        thread = _index_thread
+    if timeout and thread is not None:
+        thread.join(timeout)
+
+
 def get_root_modules(paths):
     """
     Returns list of names of all modules from PYTHONPATH folders.
@@ -112,59 +188,154 @@ def get_root_modules(paths):
         A list of additional paths that Spyder adds to PYTHONPATH. They are
         comming from our PYTHONPATH manager and from the currently selected
         project.
-    """
-    modules = []
-    spy_modules = []
-    
-    for path in paths:
-        spy_modules += module_list(path)
-    spy_modules = set(spy_modules)
-    if '__init__' in spy_modules:
-        spy_modules.remove('__init__')
-    spy_modules = list(spy_modules)
-    
-    if 'rootmodules' in modules_db:
-        return spy_modules + modules_db['rootmodules']
 
-    t = time()
-    modules = list(sys.builtin_module_names)
+    Modules are taken from an index of each path entry, which is kept up to
+    date in the background: path entries which are slow to scan are missing
+    from the list until they are indexed.
+    """
+    global _index_waited
     # TODO: Change this sys.path for console's interpreter sys.path
-    for path in sys.path:
-        modules += module_list(path)        
-        if time() - t > TIMEOUT_GIVEUP:
-            print("Module list generation is taking too long, we give up.\n")
-            modules_db['rootmodules'] = []
-            return []
-    
-    modules = set(modules)
-    excluded_modules = ['__init__'] + spy_modules
-    for mod in excluded_modules:
-        if mod in modules:
-            modules.remove(mod)
-    modules = list(modules)
+    all_paths = list(paths) + [path for path in sys.path if path not in paths]
+    index = _get_index()
+    missing = [path for path in all_paths if path not in index]
+    if missing and not _index_waited:
+        _index_waited = True
+        refresh_index(all_paths, timeout=INDEX_TIMEOUT)
+    else:
+        refresh_index(all_paths)
 
-    modules_db['rootmodules'] = modules
-    return spy_modules + modules
+    spy_modules = set()
+    modules = set(sys.builtin_module_names)
+    with _index_lock:
+        for path in paths:
+            spy_modules.update(index.get(path, (None, []))[1])
+        for path in sys.path:
+            modules.update(index.get(path, (None, []))[1])
+    spy_modules.discard('__init__')
+    modules.discard('__init__')
+    modules -= spy_modules
+    return list(spy_modules) + list(modules)
 
 
-def get_submodules(mod):
-    """Get all submodules of a given module"""
-    def catch_exceptions(module):
-        pass
+def _is_package_dir(path):
+    """Return True if *path* is a package directory"""
+    return any(os.path.isfile(os.path.join(path, '__init__' + suffix[0]))
+               for suffix in suffixes)
+
+
+def _zip_files(path):
+    """Return the files of the zip archive *path*, with '/' as separator"""
     try:
-        m = __import__(mod)
-        submodules = [mod]
-        submods = pkgutil.walk_packages(m.__path__, m.__name__ + '.',
-                                        catch_exceptions)
-        for sm in submods:
-            sm_name = sm[1]
-            submodules.append(sm_name)
+        return [f.replace('\\', '/') for f in zipimporter(path)._files]
+    except Exception:
+        return []
+
+
+def find_module(mod):
+    """
+    Find module *mod* without importing it
+
+    Returns a (kind, location) tuple, kind being 'builtin', 'module',
+    'package' or 'zip' (location is then a (archive, prefix) tuple),
+    or None if *mod* is not found.
+    """
+    if mod in sys.builtin_module_names:
+        return 'builtin', None
+    parts = mod.split('.')
+    path = None
+    try:
+        for part in parts:
+            fileobj, pathname, description = imp.find_module(part, path)
+            if fileobj is not None:
+                fileobj.close()
+            if description[2] != imp.PKG_DIRECTORY:
+                # Submodules of a module (e.g. os.path) are aliases
+                return 'module', pathname
+            path = [pathname]
+        return 'package', pathname
     except ImportError:
+        pass
+    # Packages stored in zip archives (e.g. eggs)
+    prefix = '/'.join(parts)
+    for path in sys.path:
+        if not os.path.isfile(path):
+            continue
+        for f in _zip_files(path):
+            if f.startswith(prefix + '/__init__.'):
+                return 'zip', (path, prefix)
+    return None
+
+
+def _package_version(kind, location):
+    """
+    Return a version stamp of the package found at *location*
+
+    This is the version given by the package metadata when found next to
+    the package, or its modification time otherwise.
+    """
+    if kind == 'zip':
+        location = location[0]
+    elif kind == 'package':
+        parent, name = os.path.split(location.rstrip(os.sep))
+        metadata_re = re.compile(r'%s-([^-]+?)(-py.*)?\.(dist|egg)-info$'
+                                 % re.escape(name), re.IGNORECASE)
+        try:
+            for entry in os.listdir(parent):
+                match = metadata_re.match(entry)
+                if match:
+                    return match.group(1)
+        except OSError:
+            pass
+    if location is None:
+        return sys.version
+    return _path_mtime(location)
+
+
+def get_submodules(mod, found=None):
+    """
+    Get all submodules of a given module
+
+    Submodules are found by looking at the files of the package, so that
+    it is never imported. *found* is the result of `find_module(mod)`, if
+    already known.
+    """
+    if found is None:
+        found = find_module(mod)
+    if found is None:
         return []
-    except:
+    kind, location = found
+    if kind not in ('package', 'zip'):
         return [mod]
-    
-    return submodules
+
+    submodules = set([mod])
+    if kind == 'package':
+        for root, dirs, files in os.walk(location):
+            # Don't look into directories which are not packages
+            dirs[:] = [d for d in dirs
+                       if _is_package_dir(os.path.join(root, d))]
+            relpath = os.path.relpath(root, location)
+            if relpath == os.curdir:
+                prefix = mod
+            else:
+                prefix = '.'.join([mod] + relpath.split(os.sep))
+                submodules.add(prefix)
+            for f in files:
+                match = import_re.match(f)
+                if match and match.group('name') != '__init__':
+                    submodules.add(prefix + '.' + match.group('name'))
+    else:
+        archive, prefix = location
+        for f in _zip_files(archive):
+            if not f.startswith(prefix + '/'):
+                continue
+            parts = f[len(prefix) + 1:].split('/')
+            match = import_re.match(parts[-1])
+            if match:
+                names = parts[:-1]
+                if match.group('name') != '__init__':
+                    names.append(match.group('name'))
+                submodules.add('.'.join([mod] + names))
+    return [mod] + sorted(submodules - set([mod]))
 
 
 def is_importable(module, attr, only_modules):
@@ -264,8 +435,13 @@ def module_completion(line, paths=[]):
 
 def reset():
     """Clear root modules database"""
-    if 'rootmodules' in modules_db:
-        del modules_db['rootmodules']
+    global _index
+    with _index_lock:
+        _index = None
+    for key in ('rootmodules', 'rootmodules_index', 'submodules',
+                'submodules_index'):
+        if key in modules_db:
+            del modules_db[key]
 
 
 def get_preferred_submodules():
@@ -273,9 +449,11 @@ def get_preferred_submodules():
     Get all submodules of the main scientific modules and others of our
     interest
     """
-    if 'submodules' in modules_db:
-        return modules_db['submodules']
-    
+    try:
+        index = dict(modules_db.get('submodules_index', {}))
+    except Exception:
+        index = {}
+
     mods = ['numpy', 'scipy', 'sympy', 'pandas', 'networkx', 'statsmodels',
             'matplotlib', 'sklearn', 'skimage', 'mpmath', 'os', 'PIL',
             'OpenGL', 'array', 'audioop', 'binascii', 'cPickle', 'cStringIO',
@@ -285,12 +463,24 @@ def get_preferred_submodules():
             'thread', 'time', 'wx', 'xxsubtype', 'zipimport', 'zlib', 'nose',
             'PyQt4', 'PySide', 'os.path']
 
+    # The submodules of each package are cached until its version changes
     submodules = []
+    new_index = {}
     for m in mods:
-        submods = get_submodules(m)
+        found = find_module(m)
+        if found is None:
+            continue
+        stamp = (found[1], _package_version(*found))
+        entry = index.get(m)
+        if entry is not None and entry[0] == stamp:
+            submods = entry[1]
+        else:
+            submods = get_submodules(m, found)
+        new_index[m] = (stamp, submods)
         submodules += submods
-    
-    modules_db['submodules'] = submodules
+
+    if new_index != index:
+        modules_db['submodules_index'] = new_index
     return submodules
 
 #-----------------------------------------------------------------------------
@@ -329,3 +519,10 @@ if __name__ == "__main__":
     assert module_completion(s + '(dum') == ['dump']
 
     assert module_completion(s + '(dump, Su') == ['SubElement']
+
+    submods = get_submodules('xml')
+    assert submods[0] == 'xml' and 'xml.etree.ElementTree' in submods
+    assert 'xml.etree' in submods and 'xml.etree.__init__' not in submods
+    assert get_submodules('os.path') == ['os.path']
+    assert get_submodules('sys') == ['sys']
+    assert get_submodules('no_such_module_for_spyder') == []
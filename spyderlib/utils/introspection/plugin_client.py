@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Introspection plugins client
+
+Talks to the introspection plugins server (see plugin_server.py) on behalf
+of the plugin manager.
+"""
+
+import itertools
+import os
+import os.path as osp
+import socket
+import subprocess
+import sys
+import threading
+
+from spyderlib.config.base import debug_print, get_module_source_path
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+from spyderlib.utils.introspection.plugin_manager import IntrospectionPlugin
+
+
+CONNECT_TIMEOUT_SEC = 20
+LOAD_TIMEOUT_SEC = 60
+
+
+class PluginClient(object):
+
+    """
+    Client of the introspection plugins server
+
+    Requests are blocking (they are meant to be sent from the introspection
+    workers) and may be cancelled from any thread.
+    """
+
+    def __init__(self, plugin_names):
+        self.plugin_names = plugin_names
+        self.plugins = None
+        self.process = None
+        self.sock = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._replies = {}
+        self._queue = []
+        self._loaded = threading.Event()
+
+    def start(self):
+        """Start the server process, connection happens in the background"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+        env = os.environ.copy()
+        spyder_path = osp.dirname(get_module_source_path('spyderlib'))
+        env['PYTHONPATH'] = os.pathsep.join([spyder_path] +
+                             [p for p in [env.get('PYTHONPATH')] if p])
+        script = get_module_source_path('spyderlib.utils.introspection',
+                                        'plugin_server.py')
+        try:
+            self.process = subprocess.Popen([sys.executable, script,
+                                             str(port)] + self.plugin_names,
+                                            env=env)
+        except (OSError, ValueError):
+            server.close()
+            raise
+        reader = threading.Thread(target=self._run, args=(server,))
+        reader.setDaemon(True)
+        reader.start()
+
+    def _run(self, server):
+        """Accept the server connection and dispatch its replies"""
+        server.settimeout(CONNECT_TIMEOUT_SEC)
+        try:
+            sock, _addr = server.accept()
+        except socket.error as e:
+            debug_print('Introspection server did not connect: %s' % e)
+            self.plugins = []
+            self._loaded.set()
+            return
+        finally:
+            server.close()
+        with self._send_lock:
+            self.sock = sock
+            for data in self._queue:
+                write_packet(sock, data)
+            self._queue = []
+        while True:
+            reply = read_packet(self.sock)
+            if reply is None:
+                break
+            if 'plugins' in reply:
+                self.plugins = reply['plugins']
+                debug_print('Remote plugins loaded: %s' % self.plugins)
+                self._loaded.set()
+                continue
+            with self._lock:
+                pending = self._replies.pop(reply['id'], None)
+            if pending is not None:
+                pending[1] = reply['result']
+                pending[0].set()
+        debug_print('Introspection server connection closed')
+        self.plugins = []
+        self._loaded.set()
+        with self._lock:
+            for event, _result in self._replies.values():
+                event.set()
+            self._replies.clear()
+
+    def send(self, **data):
+        """
+        Send a packet to the server, returning True on success
+
+        Packets sent before the server is connected are queued.
+        """
+        with self._send_lock:
+            if self.sock is None:
+                if self._loaded.is_set():
+                    return False
+                self._queue.append(data)
+                return True
+            try:
+                write_packet(self.sock, data)
+            except socket.error as e:
+                debug_print(e)
+                return False
+        return True
+
+    def new_request_id(self):
+        """Return a new request id"""
+        return next(self._ids)
+
+    def request(self, request_id, plugin_name, info):
+        """Send a request and wait for its result"""
+        pending = [threading.Event(), None]
+        with self._lock:
+            self._replies[request_id] = pending
+        self._loaded.wait(LOAD_TIMEOUT_SEC)
+        with self._lock:
+            if request_id not in self._replies:
+                # Cancelled while the server was loading its plugins
+                return
+            if not self.plugins or plugin_name not in self.plugins:
+                self._replies.pop(request_id)
+                return
+        if not self.send(command='request', id=request_id,
+                         plugin=plugin_name, info=info):
+            with self._lock:
+                self._replies.pop(request_id, None)
+            return
+        pending[0].wait()
+        return pending[1]
+
+    def cancel(self, request_id):
+        """Cancel a request, releasing the thread waiting for it"""
+        with self._lock:
+            pending = self._replies.pop(request_id, None)
+        if pending is not None:
+            self.send(command='cancel', id=request_id)
+            pending[0].set()
+
+
+class RemotePlugin(IntrospectionPlugin):
+
+    """Proxy to an introspection plugin run by the plugins server"""
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self._request_id = None
+
+    def _request(self, info):
+        self._request_id = request_id = self.client.new_request_id()
+        try:
+            return self.client.request(request_id, self.name, info)
+        finally:
+            self._request_id = None
+
+    # ---- IntrospectionPlugin API --------------------------------------------
+    def get_completions(self, info):
+        """Get a list of completions from the server"""
+        return self._request(info)
+
+    def get_info(self, info):
+        """Find the calltip and docs from the server"""
+        return self._request(info)
+
+    def get_definition(self, info):
+        """Get a (filename, line_num) location from the server"""
+        return self._request(info)
+
+    def set_pref(self, name, value):
+        """Set a plugin preference to a value"""
+        self.client.send(command='set_pref', plugin=self.name, name=name,
+                         value=value)
+
+    def validate(self):
+        """Validate the plugin"""
+        self.client.send(command='validate', plugin=self.name)
+
+    def cancel(self):
+        """Cancel the request being handled by the server"""
+        request_id = self._request_id
+        if request_id is not None:
+            self.client.cancel(request_id)
+
+
+PLUGIN_CLIENT = None
+
+def start_plugin_client(plugin_names):
+    """
+    Start the introspection plugins server (only one time)
+
+    Returns None if the server could not be started, or if Spyder is frozen
+    (the server script can't be run by the frozen executable).
+    """
+    global PLUGIN_CLIENT
+    if getattr(sys, 'frozen', False):
+        return
+    if PLUGIN_CLIENT is None:
+        client = PluginClient(plugin_names)
+        try:
+            client.start()
+        except (OSError, socket.error, ValueError) as e:
+            debug_print('Could not start introspection server: %s' % e)
+            return
+        PLUGIN_CLIENT = client
+    return PLUGIN_CLIENT
@@ -12,13 +12,15 @@ import functools
 import os.path as osp
 import os
 import imp
+import sys
+import threading
 import time
 
 from spyderlib.config.base import DEBUG, get_conf_path, debug_print
 from spyderlib.utils.introspection.module_completion import (
     get_preferred_submodules)
 from spyderlib.utils import sourcecode
-from spyderlib.utils.debug import log_last_error
+from spyderlib.utils.debug import log_last_error, log_time
 
 from spyderlib.qt.QtGui import QApplication
 from spyderlib.qt.QtCore import Signal, QThread, QObject, QTimer
@@ -26,6 +28,11 @@ from spyderlib.qt.QtCore import Signal, QThread, QObject, QTimer
 
 PLUGINS = ['rope', 'jedi', 'fallback']
 
+# Plugins run by the introspection server, when enabled (see plugin_server.py)
+# Note: the fallback plugin is cheap and is also called synchronously by the
+# plugin manager, so it always stays in Spyder's process
+SERVER_PLUGINS = ['rope', 'jedi']
+
 LOG_FILENAME = get_conf_path('introspection.log')
 DEBUG_EDITOR = DEBUG >= 3
 LEAD_TIME_SEC = 0.25
@@ -38,7 +45,7 @@ class RequestHandler(QObject):
 
     introspection_complete = Signal()
 
-    def __init__(self, code_info, plugins):
+    def __init__(self, code_info, plugins, workers):
         super(RequestHandler, self).__init__()
         self.info = code_info
         self.timer = QTimer()
@@ -46,9 +53,11 @@ class RequestHandler(QObject):
         self.waiting = True
         self.pending = {}
         self.result = None
+        self.cancelled = False
         self.plugins = plugins
+        self.workers = workers
         self._start_time = time.time()
-        self._threads = {}
+        self._connected = []
         for plugin in plugins:
             self._make_async_call(plugin, code_info)
 
@@ -61,35 +70,52 @@ class RequestHandler(QObject):
                     return
         self.waiting = False
 
-    def _handle_incoming(self, name):
+    def _handle_incoming(self, name, info, result):
+        # Workers are shared between requests: ignore answers to other ones
+        if info is not self.info:
+            return
         # coerce to a str in case it is a QString
         name = str(name)
-        try:
-            self._threads[name].wait()
-        except AttributeError:
+        if self.result or self.pending is None:
             return
-        if self.result:
-            return
-        result = self._threads[name].result
         if name == self.plugins[0].name or not self.waiting:
             if result:
                 self._finalize(name, result)
             else:
                 debug_print('No valid responses acquired')
+                self._disconnect_workers()
+                self.pending = None
                 self.introspection_complete.emit()
         else:
             self.pending[name] = result
 
     def _make_async_call(self, plugin, info):
-        """Trigger an introspection job in a thread"""
-        self._threads[str(plugin.name)] = thread = IntrospectionThread(plugin, info)
-        thread.request_handled.connect(self._handle_incoming)
-        thread.start()
+        """Queue an introspection job on the plugin's worker"""
+        worker = self.workers[plugin.name]
+        worker.request_handled.connect(self._handle_incoming)
+        self._connected.append(worker)
+        worker.submit(info)
+
+    def cancel(self):
+        """Cancel the request, which then completes with no result"""
+        self.cancelled = True
+        for worker in self._connected:
+            worker.cancel(self.info)
+
+    def _disconnect_workers(self):
+        """Stop listening to the workers once the request is handled"""
+        for worker in self._connected:
+            try:
+                worker.request_handled.disconnect(self._handle_incoming)
+            except (TypeError, RuntimeError):
+                pass
+        self._connected = []
 
     def _finalize(self, name, result):
         self.result = result
         self.waiting = False
         self.pending = None
+        self._disconnect_workers()
         delta = time.time() - self._start_time
         debug_print('%s request from %s finished: "%s" in %.1f sec'
             % (self.info.name, name, str(result)[:100], delta))
@@ -111,29 +137,80 @@ class GetSubmodulesThread(QThread):
         self.submods = get_preferred_submodules()
 
 
-class IntrospectionThread(QThread):
+class IntrospectionWorker(QThread):
 
     """
-    A thread to perform an introspection task
+    A long-lived thread performing the introspection tasks of one plugin
+
+    Requests are run one at a time, so a plugin is never used concurrently.
+    Only the latest request is kept while the plugin is busy: a request
+    which has not been started yet is dropped when a newer one comes in,
+    and the request being run is cancelled (if the plugin supports it).
     """
 
-    request_handled = Signal(str)
+    request_handled = Signal(str, object, object)
 
-    def __init__(self, plugin, info):
-        super(IntrospectionThread, self).__init__()
+    def __init__(self, plugin):
+        super(IntrospectionWorker, self).__init__()
         self.plugin = plugin
-        self.info = info
-        self.result = None
+        self._condition = threading.Condition()
+        self._request = None
+        self._running = None
+        self._closing = False
+
+    def submit(self, info):
+        """Queue a request, replacing any request not started yet"""
+        with self._condition:
+            dropped, self._request = self._request, info
+            if self.plugin.busy:
+                self.plugin.cancel()
+            self._condition.notify()
+        if dropped is not None:
+            # Busy workers get new requests (see PluginManager._handle_pending)
+            debug_print('%s: dropping superseded %s request'
+                        % (self.plugin.name, dropped.name))
+            self.request_handled.emit(self.plugin.name, dropped, None)
+
+    def cancel(self, info):
+        """Cancel request *info*, whether it is queued or being run"""
+        with self._condition:
+            dropped = self._request is info
+            if dropped:
+                self._request = None
+            elif self._running is info:
+                self.plugin.cancel()
+        if dropped:
+            # Answer it now, as it won't be run
+            self.request_handled.emit(self.plugin.name, info, None)
+
+    def stop(self):
+        """Stop the worker after the request being run, if any"""
+        with self._condition:
+            self._closing = True
+            self._request = None
+            self._condition.notify()
+        self.wait()
 
     def run(self):
-        func = getattr(self.plugin, 'get_%s' % self.info.name)
-        self.plugin.busy = True
-        try:
-            self.result = func(self.info)
-        except Exception as e:
-            debug_print(e)
-        self.plugin.busy = False
-        self.request_handled.emit(self.plugin.name)
+        while True:
+            with self._condition:
+                while self._request is None and not self._closing:
+                    self._condition.wait()
+                if self._closing:
+                    return
+                info, self._request = self._request, None
+                self._running = info
+            result = None
+            func = getattr(self.plugin, 'get_%s' % info.name)
+            self.plugin.busy = True
+            try:
+                result = func(info)
+            except Exception as e:
+                debug_print(e)
+            with self._condition:
+                self._running = None
+            self.plugin.busy = False
+            self.request_handled.emit(self.plugin.name, info, result)
 
 
 class CodeInfo(object):
@@ -144,6 +221,9 @@ class CodeInfo(object):
 
     def __init__(self, name, source_code, position, filename=None,
             is_python_like=True, in_comment_or_string=False, **kwargs):
+        # The editor may give the line number of *position*, taken from its
+        # document blocks, which saves counting lines in the source code
+        line_num = kwargs.pop('line_num', None)
         self.__dict__.update(kwargs)
         self.name = name
         self.filename = filename
@@ -166,25 +246,38 @@ class CodeInfo(object):
         else:
             self.docstring = ''
 
+        if position != self.position:
+            line_num = None
         self.position = position
 
         if position == 0:
-            self.lines = []
             self.column = 0
             self.line_num = 0
             self.line = ''
             self.obj = ''
             self.full_obj = ''
         else:
-            self._get_info()
-
-    def _get_info(self):
-
-        self.lines = self.source_code[:self.position].splitlines()
-        self.line_num = len(self.lines)
-
-        self.line = self.lines[-1]
-        self.column = len(self.lines[-1])
+            self._get_info(line_num)
+
+    @property
+    def lines(self):
+        """Lines of source code up to the current position"""
+        return self.source_code[:self.position].splitlines()
+
+    def _get_info(self, line_num=None):
+        # Only look at the current line, whatever the size of the source
+        source_code = self.source_code
+        line_start = source_code.rfind('\n', 0, self.position) + 1
+        line_end = source_code.find('\n', self.position)
+        if line_end == -1:
+            line_end = len(source_code)
+        if line_num is None:
+            line_num = source_code.count('\n', 0, self.position) + 1
+        self.line_num = line_num
+
+        full_line = source_code[line_start:line_end]
+        self.line = full_line[:self.position - line_start]
+        self.column = len(self.line)
 
         tokens = re.findall(self.id_regex, self.line)
         if tokens and self.line.endswith(tokens[-1]):
@@ -195,7 +288,6 @@ class CodeInfo(object):
         self.full_obj = self.obj
 
         if self.obj:
-            full_line = self.source_code.splitlines()[self.line_num - 1]
             rest = full_line[self.column:]
             match = re.match(self.id_regex, rest)
             if match:
@@ -215,7 +307,7 @@ class CodeInfo(object):
 
         """
         if position is None:
-            position = self.offset
+            position = self.position
         text = self.source_code[:position]
         return re.findall(self.id_regex, text)
 
@@ -243,6 +335,13 @@ class CodeInfo(object):
         except Exception:
             return False
 
+    def __getstate__(self):
+        """Drop the widgets, which can't be sent to the plugins server"""
+        state = self.__dict__.copy()
+        for name in ('editor', 'finfo', 'editor_widget'):
+            state.pop(name, None)
+        return state
+
 
 class PluginManager(QObject):
 
@@ -255,32 +354,41 @@ class PluginManager(QObject):
         self.pending = None
         self.busy = False
         self.load_plugins()
+        self.workers = {}
+        for name, plugin in self.plugins.items():
+            self.workers[name] = worker = IntrospectionWorker(plugin)
+            worker.start()
         self._submods_thread = GetSubmodulesThread()
         self._submods_thread.finished.connect(self._update_extension_modules)
         self._submods_thread.start()
 
     def load_plugins(self):
         """Get and load a plugin, checking in order of PLUGINS"""
-        plugins = OrderedDict()
-        for plugin_name in PLUGINS:
-            mod_name = plugin_name + '_plugin'
-            try:
-                mod = __import__('spyderlib.utils.introspection.' + mod_name,
-                                 fromlist=[mod_name])
-                cls = getattr(mod, '%sPlugin' % plugin_name.capitalize())
-                plugin = cls()
-                plugin.load_plugin()
-            except Exception as e:
-                debug_print(e)
-                if DEBUG_EDITOR:
-                    log_last_error(LOG_FILENAME)
-            else:
-                plugins[plugin_name] = plugin
-                debug_print('Instropection Plugin Loaded: %s' % plugin.name)
+        # Importing CONF here as this module is also used by the server
+        from spyderlib.config.main import CONF
+        client = None
+        if CONF.get('editor', 'introspection_server', True):
+            from spyderlib.utils.introspection.plugin_client import (
+                start_plugin_client, RemotePlugin)
+            client = start_plugin_client(SERVER_PLUGINS)
+        if client is None:
+            plugins = load_plugins(PLUGINS)
+        else:
+            plugins = OrderedDict()
+            for plugin_name in SERVER_PLUGINS:
+                plugins[plugin_name] = RemotePlugin(plugin_name, client)
+            plugins.update(load_plugins([name for name in PLUGINS
+                                         if name not in SERVER_PLUGINS]))
         self.plugins = plugins
         debug_print('Plugins loaded: %s' % self.plugins.keys())
         return plugins
 
+    def close(self):
+        """Stop the introspection workers"""
+        for worker in self.workers.values():
+            worker.stop()
+        self._submods_thread.wait()
+
     def _get_code_info(self, name, position=None, **kwargs):
 
         editor = self.editor_widget.get_current_editor()
@@ -290,6 +398,9 @@ class PluginManager(QObject):
         if position is None:
             position = editor.get_position('cursor')
 
+        block = editor.document().findBlock(position)
+        if block.isValid():
+            kwargs['line_num'] = block.blockNumber() + 1
         kwargs['editor'] = editor
         kwargs['finfo'] = finfo
         kwargs['editor_widget'] = self.editor_widget
@@ -302,7 +413,7 @@ class PluginManager(QObject):
         """Get code completion"""
         info = self._get_code_info('completions', automatic=automatic)
 
-        if 'jedi' in self.plugins and not self.plugins['jedi'].busy:
+        if 'jedi' in self.plugins:
             self._handle_request(info)
 
         elif info.line.lstrip().startswith(('import ', 'from ')):
@@ -331,6 +442,7 @@ class PluginManager(QObject):
         if not self.busy:
             for plugin in self.plugins.values():
                 plugin.validate()
+        log_cache_stats()
 
     def is_editor_ready(self):
         """Check if the main app is starting up"""
@@ -350,7 +462,11 @@ class PluginManager(QObject):
             desired = 'fallback'
 
         self.pending = (info, desired)
-        if not self.busy:
+        if self.busy:
+            # Cancel the request in flight: its plugins are then free to
+            # handle this one as soon as they stop
+            self.request.cancel()
+        else:
             self._handle_pending()
 
     def _handle_pending(self):
@@ -359,21 +475,20 @@ class PluginManager(QObject):
             self._post_message('')
             return
         info, desired = self.pending
-        if desired and self.plugins[desired].busy:
-            return
         self.busy = True
 
+        # Plugins still busy with a previous request are used too: their
+        # workers cancel it (see IntrospectionWorker.submit)
         if desired:
             plugins = [self.plugins[desired]]
         elif (info.name == 'definition' and not info.editor.is_python()
               or info.name == 'info'):
-            plugins = [p for p in self.plugins.values() if not p.busy]
+            plugins = list(self.plugins.values())
         else:
             # use all but the fallback
-            plugins = [p for p in list(self.plugins.values())[:-1]
-                       if not p. busy]
+            plugins = list(self.plugins.values())[:-1]
 
-        self.request = RequestHandler(info, plugins)
+        self.request = RequestHandler(info, plugins, self.workers)
         self.request.introspection_complete.connect(
             self._introspection_complete)
         self.pending = None
@@ -390,7 +505,10 @@ class PluginManager(QObject):
         info = self.request.info
         current = self._get_code_info('current')
 
-        if result and current.filename == info.filename:
+        if self.request.cancelled:
+            # Superseded by the pending request
+            pass
+        elif result and current.filename == info.filename:
             func = getattr(self, '_handle_%s_response' % info.name)
             try:
                 func(result, current, info)
@@ -488,29 +606,121 @@ class PluginManager(QObject):
                 pass
 
 
-def memoize(obj):
+def load_plugins(plugin_names):
+    """Get and load the plugins named in *plugin_names*, in that order"""
+    plugins = OrderedDict()
+    for plugin_name in plugin_names:
+        mod_name = plugin_name + '_plugin'
+        try:
+            mod = __import__('spyderlib.utils.introspection.' + mod_name,
+                             fromlist=[mod_name])
+            cls = getattr(mod, '%sPlugin' % plugin_name.capitalize())
+            plugin = cls()
+            plugin.load_plugin()
+        except Exception as e:
+            debug_print(e)
+            if DEBUG_EDITOR:
+                log_last_error(LOG_FILENAME)
+        else:
+            plugins[plugin_name] = plugin
+            debug_print('Instropection Plugin Loaded: %s' % plugin.name)
+    return plugins
+
+
+MEMOIZE_MAXSIZE = 100
+MEMOIZE_MAXBYTES = 4 * 1024 * 1024
+
+# Memoized functions, for cache statistics
+MEMOIZED = []
+
+
+def _sizeof(value):
+    """Cheap estimate of the memory used by *value*"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+def memoize(obj=None, maxsize=MEMOIZE_MAXSIZE, maxbytes=MEMOIZE_MAXBYTES):
     """
     Memoize objects to trade memory for execution speed
 
-    Use a limited size cache to store the value, which takes into account
-    The calling args and kwargs
+    Use a least recently used cache, limited to *maxsize* entries and to
+    about *maxbytes* of memory, to store the value, which takes into account
+    the calling args and kwargs. Calls with unhashable arguments are not
+    cached.
 
-    See https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
+    Cache statistics are given by the `cache_info` attribute of the
+    decorated function (see also `log_cache_stats`).
+
+    Can be used as `@memoize` or `@memoize(maxsize=..., maxbytes=...)`.
     """
-    cache = obj.cache = {}
+    if obj is None:
+        return functools.partial(memoize, maxsize=maxsize, maxbytes=maxbytes)
+
+    cache = obj.cache = OrderedDict()
+    stats = dict(hits=0, misses=0, evictions=0, bytes=0)
+    lock = threading.Lock()
 
     @functools.wraps(obj)
     def memoizer(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = obj(*args, **kwargs)
-        # only keep the most recent 100 entries
-        if len(cache) > 100:
-            cache.popitem(last=False)
-        return cache[key]
+        key = args
+        if kwargs:
+            key += (memoize,) + tuple(sorted(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return obj(*args, **kwargs)
+        with lock:
+            if key in cache:
+                stats['hits'] += 1
+                value, _size = cache[key] = cache.pop(key)
+                return value
+            stats['misses'] += 1
+        value = obj(*args, **kwargs)
+        size = _sizeof(key) + _sizeof(value)
+        with lock:
+            if key in cache:
+                stats['bytes'] -= cache.pop(key)[1]
+            cache[key] = (value, size)
+            stats['bytes'] += size
+            while cache and (len(cache) > maxsize
+                             or stats['bytes'] > maxbytes):
+                _key, (_value, old_size) = cache.popitem(last=False)
+                stats['bytes'] -= old_size
+                stats['evictions'] += 1
+        return value
+
+    def cache_info():
+        """Return the cache statistics"""
+        with lock:
+            info = dict(stats, size=len(cache))
+        return info
+
+    memoizer.cache_info = cache_info
+    MEMOIZED.append(memoizer)
     return memoizer
 
 
+def log_cache_stats():
+    """Output the statistics of the memoized functions on the debug log"""
+    lines = []
+    for func in MEMOIZED:
+        info = func.cache_info()
+        lines.append('%s.%s cache: %d hits, %d misses, %d evictions, '
+                     '%d entries (%d bytes)'
+                     % (func.__module__, func.__name__, info['hits'],
+                        info['misses'], info['evictions'], info['size'],
+                        info['bytes']))
+    for line in lines:
+        debug_print(line)
+    if DEBUG_EDITOR:
+        with open(LOG_FILENAME, 'a') as fd:
+            log_time(fd)
+            fd.write('\n'.join(lines) + '\n\n')
+
+
 class IntrospectionPlugin(object):
 
     busy = False
@@ -548,6 +758,10 @@ class IntrospectionPlugin(object):
         """Validate the plugin"""
         pass
 
+    def cancel(self):
+        """Cancel the request being handled, if the plugin supports it"""
+        pass
+
     @staticmethod
     @memoize
     def get_parent_until(path):
@@ -582,3 +796,83 @@ if __name__ == '__main__':
     assert test.full_obj == 'numpy'
     test2 = CodeInfo('test', code, len(code) - 2)
     assert test == test2
+
+    code = 'import os\n\nos.path.jo(1, 2)\n'
+    test = CodeInfo('test', code, code.index('jo') + 1)
+    assert (test.line_num, test.column) == (3, 9)
+    assert test.obj == 'os.path.j' and test.full_obj == 'os.path.jo'
+    test2 = CodeInfo('test', code, code.index('jo') + 1, line_num=3)
+    assert test == test2
+    test = CodeInfo('test', code, code.index('\n'))
+    assert (test.line_num, test.line) == (1, 'import os')
+
+    @memoize(maxsize=2)
+    def square(x):
+        return x * x
+    for x in [1, 2, 1, 3, 1, 2]:
+        assert square(x) == x * x
+    info = square.cache_info()
+    assert (info['hits'], info['misses'], info['evictions']) == (2, 4, 2)
+    assert info['size'] == 2
+
+    class SlowPlugin(IntrospectionPlugin):
+        """Plugin taking *info.delay* seconds, unless it is cancelled"""
+        name = 'slow'
+
+        def __init__(self):
+            self.cancelled = threading.Event()
+
+        def get_completions(self, info):
+            if self.cancelled.wait(info.delay):
+                self.cancelled.clear()
+                return
+            return ['spam']
+
+        def cancel(self):
+            self.cancelled.set()
+
+    from spyderlib.qt.QtCore import QCoreApplication
+    # Results are queued signals, delivered by the event loop
+    app = QCoreApplication.instance() or QCoreApplication([])
+    plugin = SlowPlugin()
+    worker = IntrospectionWorker(plugin)
+    handled = []
+    worker.request_handled.connect(
+        lambda name, info, result: handled.append((info.delay, result)))
+    worker.start()
+
+    def wait_handled(count):
+        start = time.time()
+        while len(handled) < count and time.time() - start < 5:
+            app.processEvents()
+            time.sleep(0.01)
+        return time.time() - start
+
+    # A newer request cancels the one in flight
+    worker.submit(CodeInfo('completions', code, 1, delay=30))
+    while not plugin.busy:
+        time.sleep(0.01)
+    worker.submit(CodeInfo('completions', code, 1, delay=0))
+    assert wait_handled(2) < 5
+    assert handled == [(30, None), (0, ['spam'])], handled
+
+    # A request superseded before being started is answered with no result
+    worker.submit(CodeInfo('completions', code, 1, delay=30))
+    while not plugin.busy:
+        time.sleep(0.01)
+    worker.submit(CodeInfo('completions', code, 1, delay=20))
+    worker.submit(CodeInfo('completions', code, 1, delay=0))
+    assert wait_handled(5) < 5
+    assert sorted(handled[2:]) == [(0, ['spam']), (20, None), (30, None)], \
+           handled
+    del handled[2:]
+
+    # So does the cancellation of a request by its handler
+    info = CodeInfo('completions', code, 1, delay=30)
+    worker.submit(info)
+    while not plugin.busy:
+        time.sleep(0.01)
+    worker.cancel(info)
+    assert wait_handled(3) < 5
+    assert handled[2] == (30, None), handled
+    worker.stop()
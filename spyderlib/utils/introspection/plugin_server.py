@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder development team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Introspection plugins server
+
+This script is started by Spyder (see plugin_client.py) to run the
+introspection plugins in a separate process, so that a slow request
+never holds the GIL of the process running the Qt event loop.
+
+Every packet exchanged with Spyder is a dict:
+    * requests: {'command': 'request', 'id': 1, 'plugin': 'jedi',
+                 'info': <CodeInfo>}
+    * cancellations: {'command': 'cancel', 'id': 1}
+    * preferences: {'command': 'set_pref', 'plugin': 'rope',
+                    'name': 'extension_modules', 'value': [...]}
+    * validation: {'command': 'validate', 'plugin': 'rope'}
+    * replies: {'id': 1, 'result': ...}
+
+The server sends the names of the plugins it could load as its first
+packet: {'plugins': ['rope', 'jedi']}.
+"""
+
+from __future__ import print_function
+
+import socket
+import sys
+import threading
+
+try:
+    import ctypes
+    _set_async_exc = ctypes.pythonapi.PyThreadState_SetAsyncExc
+except (ImportError, AttributeError):
+    # Not CPython: cancelled requests run until they are over
+    _set_async_exc = None
+
+from spyderlib.config.base import debug_print
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+from spyderlib.utils.introspection.plugin_manager import load_plugins
+
+
+class RequestCancelled(BaseException):
+    """Raised in a worker to interrupt the request it is running"""
+    pass
+
+
+class PluginWorker(threading.Thread):
+
+    """
+    A thread performing the introspection tasks of one plugin
+
+    Only the latest request is kept while the plugin is busy, and the
+    result of a cancelled request is never sent back. A cancelled request
+    which is running is interrupted by raising RequestCancelled in the
+    worker thread, so that the next request doesn't wait for it.
+    """
+
+    def __init__(self, server, plugin):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.server = server
+        self.plugin = plugin
+        self._condition = threading.Condition()
+        self._request = None
+        self._current = None
+        self._running = False   # True while the plugin may be interrupted
+
+    def submit(self, request_id, info):
+        """Queue a request, replacing any request not started yet"""
+        with self._condition:
+            if self._request is not None:
+                # Don't let the client wait for a request we will not run
+                self.server.send(id=self._request[0], result=None)
+            self._request = (request_id, info)
+            self._condition.notify()
+
+    def cancel(self, request_id):
+        """Cancel a request, whether it has been started or not"""
+        with self._condition:
+            if self._request is not None and self._request[0] == request_id:
+                self._request = None
+            elif self._current == request_id:
+                self._current = None
+                if self._running and _set_async_exc is not None:
+                    self._running = False
+                    _set_async_exc(ctypes.c_long(self.ident),
+                                   ctypes.py_object(RequestCancelled))
+
+    def _stop_running(self):
+        """Stop interrupting the plugin, dropping any pending interruption"""
+        with self._condition:
+            if self._running or _set_async_exc is None:
+                self._running = False
+            else:
+                _set_async_exc(ctypes.c_long(self.ident), None)
+
+    def run(self):
+        while True:
+            result = None
+            try:
+                with self._condition:
+                    while self._request is None:
+                        self._condition.wait()
+                    (request_id, info), self._request = self._request, None
+                    self._current = request_id
+                    self._running = True
+                func = getattr(self.plugin, 'get_%s' % info.name)
+                try:
+                    result = func(info)
+                except Exception as e:
+                    debug_print(e)
+                self._stop_running()
+            except RequestCancelled:
+                # Raised in the plugin, or right after it returned
+                debug_print('%s: request %s interrupted'
+                            % (self.plugin.name, request_id))
+                self._stop_running()
+                result = None
+            with self._condition:
+                cancelled = self._current != request_id
+                self._current = None
+            if not cancelled:
+                self.server.send(id=request_id, result=result)
+
+
+class PluginServer(object):
+
+    """Serve the requests sent by Spyder to the introspection plugins"""
+
+    def __init__(self, sock, plugin_names):
+        self.sock = sock
+        self._lock = threading.Lock()
+        self.plugins = load_plugins(plugin_names)
+        self.workers = {}
+        self.requests = {}
+        for name, plugin in self.plugins.items():
+            self.workers[name] = worker = PluginWorker(self, plugin)
+            worker.start()
+        self.send(plugins=list(self.plugins.keys()))
+
+    def send(self, **data):
+        """Send a packet to Spyder"""
+        self.requests.pop(data.get('id'), None)
+        with self._lock:
+            write_packet(self.sock, data)
+
+    def run(self):
+        """Handle the commands sent by Spyder until it goes away"""
+        while True:
+            cdict = read_packet(self.sock)
+            if cdict is None or cdict['command'] == 'quit':
+                break
+            command = cdict['command']
+            if command == 'request':
+                worker = self.workers.get(cdict['plugin'])
+                if worker is None:
+                    self.send(id=cdict['id'], result=None)
+                else:
+                    self.requests[cdict['id']] = worker
+                    worker.submit(cdict['id'], cdict['info'])
+            elif command == 'cancel':
+                worker = self.requests.pop(cdict['id'], None)
+                if worker is not None:
+                    worker.cancel(cdict['id'])
+            elif command == 'set_pref':
+                plugin = self.plugins.get(cdict['plugin'])
+                if plugin is not None:
+                    plugin.set_pref(cdict['name'], cdict['value'])
+            elif command == 'validate':
+                plugin = self.plugins.get(cdict['plugin'])
+                if plugin is not None:
+                    plugin.validate()
+            else:
+                debug_print('Unsupported command: %r' % command)
+
+
+def main(port, plugin_names):
+    """Connect to Spyder on *port* and serve *plugin_names*"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(("127.0.0.1", port))
+    server = PluginServer(sock, plugin_names)
+    try:
+        server.run()
+    finally:
+        sock.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]), sys.argv[2:])
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Index of the files and top-level symbols of a project, used by the file
+switcher
+
+The index is built in a thread the first time it is requested, and updated
+in a thread every time it is requested again: only the source files which
+changed since the previous update are read again. Searches only score the
+files and symbols matching the query, and return the best of them.
+"""
+
+from __future__ import print_function
+
+import os
+import os.path as osp
+import re
+import threading
+
+from spyderlib.qt.QtCore import QObject, Signal
+
+# Local imports
+from spyderlib.py3compat import to_text_string
+from spyderlib.utils.stringmatching import SearchMatcher
+
+
+# Folders which are not indexed
+EXCLUDED_DIRS = set(['CVS', '__pycache__', 'build', 'dist', 'node_modules'])
+
+# Extensions of the files whose top-level symbols are indexed
+SOURCE_EXTENSIONS = ('.py', '.pyw', '.ipy')
+
+# Source files bigger than this (in bytes) are indexed without their symbols
+MAX_FILE_SIZE = 1024**2
+
+# Default maximum number of results of a search
+MAX_RESULTS = 50
+
+SYMBOL_RE = re.compile(br'^(?:async[ \t]+)?(def|class)[ \t]+(\w+)', re.M)
+
+
+def get_symbols(data):
+    """
+    Return the top-level functions and classes defined in source code *data*
+    (a byte string), as a list of (name, 'def' or 'class', line) tuples
+    """
+    symbols = []
+    line, pos = 1, 0
+    for match in SYMBOL_RE.finditer(data):
+        line += data.count(b'\n', pos, match.start())
+        pos = match.start()
+        symbols.append((to_text_string(match.group(2), 'utf-8'),
+                        to_text_string(match.group(1), 'ascii'), line))
+    return symbols
+
+
+class ProjectIndex(QObject):
+    """Index of the files and top-level symbols found under a project root"""
+    sig_updated = Signal()
+
+    def __init__(self, root):
+        QObject.__init__(self)
+        self.root = root
+        self.files = []         # Full paths
+        self.symbols = []       # (name, token, full path, line) tuples
+        self._sources = {}      # {full path: (mtime, size, symbols)}
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file_matcher = (None, None)       # (files, matcher)
+        self._symbol_matcher = (None, None)     # (symbols, matcher)
+
+    def update(self):
+        """Update the index in a thread, unless it is being updated"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._update)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+    def _update(self):
+        files, symbols, sources = [], [], {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted([dirname for dirname in dirnames
+                                  if not dirname.startswith('.')
+                                  and dirname not in EXCLUDED_DIRS])
+            for filename in sorted(filenames):
+                if filename.startswith('.'):
+                    continue
+                path = osp.join(dirpath, filename)
+                files.append(path)
+                if osp.splitext(filename)[1] in SOURCE_EXTENSIONS:
+                    entry = self._get_source(path)
+                    if entry is not None:
+                        sources[path] = entry
+                        symbols += [(name, token, path, line)
+                                    for name, token, line in entry[2]]
+        self._sources = sources
+        if files != self.files or symbols != self.symbols:
+            # Lists are replaced, not modified, as they are read by searches
+            self.files, self.symbols = files, symbols
+            self.sig_updated.emit()
+
+    def _get_source(self, path):
+        """Return the (mtime, size, symbols) entry of source file *path*"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        entry = self._sources.get(path)
+        if entry is not None and entry[:2] == (stat.st_mtime, stat.st_size):
+            return entry
+        symbols = []
+        if stat.st_size <= MAX_FILE_SIZE:
+            try:
+                with open(path, 'rb') as fd:
+                    symbols = get_symbols(fd.read())
+            except (IOError, OSError):
+                pass
+        return (stat.st_mtime, stat.st_size, symbols)
+
+    def search_files(self, query, limit=MAX_RESULTS, exclude=()):
+        """
+        Return the *limit* files whose name matches *query* best, as a list
+        of (full path, rich text, score) tuples sorted by score
+
+        Files of *exclude* are left out.
+        """
+        files, matcher = self._file_matcher
+        if files is not self.files:
+            files = self.files
+            matcher = SearchMatcher([osp.basename(path) for path in files],
+                                    template="<b>{0}</b>")
+            self._file_matcher = (files, matcher)
+        exclude = set(exclude)
+        found = matcher.get_best_scores(query, limit,
+                                        lambda index: files[index] in exclude)
+        return [(files[index], rich_text, score)
+                for index, _text, rich_text, score in found]
+
+    def search_symbols(self, query, limit=MAX_RESULTS, exclude=()):
+        """
+        Return the *limit* symbols whose name matches *query* best, as a list
+        of (name, token, rich text, full path, line, score) tuples sorted by
+        score
+
+        Symbols of the files of *exclude* are left out.
+        """
+        symbols, matcher = self._symbol_matcher
+        if symbols is not self.symbols:
+            symbols = self.symbols
+            matcher = SearchMatcher([symbol[0] for symbol in symbols],
+                                    template="<b>{0}</b>")
+            self._symbol_matcher = (symbols, matcher)
+        exclude = set(exclude)
+        found = matcher.get_best_scores(
+                    query, limit, lambda index: symbols[index][2] in exclude)
+        return [symbols[index][:2] + (rich_text,) + symbols[index][2:]
+                + (score,) for index, _text, rich_text, score in found]
+
+    def relpath(self, path):
+        """Return *path* relative to the project root"""
+        return osp.relpath(path, self.root)
+
+
+_INDEXES = {}
+
+def get_project_index(root):
+    """Return the index of project *root*, updating it in a thread"""
+    if root not in _INDEXES:
+        _INDEXES[root] = ProjectIndex(root)
+    index = _INDEXES[root]
+    index.update()
+    return index
+
+
+def test():
+    """Project index test"""
+    assert get_symbols(b'import os\n\nclass Spam(object):\n    def eggs(self):'
+                       b'\n        pass\n\nasync def ham():\n    pass\n') == \
+           [('Spam', 'class', 3), ('ham', 'def', 7)]
+    filename = osp.abspath(__file__)
+    index = ProjectIndex(osp.dirname(osp.dirname(filename)))
+    index._update()
+    path, rich_text, score = index.search_files('projectindex')[0]
+    assert (path, rich_text) == (filename, '<b>projectindex</b>.py')
+    assert len(index.search_files('py', limit=3)) == 3
+    symbols = index.search_symbols('getprojectindex')
+    assert symbols[0][:2] == ('get_project_index', 'def')
+    assert symbols[0][3] == filename
+    assert index.search_symbols('get_project_index', exclude=[path]) == []
+
+
+if __name__ == '__main__':
+    test()
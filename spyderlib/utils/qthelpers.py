@@ -9,7 +9,7 @@
 from spyderlib.qt.QtGui import (QAction, QStyle, QWidget, QApplication,
                                 QLabel, QVBoxLayout, QHBoxLayout, QLineEdit,
                                 QKeyEvent, QMenu, QKeySequence, QToolButton,
-                                QPixmap)
+                                QPixmap, QIcon)
 from spyderlib.qt.QtCore import (Signal, QObject, Qt, QLocale, QTranslator,
                                  QLibraryInfo, QEvent, Slot, QTimer)
 from spyderlib.qt.compat import to_qvariant, from_qvariant
@@ -392,12 +392,18 @@ class DialogManager(QObject):
             dlg.reject()
 
         
+# File type icons, per icon theme and extension
+_FILETYPE_ICONS = {}
+
 def get_filetype_icon(fname):
     """Return file type icon"""
     ext = osp.splitext(fname)[1]
     if ext.startswith('.'):
         ext = ext[1:]
-    return get_icon( "%s.png" % ext, ima.icon('FileIcon') )
+    key = (ima.get_icon_theme(), ext)
+    if key not in _FILETYPE_ICONS:
+        _FILETYPE_ICONS[key] = get_icon( "%s.png" % ext, ima.icon('FileIcon') )
+    return QIcon(_FILETYPE_ICONS[key])
 
 
 class ShowStdIcons(QWidget):
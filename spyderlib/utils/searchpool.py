@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Parallel file scanning for Find in Files
+
+Files are scanned by a pool of worker processes (see searchworker.py) while
+the search thread is still walking the directory tree, so that a search
+runs on all cores. Results are streamed back to the search thread batch by
+batch, and stopping a search is forwarded to the workers, which give up
+between two files.
+"""
+
+from __future__ import print_function
+
+import collections
+import itertools
+import mmap
+import os
+import os.path as osp
+import re
+import select
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    import sre_parse
+    import sre_constants
+except ImportError:
+    sre_parse = None
+
+# Local imports
+from spyderlib.config.base import debug_print, get_module_source_path
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+
+
+# Number of files sent to a worker at once: the first batches are small so
+# that the first results show up quickly, the next ones bigger to reduce
+# the communication overhead
+MIN_BATCH_SIZE = 2
+MAX_BATCH_SIZE = 64
+
+# Time (in seconds) to wait for results before checking if the search was
+# stopped
+POLL_INTERVAL = 0.05
+
+CONNECT_TIMEOUT_SEC = 20
+MAX_WORKERS = 8
+
+# Files with a NUL byte in their first BINARY_SNIFF_SIZE bytes are binary
+BINARY_SNIFF_SIZE = 8192
+
+
+def _depends_on_line_ends(parsed):
+    """
+    Return True if the parsed regular expression *parsed* contains anchors
+    or lookarounds which may match differently in a line and in a whole file
+    (e.g. '$' matches after the end of line character of a line)
+    """
+    for op, av in parsed:
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            return True
+        if op == sre_constants.AT and av in (sre_constants.AT_END,
+                                             sre_constants.AT_END_STRING,
+                                             sre_constants.AT_BEGINNING_STRING):
+            return True
+        if not isinstance(av, (list, tuple)):
+            av = [av]
+        for value in av:
+            if isinstance(value, list):
+                values = value
+            else:
+                values = [value]
+            for value in values:
+                if isinstance(value, sre_parse.SubPattern) \
+                  and _depends_on_line_ends(value):
+                    return True
+    return False
+
+
+def compile_texts(texts, text_re):
+    """
+    Return a regular expression matching any of *texts*, used to look for
+    the lines to search in a whole file at once
+
+    Returns None if the texts can't be searched in a whole file at once
+    (e.g. because of anchors or inline flags) and raises re.error if one
+    of them is not a valid regular expression.
+    """
+    patterns = []
+    for text, _enc in texts:
+        if text_re:
+            re.compile(text)
+            if sre_parse is None or _depends_on_line_ends(
+                                                    sre_parse.parse(text)):
+                return
+        else:
+            text = re.escape(text)
+        if text not in patterns:
+            patterns.append(text)
+    try:
+        return re.compile(b'|'.join(patterns), re.MULTILINE)
+    except re.error:
+        return
+
+
+def search_in_line(line, lineno, texts, text_re, results):
+    """
+    Search *texts* in *line* (the line number *lineno*, starting at 0),
+    appending the matches to *results*
+
+    Returns the number of matches
+    """
+    nb = 0
+    for text, enc in texts:
+        if text_re:
+            found = re.search(text, line)
+            if found is not None:
+                break
+        else:
+            found = line.find(text)
+            if found > -1:
+                break
+    try:
+        line_dec = line.decode(enc)
+    except UnicodeDecodeError:
+        line_dec = line
+    if text_re:
+        for match in re.finditer(text, line):
+            results.append((lineno+1, match.start(), line_dec))
+            nb += 1
+    else:
+        while found > -1:
+            results.append((lineno+1, found, line_dec))
+            start = found + 1
+            for text, enc in texts:
+                found = line.find(text, start)
+                if found > -1:
+                    break
+            nb += 1
+    return nb
+
+
+def search_in_mapped_file(fd, texts, text_re, regexp, results):
+    """
+    Search *texts* in the whole file *fd* at once, using *regexp* (see
+    `compile_texts`) to find the lines to search
+
+    Line numbers are only computed for the lines containing a match, and
+    only those lines are decoded. Binary files are skipped.
+    Returns the number of matches.
+    """
+    size = os.fstat(fd.fileno()).st_size
+    if size == 0:
+        # Empty files can't be mapped
+        return 0
+    data = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:BINARY_SNIFF_SIZE].find(b'\0') > -1:
+            return 0
+        nb = 0
+        lineno = 0
+        counted = 0
+        pos = 0
+        while pos < size:
+            match = regexp.search(data, pos)
+            if match is None:
+                break
+            start = data.rfind(b'\n', 0, match.start()) + 1
+            if start >= size:
+                break
+            end = data.find(b'\n', match.start())
+            end = size if end == -1 else end + 1
+            lineno += data[counted:start].count(b'\n')
+            counted = start
+            # The regular expression may match across lines: the line is
+            # searched the same way as when files are read line by line
+            nb += search_in_line(data[start:end], lineno, texts, text_re,
+                                 results)
+            pos = end
+        return nb
+    finally:
+        data.close()
+
+
+def search_in_file(fname, texts, text_re, regexp=None):
+    """
+    Search *texts* (a list of (byte string, encoding) tuples) in *fname*
+
+    If *regexp* (see `compile_texts`) is not None, the file is memory-mapped
+    and searched at once, otherwise it is read line by line.
+    Returns a (results, nb, error) tuple: *results* is a list of
+    (line number, column, line) tuples and *error* is None, 'permission'
+    or 'regexp'
+    """
+    results = []
+    nb = 0
+    try:
+        with open(fname, 'rb') as fd:
+            if regexp is not None:
+                try:
+                    nb = search_in_mapped_file(fd, texts, text_re, regexp,
+                                               results)
+                    return results, nb, None
+                except (EnvironmentError, ValueError, OverflowError):
+                    # The file can't be mapped (e.g. it is too big for
+                    # the address space): read it line by line
+                    results = []
+            for lineno, line in enumerate(fd):
+                nb += search_in_line(line, lineno, texts, text_re, results)
+    except IOError:
+        return results, nb, 'permission'
+    except re.error:
+        return results, nb, 'regexp'
+    return results, nb, None
+
+
+def scan_files(filenames, texts, text_re, cancelled=None):
+    """
+    Search *texts* in *filenames*
+
+    Returns a (results, nb, errors) tuple, *results* being a dict mapping
+    absolute file names to their matches (see `search_in_file`), or None if
+    *cancelled* (a callable checked between two files) returns True
+    """
+    results = {}
+    nb = 0
+    errors = set()
+    try:
+        regexp = compile_texts(texts, text_re)
+    except re.error:
+        return results, nb, ['regexp']
+    for fname in filenames:
+        if cancelled is not None and cancelled():
+            return
+        res, fnb, error = search_in_file(fname, texts, text_re, regexp)
+        if res:
+            results[osp.abspath(fname)] = res
+        nb += fnb
+        if error is not None:
+            errors.add(error)
+    return results, nb, sorted(errors)
+
+
+class SearchPool(object):
+
+    """
+    Pool of worker processes scanning files for Find in Files
+
+    Only one search may run at a time: searches are run from the Find in
+    Files search thread.
+    """
+
+    def __init__(self, nworkers):
+        self.nworkers = nworkers
+        self.server = None
+        self.processes = []
+        self.workers = []
+        self.busy = {}
+        self.started = None
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """Start the worker processes, they connect in the background"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(self.nworkers)
+        port = server.getsockname()[1]
+        env = os.environ.copy()
+        spyder_path = osp.dirname(get_module_source_path('spyderlib'))
+        env['PYTHONPATH'] = os.pathsep.join([spyder_path] +
+                             [p for p in [env.get('PYTHONPATH')] if p])
+        script = get_module_source_path('spyderlib.utils', 'searchworker.py')
+        try:
+            for _i in range(self.nworkers):
+                process = subprocess.Popen([sys.executable, script,
+                                            str(port)], env=env)
+                self.processes.append(process)
+        except (OSError, ValueError):
+            if not self.processes:
+                server.close()
+                raise
+        self.server = server
+        self.started = time.time()
+
+    def _accept(self):
+        """Accept the connection of a worker"""
+        try:
+            sock, _addr = self.server.accept()
+        except socket.error as e:
+            debug_print('Search worker did not connect: %s' % e)
+        else:
+            self.workers.append(sock)
+        if len(self.workers) == len(self.processes):
+            self._close_server()
+
+    def _close_server(self):
+        self.server.close()
+        self.server = None
+
+    def _remove(self, sock):
+        """Forget about a worker which went away"""
+        debug_print('Search worker connection closed')
+        self.workers.remove(sock)
+        self.busy.pop(sock, None)
+        try:
+            sock.close()
+        except socket.error:
+            pass
+
+    def _send(self, sock, **data):
+        try:
+            write_packet(sock, data)
+        except socket.error as e:
+            debug_print(e)
+            self._remove(sock)
+            return False
+        return True
+
+    def cancel(self):
+        """Cancel the batches being scanned"""
+        for sock, (batch_id, _filenames) in list(self.busy.items()):
+            self._send(sock, command='cancel', id=batch_id)
+
+    def search(self, filenames, texts, text_re, stopped):
+        """
+        Search *texts* in *filenames*, yielding (results, nb, errors) tuples
+        (see `scan_files`) as batches of files are scanned
+
+        *filenames* may be an iterator: it is consumed while the first
+        batches are being scanned. The search is cancelled as soon as
+        *stopped* (a callable) returns True.
+        """
+        filenames = iter(filenames)
+        batch_ids = set()
+        pending = collections.deque()
+        batch = []
+        batch_size = MIN_BATCH_SIZE
+        walking = True
+        while True:
+            if stopped():
+                self.cancel()
+                return
+            if walking:
+                try:
+                    batch.append(next(filenames))
+                except StopIteration:
+                    walking = False
+                if walking and len(batch) < batch_size:
+                    continue
+                if batch:
+                    pending.append(batch)
+                    batch = []
+                    batch_size = min(2*batch_size, MAX_BATCH_SIZE)
+            elif not pending and \
+              not [1 for batch_id, _f in self.busy.values()
+                   if batch_id in batch_ids]:
+                return
+
+            # Send the pending batches to the idle workers
+            if self.server is not None and \
+              select.select([self.server], [], [], 0)[0]:
+                self._accept()
+            idle =[sock for sock in self.workers if sock not in self.busy]
+            while pending and idle:
+                sock = idle.pop()
+                batch_id = next(self._ids)
+                if self._send(sock, command='search', id=batch_id,
+                              files=pending[0], texts=texts,
+                              text_re=text_re):
+                    batch_ids.add(batch_id)
+                    self.busy[sock] = (batch_id, pending.popleft())
+            if pending and not self.workers:
+                # No worker is connected (yet): scan in this thread
+                yield scan_files(pending.popleft(), texts, text_re)
+                continue
+
+            # Collect the results
+            if self.server is not None \
+              and time.time() - self.started > CONNECT_TIMEOUT_SEC:
+                debug_print('Search workers did not connect')
+                self._close_server()
+            socks = list(self.busy.keys())
+            if self.server is not None:
+                socks.append(self.server)
+            if not socks:
+                continue
+            timeout = 0 if walking else POLL_INTERVAL
+            try:
+                ready = select.select(socks, [], [], timeout)[0]
+            except (select.error, socket.error, ValueError) as e:
+                debug_print(e)
+                ready = []
+            for sock in ready:
+                if sock is self.server:
+                    self._accept()
+                    continue
+                reply = read_packet(sock)
+                batch_id, files = self.busy.pop(sock)
+                if reply is None:
+                    self._remove(sock)
+                    if batch_id in batch_ids:
+                        pending.appendleft(files)
+                elif batch_id in batch_ids and not reply['cancelled']:
+                    yield reply['results'], reply['nb'], reply['errors']
+
+
+SEARCH_POOL = None
+
+def get_search_pool():
+    """
+    Return the search pool, starting its workers the first time
+
+    Returns None if the workers could not be started.
+    """
+    global SEARCH_POOL
+    if SEARCH_POOL is None:
+        if getattr(sys, 'frozen', False):
+            # sys.executable is not a Python interpreter
+            return
+        try:
+            import multiprocessing
+            nworkers = min(multiprocessing.cpu_count(), MAX_WORKERS)
+        except (ImportError, NotImplementedError):
+            nworkers = 2
+        pool = SearchPool(nworkers)
+        try:
+            pool.start()
+        except (OSError, socket.error, ValueError) as e:
+            debug_print('Could not start search workers: %s' % e)
+            return
+        SEARCH_POOL = pool
+    return SEARCH_POOL
+
+
+def test():
+    """Search pool test"""
+    import tempfile
+    dirname = tempfile.mkdtemp()
+    filenames = []
+    for index in range(20):
+        filename = osp.join(dirname, 'file%d.py' % index)
+        with open(filename, 'wb') as fd:
+            fd.write(b'# TODO: spam\n' * (index % 3))
+        filenames.append(filename)
+    texts = [(b'TODO', 'ascii')]
+    results, nb, errors = scan_files(filenames, texts, False)
+    assert nb == 19 and len(results) == 13 and not errors
+    assert results[filenames[2]] == [(1, 2, '# TODO: spam\n'),
+                                     (2, 2, '# TODO: spam\n')]
+    assert scan_files(filenames, texts, False, lambda: True) is None
+    with open(filenames[0], 'wb') as fd:
+        fd.write(b'spam\r\n# todo: eggs\nham TODO TODO\n\nlast')
+    for text_re in (False, True):
+        line_results = search_in_file(filenames[0], texts, text_re)
+        assert line_results == ([(3, 4, 'ham TODO TODO\n'),
+                                 (3, 9, 'ham TODO TODO\n')], 2, None)
+        regexp = compile_texts(texts, text_re)
+        assert search_in_file(filenames[0], texts, text_re,
+                              regexp) == line_results
+    for pattern in (b'^(ham|last)', b'(?i)^#', b'\\s+$', b'eggs\\s+ham',
+                    b'\\s+(?=ham)', b'[^#]*TODO'):
+        texts = [(pattern, 'utf-8'), (pattern, 'latin-1')]
+        regexp = compile_texts(texts, True)
+        assert search_in_file(filenames[0], texts, True, regexp) == \
+               search_in_file(filenames[0], texts, True)
+    texts = [(b'TODO', 'ascii')]
+    with open(filenames[0], 'wb') as fd:
+        fd.write(b'TODO\0')
+    assert search_in_file(filenames[0], texts, False,
+                          compile_texts(texts, False)) == ([], 0, None)
+
+    pool = get_search_pool()
+    for _i in range(2):
+        found = {}
+        total = 0
+        for results, nb, errors in pool.search(filenames, texts, False,
+                                               lambda: False):
+            found.update(results)
+            total += nb
+        assert total == 19 and len(found) == 13
+    assert not list(pool.search(filenames, texts, False, lambda: True))
+
+
+if __name__ == '__main__':
+    test()
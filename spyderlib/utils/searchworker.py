@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Find in Files worker
+
+This script is started by Spyder (see searchpool.py) to scan batches of
+files in a separate process.
+
+Every packet exchanged with Spyder is a dict:
+    * searches: {'command': 'search', 'id': 1, 'files': [...],
+                 'texts': [(b'TODO', 'ascii')], 'text_re': False}
+    * cancellations: {'command': 'cancel', 'id': 1}
+    * replies: {'id': 1, 'cancelled': False, 'results': {...}, 'nb': 3,
+                'errors': []}
+
+Every search gets a reply, even when it has been cancelled.
+"""
+
+import select
+import socket
+import sys
+
+from spyderlib.utils.bsdsocket import read_packet, write_packet
+from spyderlib.utils.searchpool import scan_files
+
+
+class Cancellation(object):
+
+    """Check whether a search was cancelled while it is running"""
+
+    def __init__(self, sock, search_id):
+        self.sock = sock
+        self.search_id = search_id
+        self.quit = False
+
+    def __call__(self):
+        while select.select([self.sock], [], [], 0)[0]:
+            cdict = read_packet(self.sock)
+            if cdict is None or cdict['command'] == 'quit':
+                self.quit = True
+                return True
+            if cdict.get('id') == self.search_id:
+                return True
+        return False
+
+
+def main(port):
+    """Connect to Spyder on *port* and scan the files it sends"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.connect(("127.0.0.1", port))
+    except socket.error:
+        # Spyder went away before we could connect
+        return
+    try:
+        while True:
+            cdict = read_packet(sock)
+            if cdict is None or cdict['command'] == 'quit':
+                break
+            if cdict['command'] != 'search':
+                # Cancellation of a search which is already finished
+                continue
+            cancelled = Cancellation(sock, cdict['id'])
+            found = scan_files(cdict['files'], cdict['texts'],
+                               cdict['text_re'], cancelled)
+            if found is None:
+                write_packet(sock, dict(id=cdict['id'], cancelled=True))
+            else:
+                results, nb, errors = found
+                write_packet(sock, dict(id=cdict['id'], cancelled=False,
+                                        results=results, nb=nb,
+                                        errors=errors))
+            if cancelled.quit:
+                break
+    finally:
+        sock.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]))
@@ -8,6 +8,7 @@
 String search and match utilities usefull when filtering a list of texts.
 """
 
+import heapq
 import re
 
 
@@ -176,6 +177,169 @@ def get_search_score(query, choice, ignore_case=True, apply_regex=True,
     return original_choice, enriched_text, score
 
 
+class SearchMatcher(object):
+    """Search queries in a list of choices, as `get_search_scores` does.
+
+    Choices are lowercased and indexed once, so that a matcher can be kept
+    to search them again every time the query changes. When a query extends
+    the previous one, only the choices matching the previous one are
+    searched.
+
+    Parameters
+    ----------
+    choices : list of str
+        List of sentences/words in which to search for the query letters.
+    ignore_case : bool, optional
+        Optional value perform a case insensitive search (True by default).
+    template : str, optional
+        Optional template string to surround letters found in choices
+        ('{}' by default).
+    """
+
+    def __init__(self, choices, ignore_case=True, template='{}'):
+        self.choices = list(choices)
+        self.ignore_case = ignore_case
+        self.template = template
+        if ignore_case:
+            self.folded = [choice.lower() for choice in self.choices]
+        else:
+            self.folded = self.choices
+        self.words = [None] * len(self.choices)
+        self.patterns = [None] * len(self.choices)
+        self.last_query = None
+        self.last_matches = None
+
+    def match(self, query):
+        """Return the indexes of the choices matching *query*, in order.
+
+        *query* must be lowercased if case is ignored, and have no spaces.
+        """
+        if self.last_query is not None and query.startswith(self.last_query):
+            candidates = self.last_matches
+        else:
+            candidates = range(len(self.choices))
+        folded = self.folded
+        matches = []
+        for index in candidates:
+            text = folded[index]
+            pos = 0
+            for char in query:
+                pos = text.find(char, pos) + 1
+                if not pos:
+                    break
+            else:
+                matches.append(index)
+        self.last_query = query
+        self.last_matches = matches
+        return matches
+
+    def get_score(self, query, index):
+        """Return the (choice, enriched choice, score) of a matching choice.
+
+        Results are the same as those of `get_search_score`.
+        """
+        choice = self.choices[index]
+        text = self.folded[index]
+        if len(text) != len(choice):
+            # Lowercasing changed positions in choice
+            return get_search_score(query, choice, self.ignore_case,
+                                    apply_regex=False, template=self.template)
+        if self.words[index] is None:
+            self.words[index] = set(text.split(u' '))
+            self.patterns[index] = u''.join([char if char in u' -' else u'x'
+                                             for char in choice])
+        template = self.template
+        length = len(query)
+        pattern = self.patterns[index]
+        pos_start = text.find(query)
+        if pos_start >= 0:
+            pos_end = pos_start + length
+            score = pos_start + (1 if query in self.words[index] else 100)
+            enriched_text = choice[:pos_start] + \
+                template.format(choice[pos_start:pos_end]) + choice[pos_end:]
+            pattern = pattern[:pos_start] + u'-'*length + pattern[pos_end:]
+        else:
+            positions = []
+            pos = -1
+            for char in query:
+                pos = text.find(char, pos + 1)
+                positions.append(pos)
+            score = positions[0]
+            enriched_text = list(choice)
+            pattern = list(pattern)
+            for pos in positions:
+                enriched_text[pos] = template.format(choice[pos])
+                pattern[pos] = u'-'
+            enriched_text = u''.join(enriched_text)
+            pattern = u''.join(pattern)
+
+        for i in range(1, length + 1):
+            score += (length - pattern.count(u'-'*i))*100000
+        gaps = [gap for gap in pattern.split(u'-') if gap]
+        if not pattern.startswith(u'-'):
+            gaps = gaps[1:]
+        if not pattern.endswith(u'-'):
+            gaps = gaps[:-1]
+        for gap in gaps:
+            score += gap.count(u' ')*10000
+            score += gap.count(u'x')*100
+        return choice, enriched_text, score
+
+    def get_scores(self, query, valid_only=False, sort=False):
+        """Search for *query* and return a list of tuples.
+
+        See `get_search_scores` for the parameters and results.
+        """
+        query = query.replace(' ', '')
+        if not query:
+            return [(choice, choice, NO_SCORE) for choice in self.choices]
+        if self.ignore_case:
+            query = query.lower()
+        results = [self.get_score(query, index)
+                   for index in self.match(query)]
+        if not valid_only:
+            found = dict(zip(self.last_matches, results))
+            results = [found.get(index, (choice, choice, NOT_FOUND_SCORE))
+                       for index, choice in enumerate(self.choices)]
+        if sort:
+            results = sorted(results, key=lambda row: row[-1])
+        return results
+
+    def get_best_scores(self, query, limit, skip=None):
+        """Return the *limit* best matches of *query*, sorted by score.
+
+        Results are (index, choice, enriched choice, score) tuples. Choices
+        whose index is true for the *skip* function are left out.
+
+        Choices containing the query score better than the others, and only
+        differ by the position of the query and whether it is a word (unless
+        they contain dashes, which count as matched letters): when enough
+        choices contain it, only the best of them are scored.
+        """
+        query = query.replace(' ', '')
+        if not query:
+            return []
+        if self.ignore_case:
+            query = query.lower()
+        matches = self.match(query)
+        if skip is not None:
+            matches = [index for index in matches if not skip(index)]
+        folded = self.folded
+        dashed = [index for index in matches if u'-' in folded[index]]
+        containing = [index for index in matches
+                      if query in folded[index] and u'-' not in folded[index]]
+        if len(containing) >= limit:
+            def key(index):
+                text = folded[index]
+                return text.find(query) + \
+                       (1 if query in text.split(u' ') else 100)
+            matches = heapq.nsmallest(limit, containing, key=key) + dashed
+        results = [(index, ) + self.get_score(query, index)
+                   for index in matches]
+        return heapq.nsmallest(limit, results,
+                               key=lambda row: (row[-1], row[0]))
+
+
 def get_search_scores(query, choices, ignore_case=True, template='{}',
                       valid_only=False, sort=False):
     """Search for query inside choices and return a list of tuples.
@@ -201,33 +365,14 @@ def get_search_scores(query, choices, ignore_case=True, template='{}',
     results : list of tuples
         List of tuples where the first item is the text (enriched if a
         template was used) and a search score. Lower scores means better match.
-    """
-    # First remove spaces from query
-    query = query.replace(' ', '')
-    pattern = get_search_regex(query, ignore_case)
-    results = []
-
-    for choice in choices:
-        r = re.search(pattern, choice)
-        if query and r:
-            result = get_search_score(query, choice, ignore_case=ignore_case,
-                                      apply_regex=False, template=template)
-        else:
-            if query:
-                result = (choice, choice, NOT_FOUND_SCORE)
-            else:
-                result = (choice, choice, NO_SCORE)
-
-        if valid_only:
-            if result[-1] != NOT_FOUND_SCORE:
-                results.append(result)
-        else:
-            results.append(result)
-
-    if sort:
-        results = sorted(results, key=lambda row: row[-1])
 
-    return results
+    Notes
+    -----
+    Use a `SearchMatcher` to search the same choices several times.
+    """
+    matcher = SearchMatcher(choices, ignore_case=ignore_case,
+                            template=template)
+    return matcher.get_scores(query, valid_only=valid_only, sort=sort)
 
 
 def test():
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Trigram index of text files, used to speed up Find in Files
+
+For each file, the index keeps a Bloom filter of the byte trigrams found in
+it, together with the file modification time and size. Before scanning
+files for a literal text or a regular expression, the files which can't
+contain the trigrams that any match requires are skipped without being read.
+Only the files which changed since the previous search are read again, and
+the files which no longer exist are removed from the index when it is saved.
+
+Trigrams are extracted with NumPy when it is installed (about a hundred
+times faster than in pure Python).
+"""
+
+from __future__ import print_function
+
+import hashlib
+import os
+import os.path as osp
+import struct
+import threading
+
+try:
+    import sre_parse
+    import sre_constants
+except ImportError:
+    sre_parse = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Local imports
+from spyderlib.config.base import get_conf_path
+from spyderlib.py3compat import pickle, to_binary_string
+
+
+INDEX_VERSION = 1
+
+# Bloom filter size per trigram of a file, in bits
+BITS_PER_TRIGRAM = 4
+
+# Files bigger than this (in bytes) are not indexed and always scanned
+MAX_FILE_SIZE = 16 * 1024**2
+
+# Maximum number of alternatives considered in a regular expression
+MAX_ALTERNATIVES = 64
+
+# Size (in bytes) of the blocks of data whose trigrams are extracted at once
+# with NumPy, to bound the memory used for big files. The trigrams of data
+# bigger than a block are marked in a table of all the possible trigrams
+# (16 MB) instead of being sorted.
+BLOCK_SIZE = 64 * 1024
+
+
+def _get_trigram_codes(data):
+    """Return the array of the trigrams of *data*, in order (NumPy)"""
+    buf = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    return (buf[:-2] << 16) | (buf[1:-1] << 8) | buf[2:]
+
+
+def _get_trigram_array(data):
+    """Return the sorted array of the distinct trigrams of *data* (NumPy)"""
+    if len(data) < 3:
+        return np.zeros(0, dtype=np.uint32)
+    if len(data) <= BLOCK_SIZE:
+        return np.unique(_get_trigram_codes(data))
+    found = np.zeros(1 << 24, dtype=bool)
+    for start in range(0, len(data) - 2, BLOCK_SIZE):
+        found[_get_trigram_codes(data[start:start+BLOCK_SIZE+2])] = True
+    return np.flatnonzero(found)
+
+
+def get_trigrams(data):
+    """Return the set of trigrams of byte string *data*, as integers"""
+    if np is not None:
+        return set(_get_trigram_array(data).tolist())
+    trigrams = set([data[i:i+3] for i in range(len(data) - 2)])
+    return set([struct.unpack('>I', b'\x00' + trigram)[0]
+                for trigram in trigrams])
+
+
+def _bit(trigram, nbits):
+    """Return the Bloom filter bit of *trigram*"""
+    return ((trigram * 0x9E3779B1) >> 16) % nbits
+
+
+def _get_nbits(count):
+    """Return the size (in bits) of the Bloom filter of *count* trigrams"""
+    nbits = 64
+    while nbits < BITS_PER_TRIGRAM * count:
+        nbits *= 2
+    return nbits
+
+
+def make_bloom_filter(trigrams):
+    """Return a Bloom filter (a byte string) of the set *trigrams*"""
+    nbits = _get_nbits(len(trigrams))
+    bloom = bytearray(nbits // 8)
+    for trigram in trigrams:
+        bit = _bit(trigram, nbits)
+        bloom[bit >> 3] |= 1 << (bit & 7)
+    return bytes(bloom)
+
+
+def get_bloom_filter(data):
+    """Return the Bloom filter (a byte string) of the trigrams of *data*"""
+    if np is None:
+        return make_bloom_filter(get_trigrams(data))
+    trigrams = _get_trigram_array(data).astype(np.uint64)
+    nbits = _get_nbits(len(trigrams))
+    # Same bits as _bit: trigrams and the constant fit in 56 bits
+    bits = ((trigrams * np.uint64(0x9E3779B1)) >> np.uint64(16)) \
+           % np.uint64(nbits)
+    bitset = np.zeros(nbits, dtype=np.uint8)
+    bitset[bits.astype(np.intp)] = 1
+    weights = np.array([1 << shift for shift in range(8)], dtype=np.uint8)
+    return (bitset.reshape(-1, 8) * weights).sum(axis=1) \
+           .astype(np.uint8).tobytes()
+
+
+def in_bloom_filter(bloom, trigrams):
+    """Return True if all *trigrams* may be in Bloom filter *bloom*"""
+    bloom = bytearray(bloom)
+    nbits = 8 * len(bloom)
+    for trigram in trigrams:
+        bit = _bit(trigram, nbits)
+        if not bloom[bit >> 3] & (1 << (bit & 7)):
+            return False
+    return True
+
+
+def _combine(alternatives, others):
+    """Combine two lists of alternatives (all of them must match)"""
+    if len(alternatives) * len(others) > MAX_ALTERNATIVES:
+        # Too many combinations: keep the requirements of the first list
+        return alternatives
+    return [literals + other for literals in alternatives for other in others]
+
+
+def _regexp_literals(parsed):
+    """
+    Return the literal strings that a match of the parsed regular expression
+    *parsed* must contain, as a list of alternatives (each alternative being
+    a list of strings)
+    """
+    alternatives, run = [[]], []
+    for op, av in parsed:
+        if op == sre_constants.LITERAL:
+            run.append(av)
+            continue
+        if run:
+            alternatives = _combine(alternatives, [[bytes(bytearray(run))]])
+            run = []
+        if op == sre_constants.BRANCH:
+            inner = []
+            for branch in av[1]:
+                inner += _regexp_literals(branch)
+        elif op == sre_constants.SUBPATTERN:
+            inner = _regexp_literals(av[-1])
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) \
+          and av[0] >= 1:
+            inner = _regexp_literals(av[2])
+        else:
+            continue
+        alternatives = _combine(alternatives, inner)
+    if run:
+        alternatives = _combine(alternatives, [[bytes(bytearray(run))]])
+    return alternatives
+
+
+def get_required_literals(texts, regexp):
+    """
+    Return the literal strings a file must contain to match one of *texts*
+
+    *texts* is a list of (byte string, encoding) tuples, as searched by
+    Find in Files. The result is a list of alternatives (each alternative
+    being a list of byte strings), or None when no literal is required.
+    """
+    if not regexp:
+        return [[text] for text, _enc in texts]
+    if sre_parse is None:
+        return
+    alternatives = []
+    for text, _enc in texts:
+        try:
+            parsed = sre_parse.parse(text)
+        except Exception:
+            return
+        state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern')
+        if state.flags & sre_constants.SRE_FLAG_IGNORECASE:
+            return
+        alternatives += _regexp_literals(parsed)
+    return alternatives
+
+
+class TrigramIndex(object):
+    """Trigram index of the files found under a search path"""
+
+    def __init__(self, root):
+        self.root = root
+        name = hashlib.md5(to_binary_string(root, 'utf-8')).hexdigest()
+        self.filename = get_conf_path(osp.join('findinfiles', name))
+        self.files = {}
+        self.modified = False
+        self.load()
+
+    def load(self):
+        """Load the index from disk"""
+        try:
+            with open(self.filename, 'rb') as fd:
+                version, root, files = pickle.load(fd)
+        except Exception:
+            return
+        if version == INDEX_VERSION and root == self.root:
+            self.files = files
+
+    def save(self):
+        """
+        Save the index to disk, in a thread
+
+        The files which no longer exist are removed from the index first.
+        """
+        if not self.modified:
+            return
+        self.modified = False
+        data = (INDEX_VERSION, self.root, dict(self.files))
+        thread = threading.Thread(target=self._write, args=(data,))
+        thread.setDaemon(True)
+        thread.start()
+
+    def _write(self, data):
+        files = data[2]
+        for filename in [fname for fname in files if not osp.isfile(fname)]:
+            del files[filename]
+            self.files.pop(filename, None)
+        dirname = osp.dirname(self.filename)
+        try:
+            if not osp.isdir(dirname):
+                os.makedirs(dirname)
+            with open(self.filename + '.tmp', 'wb') as fd:
+                pickle.dump(data, fd, pickle.HIGHEST_PROTOCOL)
+            if os.name == 'nt' and osp.isfile(self.filename):
+                os.remove(self.filename)
+            os.rename(self.filename + '.tmp', self.filename)
+        except (IOError, OSError):
+            pass
+
+    def update(self, filename):
+        """
+        Index *filename* if it changed since it was indexed
+
+        Returns its (mtime, size, bloom filter) entry, the bloom filter
+        being None if the file is not indexed, or None if it can't be read
+        """
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            self.files.pop(filename, None)
+            return
+        entry = self.files.get(filename)
+        if entry is not None and entry[:2] == (stat.st_mtime, stat.st_size):
+            return entry
+        bloom = None
+        if stat.st_size <= MAX_FILE_SIZE:
+            try:
+                with open(filename, 'rb') as fd:
+                    data = fd.read()
+            except (IOError, OSError):
+                return
+            bloom = get_bloom_filter(data)
+        entry = self.files[filename] = (stat.st_mtime, stat.st_size, bloom)
+        self.modified = True
+        return entry
+
+    def filter(self, filenames, alternatives, stopped=None):
+        """
+        Return the files of *filenames* which may contain all the strings
+        of one of *alternatives* (see `get_required_literals`)
+
+        Returns None if *stopped* (a callable) returns True meanwhile.
+        """
+        if alternatives is None:
+            return list(filenames)
+        wanted = []
+        for literals in alternatives:
+            trigrams = set()
+            for literal in literals:
+                trigrams |= get_trigrams(literal)
+            if not trigrams:
+                # Strings shorter than a trigram: any file may match
+                return list(filenames)
+            wanted.append(trigrams)
+        found = []
+        for filename in filenames:
+            if stopped is not None and stopped():
+                return
+            entry = self.update(filename)
+            if entry is None or entry[2] is None:
+                # Let the scan deal with unreadable or big files
+                found.append(filename)
+            elif any([in_bloom_filter(entry[2], trigrams)
+                      for trigrams in wanted]):
+                found.append(filename)
+        return found
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+def get_index(root):
+    """Return the trigram index of search path *root*"""
+    with _INDEXES_LOCK:
+        if root not in _INDEXES:
+            _INDEXES[root] = TrigramIndex(root)
+        return _INDEXES[root]
+
+
+def test():
+    """Trigram index test"""
+    import tempfile
+    assert get_required_literals([(b'foo', 'ascii')], False) == [[b'foo']]
+    assert get_required_literals([(b'# ?TODO|# ?FIXME', 'ascii')], True) \
+           == [[b'#', b'TODO'], [b'#', b'FIXME']]
+    assert get_required_literals([(b'(?i)foo', 'ascii')], True) is None
+    assert get_required_literals([(b'def (spam)+eggs', 'ascii')], True) \
+           == [[b'def ', b'spam', b'eggs']]
+    assert get_required_literals([(b'a.*(b|cd)', 'ascii')], True) \
+           == [[b'a', b'b'], [b'a', b'cd']]
+
+    dirname = tempfile.mkdtemp()
+    filenames = []
+    for index, text in enumerate([b'spam and eggs', b'ham', b'spam']):
+        filename = osp.join(dirname, 'file%d.txt' % index)
+        with open(filename, 'wb') as fd:
+            fd.write(text)
+        filenames.append(filename)
+    index = TrigramIndex(dirname)
+    assert index.filter(filenames, [[b'spam', b'eggs']]) == filenames[:1]
+    assert index.filter(filenames, [[b'eggs'], [b'ham']]) == filenames[:2]
+    assert index.filter(filenames, [[b'sp']]) == filenames
+    with open(filenames[1], 'wb') as fd:
+        fd.write(b'ham, spam and eggs')
+    index.files[filenames[1]] = (0, 0, index.files[filenames[1]][2])
+    assert index.filter(filenames, [[b'spam', b'eggs']]) == filenames[:2]
+    os.remove(filenames[2])
+    index._write((INDEX_VERSION, dirname, dict(index.files)))
+    assert sorted(index.files) == filenames[:2]
+
+    # NumPy and pure Python results are the same
+    data = os.urandom(5 * BLOCK_SIZE // 2) + b'spam and eggs'
+    global np
+    numpy, np = np, None
+    try:
+        trigrams, bloom = get_trigrams(data), get_bloom_filter(data)
+    finally:
+        np = numpy
+    if np is not None:
+        assert get_trigrams(data) == trigrams
+        assert get_bloom_filter(data) == bloom
+        assert get_trigrams(b'ab') == set()
+
+
+if __name__ == '__main__':
+    test()
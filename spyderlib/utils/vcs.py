@@ -9,7 +9,9 @@
 from __future__ import print_function
 
 import sys
+import os
 import os.path as osp
+import re
 import subprocess
 
 # Local imports
@@ -73,6 +75,22 @@ def is_vcs_repository(path):
     return get_vcs_root(path) is not None
 
 
+def get_git_root(path):
+    """Return Git repository root directory path
+    Return None if path is not within a Git repository"""
+    root = get_vcs_root(path)
+    if root is not None and get_vcs_info(root)['name'] == 'Git':
+        return root
+
+
+def get_hg_root(path):
+    """Return Mercurial repository root directory path
+    Return None if path is not within a Mercurial repository"""
+    root = get_vcs_root(path)
+    if root is not None and get_vcs_info(root)['name'] == 'Mercurial':
+        return root
+
+
 def run_vcs_tool(path, action):
     """If path is a valid VCS repository, run the corresponding VCS tool
     Supported VCS actions: 'commit', 'browse'
@@ -92,6 +110,180 @@ def is_hg_installed():
     return programs.find_program('hg') is not None
 
 
+def is_git_installed():
+    """Return True if Git is installed"""
+    return programs.find_program('git') is not None
+
+
+def _decode_path(path):
+    """Decode a path output by a VCS tool"""
+    try:
+        return path.decode('utf-8')
+    except UnicodeDecodeError:
+        return path.decode(sys.getfilesystemencoding() or 'utf-8', 'replace')
+
+
+def get_hg_files(repopath):
+    """Return the files tracked by the Mercurial repository located at
+    repopath, relative to repopath"""
+    hg = programs.find_program('hg')
+    if hg is None:
+        return []
+    output, _err = subprocess.Popen([hg, 'manifest'], stdout=subprocess.PIPE,
+                                    cwd=repopath).communicate()
+    return [_decode_path(path) for path in output.splitlines()]
+
+
+def get_git_files(repopath):
+    """Return the files of the Git repository located at repopath, relative
+    to repopath: tracked files (read from the Git index) and untracked files
+    which are not ignored"""
+    git = programs.find_program('git')
+    if git is None:
+        return []
+    args = [git, 'ls-files', '-z', '--cached', '--others', '--exclude-standard']
+    output, _err = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                    cwd=repopath).communicate()
+    deleted, _err = subprocess.Popen([git, 'ls-files', '-z', '--deleted'],
+                                     stdout=subprocess.PIPE,
+                                     cwd=repopath).communicate()
+    deleted = set(deleted.split(b'\0'))
+    return [_decode_path(path) for path in output.split(b'\0')
+            if path and path not in deleted]
+
+
+def _translate_gitignore_pattern(pattern):
+    """Translate a .gitignore glob pattern to a regular expression"""
+    regexp = ''
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            regexp += '(?:.*/)?'
+            i += 3
+            continue
+        elif pattern.startswith('**', i):
+            regexp += '.*'
+            i += 2
+            continue
+        elif c == '*':
+            regexp += '[^/]*'
+        elif c == '?':
+            regexp += '[^/]'
+        elif c == '[':
+            j = pattern.find(']', i + 2)
+            if j == -1:
+                regexp += '\\['
+            else:
+                stuff = pattern[i+1:j].replace('\\', '\\\\')
+                if stuff.startswith('!'):
+                    stuff = '^' + stuff[1:]
+                regexp += '[%s]' % stuff
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            regexp += re.escape(pattern[i])
+        else:
+            regexp += re.escape(c)
+        i += 1
+    return '^%s$' % regexp
+
+
+class GitIgnore(object):
+    """Ignore rules of a Git working tree: .gitignore files and the
+    .git/info/exclude file
+
+    The .gitignore files are read while the working tree is walked from the
+    top down: `add_directory` must be called on each directory before
+    checking its content with `is_ignored`."""
+
+    def __init__(self, root):
+        self.root = osp.abspath(root)
+        self.rules = {}
+        self._inherited = {}
+        self.rules[None] = self._read_rules(self.root,
+                                    osp.join(self.root, '.git', 'info',
+                                             'exclude'))
+
+    def _read_rules(self, dirname, filename):
+        """Return the rules of ignore file *filename*, relative to
+        *dirname*"""
+        rules = []
+        try:
+            with open(filename, 'rb') as fd:
+                lines = fd.read().decode('utf-8', 'replace').splitlines()
+        except (IOError, OSError):
+            return rules
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if not line:
+                continue
+            try:
+                regexp = re.compile(_translate_gitignore_pattern(line))
+            except re.error:
+                continue
+            rules.append((dirname, regexp, negated, dir_only, anchored))
+        return rules
+
+    def add_directory(self, dirname):
+        """Read the .gitignore file of directory *dirname*"""
+        dirname = osp.abspath(dirname)
+        self.rules[dirname] = self._read_rules(dirname,
+                                               osp.join(dirname, '.gitignore'))
+        self._inherited.pop(dirname, None)
+
+    def add_parents(self, path):
+        """Read the .gitignore files of the parent directories of *path*,
+        up to the root of the working tree"""
+        parents = []
+        dirname = osp.dirname(osp.abspath(path))
+        while len(dirname) >= len(self.root):
+            parents.insert(0, dirname)
+            if dirname == self.root:
+                break
+            dirname = osp.dirname(dirname)
+        for dirname in parents:
+            self.add_directory(dirname)
+
+    def _get_rules(self, dirname):
+        """Return the rules applying to the content of *dirname*"""
+        rules = self._inherited.get(dirname)
+        if rules is None:
+            parent = osp.dirname(dirname)
+            if dirname == self.root or parent == dirname:
+                rules = self.rules[None]
+            else:
+                rules = self._get_rules(parent)
+            rules = rules + self.rules.get(dirname, [])
+            self._inherited[dirname] = rules
+        return rules
+
+    def is_ignored(self, path, isdir=False):
+        """Return True if *path* (an absolute path) is ignored"""
+        if isdir and osp.basename(path) == '.git':
+            return True
+        for dirname, regexp, negated, dir_only, anchored in \
+          reversed(self._get_rules(osp.dirname(path))):
+            if dir_only and not isdir:
+                continue
+            if anchored:
+                name = path[len(dirname)+1:].replace(os.sep, '/')
+            else:
+                name = osp.basename(path)
+            if regexp.match(name):
+                return not negated
+        return False
+
+
 def get_hg_revision(repopath):
     """Return Mercurial revision for the repository located at repopath
        Result is a tuple (global, local, branch), with None values on error
@@ -148,7 +340,40 @@ def get_git_revision(repopath):
         return None, None
 
 
+def test_gitignore():
+    """Test .gitignore rules"""
+    import tempfile
+    root = tempfile.mkdtemp()
+    os.makedirs(osp.join(root, '.git', 'info'))
+    os.makedirs(osp.join(root, 'src', 'build'))
+    with open(osp.join(root, '.git', 'info', 'exclude'), 'w') as fd:
+        fd.write('*.log\n')
+    with open(osp.join(root, '.gitignore'), 'w') as fd:
+        fd.write('# comment\nbuild/\n/node_modules\n*.py[co]\n'
+                 'docs/**/*.html\n!keep.log\n')
+    with open(osp.join(root, 'src', '.gitignore'), 'w') as fd:
+        fd.write('!build/\n')
+    gitignore = GitIgnore(get_git_root(osp.join(root, 'src')))
+    gitignore.add_parents(osp.join(root, 'src'))
+    join = lambda *args: osp.join(root, *args)
+    assert gitignore.is_ignored(join('build'), True)
+    assert not gitignore.is_ignored(join('build'))
+    assert gitignore.is_ignored(join('node_modules'), True)
+    assert not gitignore.is_ignored(join('src', 'node_modules'), True)
+    assert gitignore.is_ignored(join('src', 'spam.pyc'))
+    assert not gitignore.is_ignored(join('src', 'spam.py'))
+    assert gitignore.is_ignored(join('docs', 'a', 'b', 'index.html'))
+    assert gitignore.is_ignored(join('docs', 'index.html'))
+    assert not gitignore.is_ignored(join('index.html'))
+    assert gitignore.is_ignored(join('spam.log'))
+    assert not gitignore.is_ignored(join('keep.log'))
+    assert gitignore.is_ignored(join('.git'), True)
+    gitignore.add_directory(join('src'))
+    assert not gitignore.is_ignored(join('src', 'build'), True)
+
+
 if __name__ == '__main__':
+    test_gitignore()
     print(get_vcs_root(osp.dirname(__file__)))
     print(get_vcs_root(r'D:\Python\ipython\IPython\kernel'))
     #run_vcs_tool(r'D:\Python\userconfig\userconfig', 'commit')
@@ -18,7 +18,7 @@ from spyderlib.qt.QtGui import (QVBoxLayout, QMessageBox, QMenu, QFont,
                                 QAction, QApplication, QWidget,
                                 QKeySequence, QMainWindow, QSplitter,
                                 QHBoxLayout)
-from spyderlib.qt.QtCore import (Signal, Qt, QFileInfo, QThread, QObject,
+from spyderlib.qt.QtCore import (Signal, Qt, QFileInfo, QObject,
                                  QByteArray, QSize, QPoint, QTimer, Slot)
 from spyderlib.qt.compat import getsavefilename
 import spyderlib.utils.icon_manager as ima
@@ -26,6 +26,10 @@ import spyderlib.utils.icon_manager as ima
 import os
 import sys
 import os.path as osp
+import functools
+import itertools
+import threading
+from collections import OrderedDict
 
 # Local imports
 from spyderlib.utils import encoding, sourcecode, codeanalysis
@@ -37,6 +41,7 @@ from spyderlib.utils.qthelpers import (create_action, add_actions,
                                        mimedata2url, get_filetype_icon,
                                        create_toolbutton)
 from spyderlib.utils import syntaxhighlighters
+from spyderlib.utils.projectindex import get_project_index
 from spyderlib.widgets.tabs import BaseTabs
 from spyderlib.widgets.findreplace import FindReplace
 from spyderlib.widgets.editortools import OutlineExplorerWidget
@@ -52,55 +57,64 @@ from spyderlib.py3compat import to_text_string, qbytearray_to_str, u
 DEBUG_EDITOR = DEBUG >= 3
 
 
-class AnalysisThread(QThread):
+class AnalysisThread(threading.Thread):
     """Analysis thread"""
-    def __init__(self, parent, checker, source_code):
-        super(AnalysisThread, self).__init__(parent)
+    def __init__(self, manager, job_id, checker, source_code):
+        super(AnalysisThread, self).__init__()
+        # Analysis threads must never prevent Spyder from quitting
+        self.setDaemon(True)
+        self.manager = manager
+        self.job_id = job_id
         self.checker = checker
-        self.results = None
         self.source_code = source_code
 
     def run(self):
         """Run analysis"""
+        results = None
         try:
-            self.results = self.checker(self.source_code)
+            results = self.checker(self.source_code)
         except Exception:
             if DEBUG_EDITOR:
                 import traceback
                 traceback.print_exc(file=STDERR)
+        try:
+            self.manager.sig_job_finished.emit(self.job_id, results)
+        except RuntimeError:
+            # The thread manager has been deleted meanwhile
+            pass
 
 
 class ThreadManager(QObject):
-    """Analysis thread manager"""
+    """
+    Analysis thread manager
+
+    Jobs are queued per file and callback: queuing a job replaces the
+    pending job of the same file, and results are dropped when a newer
+    job of the same file is pending or when the file has been closed.
+    Running jobs are never waited for.
+    """
+    sig_job_finished = Signal(object, object)
+
     def __init__(self, parent, max_simultaneous_threads=2):
         super(ThreadManager, self).__init__(parent)
         self.max_simultaneous_threads = max_simultaneous_threads
-        self.started_threads = {}
-        self.pending_threads = []
+        self.pending_jobs = OrderedDict()
+        self.running_jobs = {}
         self.end_callbacks = {}
+        self._job_ids = itertools.count()
+        self.sig_job_finished.connect(self.job_finished)
 
     def close_threads(self, parent):
-        """Close threads associated to parent_id"""
+        """Drop the jobs associated to parent (all jobs if parent is None)
+        Results of the running jobs will be ignored"""
         if DEBUG_EDITOR:
             print("Call to 'close_threads'", file=STDOUT)
-        if parent is None:
-            # Closing all threads
-            self.pending_threads = []
-            threadlist = []
-            for threads in list(self.started_threads.values()):
-                threadlist += threads
-        else:
-            parent_id = id(parent)
-            self.pending_threads = [(_th, _id) for (_th, _id)
-                                    in self.pending_threads
-                                    if _id != parent_id]
-            threadlist = self.started_threads.get(parent_id, [])
-        for thread in threadlist:
-            if DEBUG_EDITOR:
-                print("Waiting for thread %r to finish" % thread, file=STDOUT)
-            while thread.isRunning():
-                # We can't terminate thread safely, so we simply wait...
-                QApplication.processEvents()
+        for key in list(self.pending_jobs.keys()):
+            if parent is None or key[0] == id(parent):
+                self.pending_jobs.pop(key)
+        for job_id, key in list(self.running_jobs.items()):
+            if parent is None or key[0] == id(parent):
+                self.end_callbacks.pop(job_id, None)
 
     def close_all_threads(self):
         """Close all threads"""
@@ -109,48 +123,44 @@ class ThreadManager(QObject):
         self.close_threads(None)
 
     def add_thread(self, checker, end_callback, source_code, parent):
-        """Add thread to queue"""
-        parent_id = id(parent)
-        thread = AnalysisThread(self, checker, source_code)
-        self.end_callbacks[id(thread)] = end_callback
-        self.pending_threads.append((thread, parent_id))
+        """Add job to queue, replacing the pending one of the same parent
+        and callback"""
+        key = (id(parent), end_callback)
+        self.pending_jobs[key] = (checker, end_callback, source_code)
         if DEBUG_EDITOR:
-            print("Added thread %r to queue" % thread, file=STDOUT)
+            print("Added job %r to queue" % (key,), file=STDOUT)
         QTimer.singleShot(50, self.update_queue)
 
     def update_queue(self):
         """Update queue"""
-        started = 0
-        for parent_id, threadlist in list(self.started_threads.items()):
-            still_running = []
-            for thread in threadlist:
-                if thread.isFinished():
-                    end_callback = self.end_callbacks.pop(id(thread))
-                    if thread.results is not None:
-                        #  The thread was executed successfully
-                        end_callback(thread.results)
-                    thread.setParent(None)
-                    thread = None
-                else:
-                    still_running.append(thread)
-                    started += 1
-            threadlist = None
-            if still_running:
-                self.started_threads[parent_id] = still_running
-            else:
-                self.started_threads.pop(parent_id)
         if DEBUG_EDITOR:
             print("Updating queue:", file=STDOUT)
-            print("    started:", started, file=STDOUT)
-            print("    pending:", len(self.pending_threads), file=STDOUT)
-        if self.pending_threads and started < self.max_simultaneous_threads:
-            thread, parent_id = self.pending_threads.pop(0)
-            thread.finished.connect(self.update_queue)
-            threadlist = self.started_threads.get(parent_id, [])
-            self.started_threads[parent_id] = threadlist+[thread]
+            print("    started:", len(self.running_jobs), file=STDOUT)
+            print("    pending:", len(self.pending_jobs), file=STDOUT)
+        running = set(self.running_jobs.values())
+        for key in list(self.pending_jobs.keys()):
+            if len(self.running_jobs) >= self.max_simultaneous_threads:
+                break
+            if key in running:
+                # The results of the running job will be dropped: wait for
+                # it to finish instead of analysing the same file twice
+                continue
+            checker, end_callback, source_code = self.pending_jobs.pop(key)
+            job_id = next(self._job_ids)
+            self.running_jobs[job_id] = key
+            self.end_callbacks[job_id] = end_callback
             if DEBUG_EDITOR:
-                print("===>starting:", thread, file=STDOUT)
-            thread.start()
+                print("===>starting:", key, file=STDOUT)
+            AnalysisThread(self, job_id, checker, source_code).start()
+
+    def job_finished(self, job_id, results):
+        """Analysis job has finished"""
+        key = self.running_jobs.pop(job_id)
+        end_callback = self.end_callbacks.pop(job_id, None)
+        if end_callback is not None and results is not None \
+          and key not in self.pending_jobs:
+            end_callback(results)
+        self.update_queue()
 
 
 class FileInfo(QObject):
@@ -209,13 +219,23 @@ class FileInfo(QObject):
             if run_pep8:
                 self.pep8_results = None
             if run_pyflakes:
-                self.threadmanager.add_thread(codeanalysis.check_with_pyflakes,
-                                              self.pyflakes_analysis_finished,
-                                              source_code, self)
+                self.run_checker('pyflakes', self.pyflakes_analysis_finished,
+                                 source_code)
             if run_pep8:
-                self.threadmanager.add_thread(codeanalysis.check_with_pep8,
-                                              self.pep8_analysis_finished,
-                                              source_code, self)
+                self.run_checker('pep8', self.pep8_analysis_finished,
+                                 source_code)
+
+    def run_checker(self, checker_name, end_callback, source_code):
+        """Run checker *checker_name* in the analysis process pool, unless
+        its results for this source code are already known"""
+        results = codeanalysis.get_cached_results(checker_name, source_code)
+        if results is not None:
+            end_callback(results)
+        else:
+            checker = functools.partial(codeanalysis.run_checker,
+                                        checker_name)
+            self.threadmanager.add_thread(checker, end_callback,
+                                          source_code, self)
 
     def pyflakes_analysis_finished(self, results):
         """Pyflakes code analysis thread has finished"""
@@ -247,9 +267,8 @@ class FileInfo(QObject):
     def run_todo_finder(self):
         """Run TODO finder"""
         if self.editor.is_python():
-            self.threadmanager.add_thread(codeanalysis.find_tasks,
-                                          self.todo_finished,
-                                          self.get_source_code(), self)
+            self.run_checker('todo', self.todo_finished,
+                             self.get_source_code())
 
     def todo_finished(self, results):
         """Code analysis thread has finished"""
@@ -348,6 +367,7 @@ class EditorStack(QWidget):
         self.menu_actions = actions + [None, fileswitcher_action,
                                        copy_to_cb_action]
         self.outlineexplorer = None
+        self.projectexplorer = None
         self.inspector = None
         self.unregister_callback = None
         self.is_closable = False
@@ -513,6 +533,7 @@ class EditorStack(QWidget):
 
     def closeEvent(self, event):
         self.threadmanager.close_all_threads()
+        self.introspector.close()
         self.analysis_timer.timeout.disconnect(self.analyze_script)
         QWidget.closeEvent(self, event)
         if is_pyqt46:
@@ -540,11 +561,24 @@ class EditorStack(QWidget):
         """Open file list management dialog box"""
         if not self.tabs.count():
             return
-        self.fileswitcher_dlg = FileSwitcher(self, self.tabs, self.data)
+        self.fileswitcher_dlg = FileSwitcher(self, self.tabs, self.data,
+                                             self.get_project_index())
         self.fileswitcher_dlg.sig_goto_file.connect(self.set_stack_index)
         self.fileswitcher_dlg.sig_close_file.connect(self.close_file)
+        self.fileswitcher_dlg.sig_edit_goto.connect(
+                                    lambda fname, lineno, name:
+                                    self.edit_goto.emit(fname, lineno, name))
         self.fileswitcher_dlg.show()
 
+    def get_project_index(self):
+        """Return the index of the project of the current file, if any"""
+        if self.projectexplorer is None:
+            return
+        project = self.projectexplorer.get_source_project(
+                                                  self.get_current_filename())
+        if project is not None:
+            return get_project_index(project.root_path)
+
     def update_fileswitcher_dlg(self):
         """Synchronize file list dialog box with editor widget tabs"""
         if self.fileswitcher_dlg:
@@ -594,6 +628,9 @@ class EditorStack(QWidget):
     def set_find_widget(self, find_widget):
         self.find_widget = find_widget
 
+    def set_projectexplorer(self, projectexplorer):
+        self.projectexplorer = projectexplorer
+
     def set_outlineexplorer(self, outlineexplorer):
         self.outlineexplorer = outlineexplorer
         self.outlineexplorer.outlineexplorer_is_visible.connect(
@@ -138,6 +138,7 @@ def start_notification_server():
 class NotificationThread(QThread):
     """Notification thread"""
     sig_process_remote_view = Signal(object)
+    sig_process_remote_view_delta = Signal(object)
     sig_pdb = Signal(str, int)
     open_file = Signal(str, int)
     new_ipython_kernel = Signal(str)
@@ -184,6 +185,8 @@ class NotificationThread(QThread):
                     self.refresh_namespace_browser.emit()
                 elif command == 'remote_view':
                     self.sig_process_remote_view.emit(data)
+                elif command == 'remote_view_delta':
+                    self.sig_process_remote_view_delta.emit(data)
                 elif command == 'ipykernel':
                     self.new_ipython_kernel.emit(data)
                 elif command == 'open_file':
@@ -11,10 +11,13 @@
 #      thread. We must find another mechanism to avoid refreshing systematically
 #      remote views for all consoles...!
 
+import atexit
+import numbers
 import os
 import socket
 import struct
 import threading
+import zlib
 
 # Local imports
 from spyderlib.utils.misc import fix_reference_name
@@ -22,10 +25,14 @@ from spyderlib.utils.debug import log_last_error
 from spyderlib.utils.dochelpers import (getargtxt, getdoc, getsource,
                                         getobjdir, isdefined)
 from spyderlib.utils.bsdsocket import (communicate, read_packet, write_packet,
-                                       PACKET_NOT_RECEIVED, PICKLE_HIGHEST_PROTOCOL)
+                                       dumps, PACKET_NOT_RECEIVED,
+                                       PICKLE_HIGHEST_PROTOCOL,
+                                       clean_shared_arrays,
+                                       remove_shared_arrays)
 from spyderlib.utils.introspection.module_completion import module_completion
 from spyderlib.config.base import get_conf_path, get_supported_types, DEBUG
-from spyderlib.py3compat import getcwd, is_text_string, pickle, _thread
+from spyderlib.py3compat import (getcwd, is_text_string, is_binary_string,
+                                  pickle, _thread)
 
 
 SUPPORTED_TYPES = {}
@@ -41,7 +48,7 @@ if DEBUG_MONITOR:
 
 REMOTE_SETTINGS = ('check_all', 'exclude_private', 'exclude_uppercase',
                    'exclude_capitalized', 'exclude_unsupported',
-                   'excluded_names', 'truncate', 'minmax',
+                   'excluded_names', 'truncate', 'minmax', 'minmax_threshold',
                    'remote_editing', 'autorefresh')
 
 def get_remote_data(data, settings, mode, more_excluded_names=None):
@@ -68,26 +75,120 @@ def get_remote_data(data, settings, mode, more_excluded_names=None):
                          exclude_unsupported=settings['exclude_unsupported'],
                          excluded_names=excluded_names)
 
+def make_remote_entry(value, settings):
+    """Make the remote view of *value* (see make_remote_view)"""
+    from spyderlib.widgets.variableexplorer.utils import (get_human_readable_type,
+                                    get_size, get_color_name, value_to_display)
+    view = value_to_display(value, truncate=settings['truncate'],
+                            minmax=settings['minmax'],
+                            minmax_threshold=settings['minmax_threshold'])
+    return {'type':  get_human_readable_type(value),
+            'size':  get_size(value),
+            'color': get_color_name(value),
+            'view':  view}
+
 def make_remote_view(data, settings, more_excluded_names=None):
     """
     Make a remote view of dictionary *data*
     -> globals explorer
     """
-    from spyderlib.widgets.variableexplorer.utils import (get_human_readable_type,
-                                    get_size, get_color_name, value_to_display)
     assert all([name in REMOTE_SETTINGS for name in settings])
     data = get_remote_data(data, settings, mode='editable',
                            more_excluded_names=more_excluded_names)
     remote = {}
     for key, value in list(data.items()):
-        view = value_to_display(value, truncate=settings['truncate'],
-                                minmax=settings['minmax'])
-        remote[key] = {'type':  get_human_readable_type(value),
-                       'size':  get_size(value),
-                       'color': get_color_name(value),
-                       'view':  view}
+        remote[key] = make_remote_entry(value, settings)
     return remote
-    
+
+# Arrays and DataFrames with at least this number of elements are browsed
+# remotely, one tile at a time (same size as LARGE_SIZE in the editors)
+PROXY_MIN_SIZE = 5e5
+
+# Number of elements of an array used to compute its fingerprint
+FINGERPRINT_SAMPLES = 4096
+
+def get_fingerprint(value):
+    """
+    Return a cheap fingerprint of *value* contents, or None if there is none
+
+    Two fingerprints of the same object are equal when its remote view has
+    not changed. Large arrays are only sampled, so that some in-place changes
+    may go unnoticed.
+    """
+    from spyderlib.widgets.variableexplorer.utils import (ndarray, MaskedArray,
+                                                          DataFrame, Image)
+    if value is None or isinstance(value, numbers.Number) \
+      or is_text_string(value) or is_binary_string(value):
+        # Immutable objects
+        return ()
+    elif isinstance(value, ndarray) and not isinstance(value, MaskedArray):
+        if value.dtype.hasobject:
+            return
+        if value.size > FINGERPRINT_SAMPLES:
+            sample = value.flat[::value.size // FINGERPRINT_SAMPLES]
+        else:
+            sample = value
+        try:
+            if hasattr(sample, 'tobytes'):
+                crc = zlib.crc32(sample.tobytes())
+            else:
+                crc = zlib.crc32(sample.tostring())
+        except Exception:
+            return
+        return (value.shape, value.dtype.str,
+                value.__array_interface__['data'][0], crc)
+    elif isinstance(value, DataFrame):
+        return (value.shape, tuple(value.columns))
+    elif isinstance(value, Image):
+        return (value.size, value.mode)
+
+
+class RemoteView(object):
+    """
+    Remote view of a namespace, updated incrementally
+
+    Each update returns the entries (see make_remote_entry) which changed
+    since the previous one, so that only those are sent to Spyder.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.fingerprints = {}
+
+    def reset(self):
+        """Forget the entries sent so far"""
+        self.entries = {}
+        self.fingerprints = {}
+
+    def update(self, data, settings, more_excluded_names=None):
+        """
+        Update the remote view of dictionary *data*
+
+        Return a (changed entries dict, removed names list) tuple
+        """
+        assert all([name in REMOTE_SETTINGS for name in settings])
+        data = get_remote_data(data, settings, mode='editable',
+                               more_excluded_names=more_excluded_names)
+        removed = [key for key in self.entries if key not in data]
+        for key in removed:
+            self.entries.pop(key)
+            self.fingerprints.pop(key, None)
+        changed = {}
+        for key, value in list(data.items()):
+            fingerprint = get_fingerprint(value)
+            previous = self.fingerprints.get(key)
+            if fingerprint is not None and previous is not None \
+              and previous[0] is value and previous[1] == fingerprint:
+                continue
+            if fingerprint is None:
+                self.fingerprints.pop(key, None)
+            else:
+                # Keeping a reference to value, so that its id can't be reused
+                self.fingerprints[key] = (value, fingerprint)
+            entry = make_remote_entry(value, settings)
+            if self.entries.get(key) != entry:
+                self.entries[key] = changed[key] = entry
+        return changed, removed
+
 
 def monitor_save_globals(sock, settings, filename):
     """Save globals() to file"""
@@ -116,6 +217,32 @@ def monitor_copy_global(sock, orig_name, new_name):
     return communicate(sock, '__copy_global__("%s", "%s")' \
                        % (orig_name, new_name))
 
+def monitor_get_proxy_info(sock, name):
+    """
+    Return the description of global variable *name* needed to browse it
+    remotely (see Monitor.get_proxy_info), or None if it is not worth it
+    """
+    return communicate(sock, '__get_proxy_info__("%s")' % name)
+
+def monitor_get_tile(sock, name, row0, row1, col0, col1):
+    """Get the rows *row0*:*row1* and columns *col0*:*col1* of *name*"""
+    return communicate(sock, '__get_tile__("%s", %d, %d, %d, %d)' \
+                       % (name, row0, row1, col0, col1))
+
+def monitor_get_index(sock, name, row0, row1):
+    """Get the index labels of rows *row0*:*row1* of DataFrame *name*"""
+    return communicate(sock, '__get_index__("%s", %d, %d)' \
+                       % (name, row0, row1))
+
+def monitor_get_color_range(sock, name):
+    """Get the range of values used to color the cells of array *name*"""
+    return communicate(sock, '__get_color_range__("%s")' % name)
+
+def monitor_set_items(sock, name, changes):
+    """Set the items of *name* to the values of dict {(row, col): value}"""
+    return communicate(sock, '__set_items__("%s")' % name,
+                       settings=[changes])
+
 
 def _getcdlistdir():
     """Return current directory list dir"""
@@ -138,6 +265,8 @@ class Monitor(threading.Thread):
         self.auto_refresh = auto_refresh
         self.refresh_after_eval = False
         self.remote_view_settings = None
+        self.remote_view = RemoteView()
+        self.remote_view_sent = False
         
         self.inputhook_flag = False
         self.first_inputhook_call = True
@@ -154,6 +283,9 @@ class Monitor(threading.Thread):
         self.n_request = socket.socket( socket.AF_INET )
         self.n_request.connect( (host, notification_port) )
         write_packet(self.n_request, shell_id)
+
+        # Remove the files of the arrays sent but not loaded by Spyder
+        atexit.register(clean_shared_arrays, os.getpid())
         
         self._mlocals = {
                        "refresh": self.enable_refresh_after_eval,
@@ -186,6 +318,11 @@ class Monitor(threading.Thread):
                        "__set_global__": self.setglobal,
                        "__del_global__": self.delglobal,
                        "__copy_global__": self.copyglobal,
+                       "__get_proxy_info__": self.get_proxy_info,
+                       "__get_tile__": self.get_tile,
+                       "__get_index__": self.get_index,
+                       "__get_color_range__": self.get_color_range,
+                       "__set_items__": self.set_items,
                        "__save_globals__": self.saveglobals,
                        "__load_globals__": self.loadglobals,
                        "_" : None}
@@ -442,19 +579,31 @@ class Monitor(threading.Thread):
         (see the namespace browser widget)
         """
         self.remote_view_settings = read_packet(self.i_request)
+        # Views depend on settings: sending them all again
+        self.remote_view.reset()
+        self.remote_view_sent = False
         self.enable_refresh_after_eval()
         
     def update_remote_view(self):
         """
-        Return remote view of globals()
+        Send remote view of globals(): the whole view the first time, then
+        only the entries which changed since the previous update
         """
         settings = self.remote_view_settings
         if settings:
             ns = self.get_current_namespace()
             more_excluded_names = ['In', 'Out'] if self.ipython_shell else None
-            remote_view = make_remote_view(ns, settings, more_excluded_names)
-            communicate(self.n_request,
-                        dict(command="remote_view", data=remote_view))
+            changed, removed = self.remote_view.update(ns, settings,
+                                                       more_excluded_names)
+            if not self.remote_view_sent:
+                communicate(self.n_request,
+                            dict(command="remote_view",
+                                 data=dict(self.remote_view.entries)))
+                self.remote_view_sent = True
+            elif changed or removed:
+                communicate(self.n_request,
+                            dict(command="remote_view_delta",
+                                 data=(changed, removed)))
         
     def saveglobals(self):
         """Save globals() into filename"""
@@ -517,11 +666,77 @@ class Monitor(threading.Thread):
         ns = self.get_reference_namespace(orig_name)
         ns[new_name] = ns[orig_name]
         self.refresh_after_eval = True
+
+    #------ Remote browsing of large arrays and DataFrames
+    def get_proxy_info(self, name):
+        """
+        Return what Spyder needs to know to browse *name* without getting
+        its whole value (see remoteproxy.py), or None if it is too small or
+        not supported
+        """
+        from spyderlib.widgets.variableexplorer.utils import (ndarray,
+                                                              DataFrame)
+        ns = self.get_current_namespace()
+        value = ns[name]
+        if isinstance(value, DataFrame):
+            if value.size >= PROXY_MIN_SIZE:
+                return dict(kind='dataframe', shape=value.shape,
+                            columns=value.columns.tolist())
+        elif type(value) is ndarray and value.size >= PROXY_MIN_SIZE \
+          and value.ndim in (1, 2) and value.dtype.names is None \
+          and not value.dtype.hasobject:
+            return dict(kind='array', shape=value.shape,
+                        dtype=value.dtype.str)
+
+    def get_tile(self, name, row0, row1, col0, col1):
+        """Return the rows *row0*:*row1* and columns *col0*:*col1* of *name*"""
+        ns = self.get_current_namespace()
+        value = ns[name]
+        if hasattr(value, 'iloc'):
+            return value.iloc[row0:row1, col0:col1]
+        elif value.ndim == 1:
+            return value[row0:row1].copy()
+        else:
+            return value[row0:row1, col0:col1].copy()
+
+    def get_index(self, name, row0, row1):
+        """Return the index labels of rows *row0*:*row1* of DataFrame *name*"""
+        ns = self.get_current_namespace()
+        return ns[name].index[row0:row1].tolist()
+
+    def get_color_range(self, name):
+        """
+        Return the (min, max) range of the values of array *name*, as used by
+        the array editor to color its cells
+        """
+        import numpy as np
+        ns = self.get_current_namespace()
+        value = ns[name]
+        if np.iscomplexobj(value):
+            value = np.abs(value)
+        else:
+            value = np.real(value)
+        return np.nanmin(value), np.nanmax(value)
+
+    def set_items(self, name):
+        """Set the items of *name*, changes being sent as a dict"""
+        ns = self.get_current_namespace()
+        value = ns[name]
+        changes = read_packet(self.i_request)
+        for (row, col), item in list(changes.items()):
+            if hasattr(value, 'iloc'):
+                value.iloc[row, col] = item
+            elif value.ndim == 1:
+                value[row] = item
+            else:
+                value[row, col] = item
+        self.refresh_after_eval = True
         
     def run(self):
         self.ipython_shell = None
         while True:
             output = pickle.dumps(None, PICKLE_HIGHEST_PROTOCOL)
+            shared_arrays = []
             glbs = self.mglobals()
             try:
                 if DEBUG_MONITOR:
@@ -556,7 +771,7 @@ class Monitor(threading.Thread):
                 if self.pdb_obj is None:
                     lcls["_"] = result
                 # old com implementation: (see solution (1) in Issue 434)
-                output = pickle.dumps(result, PICKLE_HIGHEST_PROTOCOL)
+                output = dumps(result, shared_arrays)
 #                # new com implementation: (see solution (2) in Issue 434)
 #                output = pickle.dumps((command, result),
 #                                      PICKLE_HIGHEST_PROTOCOL)
@@ -581,8 +796,12 @@ class Monitor(threading.Thread):
                             # This may happen during interpreter shutdown
                             break
                         else:
-                            write_packet(self.i_request, output,
-                                         already_pickled=True)
+                            try:
+                                write_packet(self.i_request, output,
+                                             already_pickled=True)
+                            except socket.error:
+                                remove_shared_arrays(shared_arrays)
+                                raise
                 except AttributeError as error:
                     if "'NoneType' object has no attribute" in str(error):
                         # This may happen during interpreter shutdown
@@ -598,3 +817,4 @@ class Monitor(threading.Thread):
 
         self.i_request.close()
         self.n_request.close()
+        clean_shared_arrays(os.getpid())
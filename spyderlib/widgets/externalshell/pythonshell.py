@@ -396,6 +396,9 @@ class ExternalPythonShell(ExternalShellBase):
             signal = self.notification_thread.sig_process_remote_view
             signal.connect(lambda data:
                            self.namespacebrowser.process_remote_view(data))
+            signal = self.notification_thread.sig_process_remote_view_delta
+            signal.connect(lambda data:
+                       self.namespacebrowser.process_remote_view_delta(data))
     
     def create_process(self):
         self.shell.clear()
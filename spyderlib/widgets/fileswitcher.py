@@ -18,7 +18,8 @@ from spyderlib.qt.QtCore import Signal, QEvent, QObject, QRegExp, QSize, Qt
 from spyderlib.config.base import _
 from spyderlib.py3compat import iteritems, to_text_string
 from spyderlib.utils import icon_manager as ima
-from spyderlib.utils.stringmatching import get_search_scores
+from spyderlib.utils.qthelpers import get_filetype_icon
+from spyderlib.utils.stringmatching import SearchMatcher
 from spyderlib.widgets.helperwidgets import HelperToolButton, HTMLDelegate
 
 
@@ -207,23 +208,31 @@ class FileSwitcher(QDialog):
     """A Sublime-like file switcher."""
     sig_goto_file = Signal(int)
     sig_close_file = Signal(int)
+    sig_edit_goto = Signal(str, int, str)
 
     # Constants that define the mode in which the list widget is working
     # FILE_MODE is for a list of files, SYMBOL_MODE if for a list of symbols
     # in a given file when using the '@' symbol.
     FILE_MODE, SYMBOL_MODE = [1, 2]
 
-    def __init__(self, parent, tabs, data):
+    def __init__(self, parent, tabs, data, project_index=None):
         QDialog.__init__(self, parent)
 
         # Variables
         self.tabs = tabs                  # Editor stack tabs
         self.data = data                  # Editor data
+        self.project_index = project_index  # Files and symbols of project
         self.mode = self.FILE_MODE        # By default start in this mode
         self.initial_cursors = None       # {fullpath: QCursor}
         self.initial_path = None          # Fullpath of initial active editor
         self.initial_editor = None        # Initial active editor
         self.line_number = None           # Selected line number in filer
+        self.file_matcher = None          # Fuzzy matcher of filenames
+        self.symbol_matcher = None        # Fuzzy matcher of symbols
+        self.short_paths = (None, None)   # ((paths, save status), shorts)
+        self.filtered_path = []           # Paths of the rows in file mode
+        self.filtered_symbol_lines = []   # Lines of the rows in symbol mode
+        self.filtered_symbol_paths = []   # Paths of the rows in symbol mode
 
         help_text = _("Press <b>Enter</b> to switch files or <b>Esc</b> to "
                       "cancel.<br><br>Type to filter filenames.<br><br>"
@@ -269,6 +278,8 @@ class FileSwitcher(QDialog):
         self.edit.textChanged.connect(self.setup)
         self.list.itemSelectionChanged.connect(self.item_selection_changed)
         self.list.clicked.connect(self.edit.setFocus)
+        if project_index is not None:
+            project_index.sig_updated.connect(self.setup)
 
         # Setup
         self.save_initial_state()
@@ -325,12 +336,17 @@ class FileSwitcher(QDialog):
             self.initial_cursors[paths[i]] = editor.textCursor()
 
     def accept(self):
+        row = self.current_row()
+        if self.count() and row >= 0:
+            self.open_project_item(row)
         QDialog.accept(self)
         self.list.clear()
+        self.disconnect_project_index()
 
     def restore_initial_state(self):
         """Restores initial cursors and initial active editor."""
         self.list.clear()
+        self.disconnect_project_index()
         editors = self.editors_by_path
 
         for path in self.initial_cursors:
@@ -436,6 +452,27 @@ class FileSwitcher(QDialog):
             editor = self.get_editor()
             editor.go_to_line(min(line_number, editor.get_line_count()))
 
+    # --- Helper methods: Project index
+    def disconnect_project_index(self):
+        """Stop following the updates of the project index."""
+        if self.project_index is not None:
+            self.project_index.sig_updated.disconnect(self.setup)
+            self.project_index = None
+
+    def open_project_item(self, row):
+        """Open the project file or symbol of row, if its file is not open."""
+        if self.mode == self.FILE_MODE:
+            path = self.filtered_path[row]
+            if path in self.paths:
+                return
+            line_number = int(self.line_number) if self.line_number else 1
+        else:
+            path = self.filtered_symbol_paths[row]
+            if path == self.current_path:
+                return
+            line_number = self.filtered_symbol_lines[row]
+        self.sig_edit_goto.emit(path, line_number, '')
+
     # --- Helper methods: Outline explorer
     def get_symbol_list(self):
         """Get the object explorer data."""
@@ -454,14 +491,27 @@ class FileSwitcher(QDialog):
                     self.edit.setFocus()
                 except ValueError:
                     pass
-            else:
+            elif self.filtered_symbol_paths[row] == self.current_path:
                 line_number = self.filtered_symbol_lines[row]
                 self.goto_line(line_number)
 
+    def get_matcher(self, matcher, choices):
+        """Return matcher, or a new one if it does not search choices."""
+        if matcher is None or matcher.choices != choices:
+            matcher = SearchMatcher(choices, template="<b>{0}</b>")
+        return matcher
+
+    def get_short_paths(self, paths, save_status):
+        """Return the shortened paths, shortening them again if they changed."""
+        key = (paths, save_status)
+        if self.short_paths[0] != key:
+            self.short_paths = (key, shorten_paths(paths, save_status))
+        return self.short_paths[1]
+
     def setup_file_list(self, filter_text, current_path):
         """Setup list widget content for file list display."""
-        short_paths = shorten_paths(self.paths, self.save_status)
         paths = self.paths
+        short_paths = self.get_short_paths(paths, self.save_status)
         results = []
         trying_for_line_number = ':' in filter_text
 
@@ -472,8 +522,8 @@ class FileSwitcher(QDialog):
             line_number = None
 
         # Get all available filenames and get the scores for "fuzzy" matching
-        scores = get_search_scores(filter_text, self.filenames,
-                                   template="<b>{0}</b>")
+        self.file_matcher = self.get_matcher(self.file_matcher, self.filenames)
+        scores = self.file_matcher.get_scores(filter_text)
 
         # Build the text that will appear on the list widget
         for index, score in enumerate(scores):
@@ -481,8 +531,8 @@ class FileSwitcher(QDialog):
             if score_value != -1:
                 text_item = '<big>' + rich_text + '</big>'
                 if trying_for_line_number:
-                    text_item += " [{0:} {1:}]".format(self.line_count[index],
-                                                       _("lines"))
+                    line_count = self.tabs.widget(index).get_line_count()
+                    text_item += " [{0:} {1:}]".format(line_count, _("lines"))
                 text_item += "<br><i>{0:}</i>".format(
                     short_paths[index])
 
@@ -500,6 +550,19 @@ class FileSwitcher(QDialog):
             self.list.addItem(item)
             self.filtered_path.append(path)
 
+        # Add the best matching files of the project which are not open
+        if self.project_index is not None:
+            for path, rich_text, score in self.project_index.search_files(
+                                                  filter_text, exclude=paths):
+                relpath = self.project_index.relpath(path)
+                text_item = '<big>' + rich_text + '</big>'
+                text_item += "<br><i>{0:}</i>".format(osp.dirname(relpath))
+                item = QListWidgetItem(get_filetype_icon(path), text_item)
+                item.setToolTip(path)
+                item.setSizeHint(QSize(0, 25))
+                self.list.addItem(item)
+                self.filtered_path.append(path)
+
         # Move selected item in list accordingly and update list size
         if current_path in self.filtered_path:
             self.set_current_row(self.filtered_path.index(current_path))
@@ -523,12 +586,14 @@ class FileSwitcher(QDialog):
         symbol_list = process_python_symbol_data(oedata)
         line_fold_token = [(item[0], item[2], item[3]) for item in symbol_list]
         choices = [item[1] for item in symbol_list]
-        scores = get_search_scores(symbol_text, choices, template="<b>{0}</b>")
+        self.symbol_matcher = self.get_matcher(self.symbol_matcher, choices)
+        scores = self.symbol_matcher.get_scores(symbol_text)
 
         # Build the text that will appear on the list widget
         results = []
         lines = []
         self.filtered_symbol_lines = []
+        self.filtered_symbol_paths = []
         for index, score in enumerate(scores):
             text, rich_text, score_value = score
             line, fold_level, token = line_fold_token[index]
@@ -545,12 +610,31 @@ class FileSwitcher(QDialog):
             fold_space = '&nbsp;'*(fold_level)
             line_number = line + 1
             self.filtered_symbol_lines.append(line_number)
+            self.filtered_symbol_paths.append(current_path)
             textline = template_1.format(fold_space, token, rich_text)
             textline += template_2.format(fold_space, line_number)
             item = QListWidgetItem(icon, textline)
             item.setSizeHint(QSize(0, 16))
             self.list.addItem(item)
 
+        # Add the best matching top-level symbols of the other project files
+        if self.project_index is not None:
+            template_3 = '<br><i>{0} [Line {1}]</i>'
+            for (name, token, rich_text, path, line_number,
+                 score) in self.project_index.search_symbols(
+                                    symbol_text, exclude=[current_path]):
+                self.filtered_symbol_lines.append(line_number)
+                self.filtered_symbol_paths.append(path)
+                lines.append(name)
+                textline = template_1.format('', token, rich_text)
+                textline += template_3.format(
+                                self.project_index.relpath(path), line_number)
+                icon = ima.icon('class' if token == 'class' else 'function')
+                item = QListWidgetItem(icon, textline)
+                item.setToolTip(path)
+                item.setSizeHint(QSize(0, 16))
+                self.list.addItem(item)
+
         # Move selected item in list accordingly
         # NOTE: Doing this is causing two problems:
         # 1. It makes the cursor to auto-jump to the last selected
@@ -14,24 +14,30 @@
 from __future__ import with_statement
 
 from spyderlib.qt.QtGui import (QHBoxLayout, QWidget, QTreeWidgetItem,
-                                QSizePolicy, QRadioButton, QVBoxLayout, QLabel)
+                                QSizePolicy, QRadioButton, QVBoxLayout, QLabel,
+                                QCheckBox)
 from spyderlib.qt.QtCore import (Signal, Slot, Qt, QThread, QMutexLocker,
-                                 QMutex)
+                                 QMutex, QTimer)
 from spyderlib.qt.compat import getexistingdirectory
 import spyderlib.utils.icon_manager as ima
 
 import sys
 import os
 import re
+import bisect
 import fnmatch
+import itertools
 import os.path as osp
-from subprocess import Popen, PIPE
 import traceback
 
 # Local imports
-from spyderlib.utils.vcs import is_hg_installed, get_vcs_root
+from spyderlib.utils.vcs import (is_hg_installed, is_git_installed,
+                                 get_hg_root, get_git_root, get_hg_files,
+                                 get_git_files, GitIgnore)
 from spyderlib.utils.misc import abspardir, get_common_path
-from spyderlib.utils.qthelpers import create_toolbutton, get_filetype_icon
+from spyderlib.utils import searchpool, trigramindex
+from spyderlib.utils.qthelpers import (create_toolbutton, get_filetype_icon,
+                                       set_item_user_text)
 from spyderlib.config.base import _
 from spyderlib.widgets.comboboxes import PathComboBox, PatternComboBox
 from spyderlib.widgets.onecolumntree import OneColumnTree
@@ -105,9 +111,18 @@ from spyderlib.py3compat import to_text_string, getcwd
 #                    nb += 1
 #    return results, nb
 
+
+# Number of files looked up at once in the trigram index
+INDEX_CHUNK_SIZE = 64
+
+# Minimum time (in ms) between two refreshes of the results of a running search
+REFRESH_INTERVAL = 250
+
+
 class SearchThread(QThread):
     """Find in files search thread"""
     sig_finished = Signal(bool)
+    sig_current_results = Signal(object, int)
     
     def __init__(self, parent):
         QThread.__init__(self, parent)
@@ -120,36 +135,51 @@ class SearchThread(QThread):
         self.rootpath = None
         self.python_path = None
         self.hg_manifest = None
+        self.git_files = None
         self.include = None
         self.exclude = None
         self.texts = None
         self.text_re = None
+        self.use_index = None
+        self.gitignore = None
+        self.index_root = None
+        self.index = None
         self.completed = None
         self.get_pythonpath_callback = None
         
-    def initialize(self, path, python_path, hg_manifest,
-                   include, exclude, texts, text_re):
+    def initialize(self, path, python_path, hg_manifest, git_files,
+                   include, exclude, texts, text_re, use_index, gitignore):
         self.rootpath = path
         self.python_path = python_path
         self.hg_manifest = hg_manifest
+        self.git_files = git_files
         self.include = include
         self.exclude = exclude
         self.texts = texts
         self.text_re = text_re
+        self.use_index = use_index
+        self.gitignore = gitignore
+        self.index_root = path
+        self.index = None
         self.stopped = False
         self.completed = False
         
     def run(self):
         try:
-            self.filenames = []
+            self.results = {}
+            self.nb = 0
+            self.error_flag = False
             if self.hg_manifest:
-                ok = self.find_files_in_hg_manifest()
+                filenames = self.find_files_in_hg_manifest()
+            elif self.git_files:
+                filenames = self.find_files_in_git_index()
             elif self.python_path:
-                ok = self.find_files_in_python_path()
+                filenames = self.find_files_in_python_path()
             else:
-                ok = self.find_files_in_path(self.rootpath)
-            if ok:
-                self.find_string_in_files()
+                filenames = self.find_files_in_path(self.rootpath)
+            if self.use_index:
+                filenames = self.filter_files_with_index(filenames)
+            self.find_string_in_files(filenames)
         except Exception:
             # Important note: we have to handle unexpected exceptions by 
             # ourselves because they won't be catched by the main thread
@@ -163,6 +193,10 @@ class SearchThread(QThread):
         with QMutexLocker(self.mutex):
             self.stopped = True
 
+    def is_stopped(self):
+        with QMutexLocker(self.mutex):
+            return self.stopped
+
     def find_files_in_python_path(self):
         pathlist = os.environ.get('PYTHONPATH', '').split(os.pathsep)
         if self.get_pythonpath_callback is not None:
@@ -180,23 +214,28 @@ class SearchThread(QThread):
                     lcpathlist.append(lcpath)
                     winpathlist.append(path)
             pathlist = winpathlist
-        ok = True
-        for path in set(pathlist):
-            if osp.isdir(path):
-                ok = self.find_files_in_path(path)
-                if not ok:
-                    break
-        return ok
+        pathlist = [path for path in set(pathlist) if osp.isdir(path)]
+        self.index_root = os.pathsep.join(sorted(pathlist))
+        for path in pathlist:
+            for filename in self.find_files_in_path(path):
+                yield filename
 
     def find_files_in_hg_manifest(self):
-        p = Popen(['hg', 'manifest'], stdout=PIPE,
-                  cwd=self.rootpath, shell=True)
-        hgroot = get_vcs_root(self.rootpath)
-        self.pathlist = [hgroot]
-        for path in p.stdout.read().decode().splitlines():
-            with QMutexLocker(self.mutex):
-                if self.stopped:
-                    return False
+        hgroot = get_hg_root(self.rootpath)
+        return self.find_files_in_vcs(hgroot, get_hg_files(hgroot))
+
+    def find_files_in_git_index(self):
+        gitroot = get_git_root(self.rootpath)
+        return self.find_files_in_vcs(gitroot, get_git_files(gitroot))
+
+    def find_files_in_vcs(self, root, paths):
+        """Filter the files of a repository, relative to its *root*"""
+        self.pathlist = [root]
+        self.index_root = root
+        for path in paths:
+            if self.is_stopped():
+                return
+            path = osp.normpath(path)
             dirname = osp.dirname(path)
             try:
                 if re.search(self.exclude, dirname+os.sep):
@@ -205,81 +244,100 @@ class SearchThread(QThread):
                 if re.search(self.exclude, filename):
                     continue
                 if re.search(self.include, filename):
-                    self.filenames.append(osp.join(hgroot, path))
+                    yield osp.join(root, path)
             except re.error:
                 self.error_flag = _("invalid regular expression")
-                return False
-        return True
+                self.stop()
+                return
     
     def find_files_in_path(self, path):
         if self.pathlist is None:
             self.pathlist = []
         self.pathlist.append(path)
+        gitignore = None
+        if self.gitignore:
+            path = osp.abspath(path)
+            gitroot = get_git_root(path)
+            if gitroot is not None:
+                gitignore = GitIgnore(gitroot)
+                gitignore.add_parents(path)
         for path, dirs, files in os.walk(path):
-            with QMutexLocker(self.mutex):
-                if self.stopped:
-                    return False
+            if self.is_stopped():
+                return
+            if gitignore is not None:
+                # Ignored directories are not walked at all
+                if '.gitignore' in files:
+                    gitignore.add_directory(path)
+                dirs[:] = [d for d in dirs if not
+                           gitignore.is_ignored(os.path.join(path, d), True)]
+                files = [f for f in files if not
+                         gitignore.is_ignored(os.path.join(path, f))]
             try:
                 for d in dirs[:]:
                     dirname = os.path.join(path, d)
                     if re.search(self.exclude, dirname+os.sep):
                         dirs.remove(d)
+                found = []
                 for f in files:
                     filename = os.path.join(path, f)
                     if re.search(self.exclude, filename):
                         continue
                     if re.search(self.include, filename):
-                        self.filenames.append(filename)
+                        found.append(filename)
             except re.error:
                 self.error_flag = _("invalid regular expression")
-                return False
-        return True
+                self.stop()
+                return
+            for filename in found:
+                yield filename
         
-    def find_string_in_files(self):
-        self.results = {}
-        self.nb = 0
-        self.error_flag = False
-        for fname in self.filenames:
-            with QMutexLocker(self.mutex):
-                if self.stopped:
-                    return
-            try:
-                for lineno, line in enumerate(open(fname, 'rb')):
-                    for text, enc in self.texts:
-                        if self.text_re:
-                            found = re.search(text, line)
-                            if found is not None:
-                                break
-                        else:
-                            found = line.find(text)
-                            if found > -1:
-                                break
-                    try:
-                        line_dec = line.decode(enc)
-                    except UnicodeDecodeError:
-                        line_dec = line
-                    if self.text_re:
-                        for match in re.finditer(text, line):
-                            res = self.results.get(osp.abspath(fname), [])
-                            res.append((lineno+1, match.start(), line_dec))
-                            self.results[osp.abspath(fname)] = res
-                            self.nb += 1
-                    else:
-                        while found > -1:
-                            res = self.results.get(osp.abspath(fname), [])
-                            res.append((lineno+1, found, line_dec))
-                            self.results[osp.abspath(fname)] = res
-                            for text, enc in self.texts:
-                                found = line.find(text, found+1)
-                                if found > -1:
-                                    break
-                            self.nb += 1
-            except IOError as xxx_todo_changeme:
-                (_errno, _strerror) = xxx_todo_changeme.args
-                self.error_flag = _("permission denied errors were encountered")
-            except re.error:
+    def filter_files_with_index(self, filenames):
+        """Skip the files which can't match, using a trigram index"""
+        literals = trigramindex.get_required_literals(self.texts, self.text_re)
+        chunk = []
+        for filename in itertools.chain(filenames, [None]):
+            if filename is not None:
+                chunk.append(filename)
+                if len(chunk) < INDEX_CHUNK_SIZE:
+                    continue
+            if self.index is None:
+                self.index = trigramindex.get_index(self.index_root)
+            found = self.index.filter(chunk, literals, self.is_stopped)
+            if found is None:
+                return
+            for fname in found:
+                yield fname
+            chunk = []
+
+    def find_string_in_files(self, filenames):
+        pool = searchpool.get_search_pool()
+        if pool is None:
+            found = (searchpool.scan_files([fname], self.texts, self.text_re)
+                     for fname in filenames)
+        else:
+            found = pool.search(filenames, self.texts, self.text_re,
+                                self.is_stopped)
+        for results, nb, errors in found:
+            if self.is_stopped():
+                break
+            self.add_results(results, nb, errors)
+        if self.index is not None:
+            self.index.save()
+        with QMutexLocker(self.mutex):
+            self.completed = not self.stopped
+
+    def add_results(self, results, nb, errors):
+        """Add the results of a batch of scanned files"""
+        for error in errors:
+            if error == 'permission':
+                self.error_flag = _("permission denied errors were "
+                                    "encountered")
+            elif error == 'regexp':
                 self.error_flag = _("invalid regular expression")
-        self.completed = True
+        if results:
+            self.results.update(results)
+            self.nb += nb
+            self.sig_current_results.emit(results, nb)
     
     def get_results(self):
         return self.results, self.pathlist, self.nb, self.error_flag
@@ -293,7 +351,8 @@ class FindOptions(QWidget):
     def __init__(self, parent, search_text, search_text_regexp, search_path,
                  include, include_idx, include_regexp,
                  exclude, exclude_idx, exclude_regexp,
-                 supported_encodings, in_python_path, more_options):
+                 supported_encodings, in_python_path, more_options,
+                 use_index, gitignore):
         QWidget.__init__(self, parent)
         
         if search_path is None:
@@ -381,22 +440,35 @@ class FindOptions(QWidget):
                           "Search in all directories listed in sys.path which"
                           " are outside the Python installation directory"))        
         self.hg_manifest = QRadioButton(_("Hg repository"), self)
-        self.detect_hg_repository()
         self.hg_manifest.setToolTip(
                                 _("Search in current directory hg repository"))
+        self.git_files = QRadioButton(_("Git repository"), self)
+        self.git_files.setToolTip(
+                            _("Search in current directory git repository"))
         self.custom_dir = QRadioButton(_("Here:"), self)
         self.custom_dir.setChecked(not in_python_path)
+        self.detect_vcs_repository()
         self.dir_combo = PathComboBox(self)
         self.dir_combo.addItems(search_path)
         self.dir_combo.setToolTip(_("Search recursively in this directory"))
         self.dir_combo.open_dir.connect(self.set_directory)
         self.python_path.toggled.connect(self.dir_combo.setDisabled)
         self.hg_manifest.toggled.connect(self.dir_combo.setDisabled)
+        self.git_files.toggled.connect(self.dir_combo.setDisabled)
         browse = create_toolbutton(self, icon=ima.icon('DirOpenIcon'),
                                    tip=_('Browse a search directory'),
                                    triggered=self.select_directory)
-        for widget in [self.python_path, self.hg_manifest, self.custom_dir,
-                       self.dir_combo, browse]:
+        self.use_index = QCheckBox(_("Use index"), self)
+        self.use_index.setChecked(use_index)
+        self.use_index.setToolTip(_("Keep an index of the searched files to "
+                                    "only read the ones which may match"))
+        self.gitignore = QCheckBox(_("Skip ignored files"), self)
+        self.gitignore.setChecked(gitignore)
+        self.gitignore.setToolTip(_("Skip the files and directories ignored "
+                                    "by git (see .gitignore files)"))
+        for widget in [self.python_path, self.hg_manifest, self.git_files,
+                       self.custom_dir, self.dir_combo, browse,
+                       self.use_index, self.gitignore]:
             hlayout3.addWidget(widget)
             
         self.search_text.valid.connect(lambda valid: self.find.emit())
@@ -435,12 +507,15 @@ class FindOptions(QWidget):
         self.include_pattern.lineEdit().returnPressed.emit()
         self.exclude_pattern.lineEdit().returnPressed.emit()
         
-    def detect_hg_repository(self, path=None):
+    def detect_vcs_repository(self, path=None):
         if path is None:
             path = getcwd()
-        hg_repository = is_hg_installed() and get_vcs_root(path) is not None
+        hg_repository = is_hg_installed() and get_hg_root(path) is not None
         self.hg_manifest.setEnabled(hg_repository)
-        if not hg_repository and self.hg_manifest.isChecked():
+        git_repository = is_git_installed() and get_git_root(path) is not None
+        self.git_files.setEnabled(git_repository)
+        if not hg_repository and self.hg_manifest.isChecked() \
+          or not git_repository and self.git_files.isChecked():
             self.custom_dir.setChecked(True)
         
     def set_search_text(self, text):
@@ -470,6 +545,9 @@ class FindOptions(QWidget):
         exclude_re = self.exclude_regexp.isChecked()
         python_path = self.python_path.isChecked()
         hg_manifest = self.hg_manifest.isChecked()
+        git_files = self.git_files.isChecked()
+        use_index = self.use_index.isChecked()
+        gitignore = self.gitignore.isChecked()
         path = osp.abspath( to_text_string( self.dir_combo.currentText() ) )
         
         # Finding text occurences
@@ -493,10 +571,10 @@ class FindOptions(QWidget):
             return (search_text, text_re, search_path,
                     include, include_idx, include_re,
                     exclude, exclude_idx, exclude_re,
-                    python_path, more_options)
+                    python_path, more_options, use_index, gitignore)
         else:
-            return (path, python_path, hg_manifest,
-                    include, exclude, texts, text_re)
+            return (path, python_path, hg_manifest, git_files,
+                    include, exclude, texts, text_re, use_index, gitignore)
 
     @Slot()
     def select_directory(self):
@@ -511,7 +589,7 @@ class FindOptions(QWidget):
     def set_directory(self, directory):
         path = to_text_string(osp.abspath(to_text_string(directory)))
         self.dir_combo.setEditText(path)
-        self.detect_hg_repository(path)
+        self.detect_vcs_repository(path)
         
     def keyPressEvent(self, event):
         """Reimplemented to handle key events"""
@@ -534,9 +612,19 @@ class ResultsBrowser(OneColumnTree):
         self.nb = None
         self.error_flag = None
         self.completed = None
+        self.searching = False
         self.data = None
         self.set_title('')
         self.root_items = None
+        self.root_path_list = None
+        self.dir_items = None
+        self.child_keys = None
+        self.pending_results = {}
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh_current_results)
+        self.refresh_pending = False
         
     def activated(self, item):
         """Double-click event"""
@@ -551,20 +639,72 @@ class ResultsBrowser(OneColumnTree):
         
     def set_results(self, search_text, results, pathlist, nb,
                     error_flag, completed):
+        self.refresh_timer.stop()
+        streamed = self.searching and self.results
+        self.searching = False
+        self.pending_results = {}
         self.search_text = search_text
         self.results = results
         self.pathlist = pathlist
         self.nb = nb
         self.error_flag = error_flag
         self.completed = completed
+        if streamed:
+            self.save_expanded_state()
+            self.refresh()
+            self.restore_expanded_state()
+        else:
+            self.refresh()
+            if not self.error_flag and self.nb:
+                self.restore()
+
+    def start_search(self, search_text, pathlist):
+        """Clear the results before a search is started"""
+        self.refresh_timer.stop()
+        self.searching = True
+        self.refresh_pending = False
+        self.pending_results = {}
+        self.search_text = search_text
+        self.results = {}
+        self.pathlist = pathlist
+        self.nb = 0
+        self.error_flag = False
+        self.completed = False
         self.refresh()
-        if not self.error_flag and self.nb:
+
+    def append_results(self, results, nb):
+        """Add results found by the running search"""
+        self.results.update(results)
+        self.pending_results.update(results)
+        self.nb += nb
+        self.refresh_pending = True
+        if not self.refresh_timer.isActive():
+            # Show the first results at once, then at most every
+            # REFRESH_INTERVAL ms
+            self.refresh_current_results()
+
+    def refresh_current_results(self):
+        """Show the results found so far by the running search"""
+        if not self.searching or not self.refresh_pending:
+            return
+        self.refresh_pending = False
+        pending, self.pending_results = self.pending_results, {}
+        if self.topLevelItemCount() and all([self.is_under_root_path(fname)
+                                             for fname in pending]):
+            # Only the new files are added to the tree
+            self.refresh_title()
+            self.add_results_to_tree(pending)
+        elif self.topLevelItemCount():
+            self.save_expanded_state()
+            self.refresh()
+            self.restore_expanded_state()
+        else:
+            self.refresh()
             self.restore()
+        self.refresh_timer.start()
         
-    def refresh(self):
-        """
-        Refreshing search results panel
-        """
+    def refresh_title(self):
+        """Refresh the title, showing the number of matches"""
         title = "'%s' - " % self.search_text
         if self.results is None:
             text = _('Search canceled')
@@ -581,18 +721,30 @@ class ResultsBrowser(OneColumnTree):
                                         nb_files, text_files)
         if self.error_flag:
             text += ' (' + self.error_flag + ')'
+        elif self.searching:
+            text += ' (' + _('searching...') + ')'
         elif self.results is not None and not self.completed:
             text += ' (' + _('interrupted') + ')'
         self.set_title(title+text)
+
+    def refresh(self):
+        """
+        Refreshing search results panel
+        """
+        self.refresh_title()
         self.clear()
         self.data = {}
+        self.root_items = []
+        self.root_path_list = []
+        self.dir_items = {}
+        self.child_keys = {}
         
         if not self.results: # First search interrupted *or* No result
             return
 
         # Directory set
         dir_set = set()
-        for filename in sorted(self.results.keys()):
+        for filename in self.results:
             dirname = osp.abspath(osp.dirname(filename))
             dir_set.add(dirname)
                 
@@ -609,52 +761,75 @@ class ResultsBrowser(OneColumnTree):
                 root_path_list = self.pathlist
         if not root_path_list:
             return
-        for _root_path in root_path_list:
-            dir_set.add(_root_path)
-        # Populating tree: directories
-        def create_dir_item(dirname, parent):
-            if dirname not in root_path_list:
-                displayed_name = osp.basename(dirname)
-            else:
-                displayed_name = dirname
-            item = QTreeWidgetItem(parent, [displayed_name],
-                                   QTreeWidgetItem.Type)
-            item.setIcon(0, ima.icon('DirClosedIcon'))
+        self.root_path_list = root_path_list
+        self.add_results_to_tree(self.results)
+
+    def is_under_root_path(self, filename):
+        """Return True if *filename* belongs to the tree's root paths"""
+        dirname = osp.abspath(osp.dirname(filename))
+        for root_path in self.root_path_list:
+            if dirname == root_path \
+              or dirname.startswith(osp.join(root_path, '')):
+                return True
+        return False
+
+    def insert_item(self, parent, item, key):
+        """
+        Insert *item* among the children of *parent* (an item or the tree),
+        sorted by *key*: directories first, then files
+        """
+        keys = self.child_keys.setdefault(id(parent), [])
+        index = bisect.bisect(keys, key)
+        keys.insert(index, key)
+        if parent is self:
+            self.insertTopLevelItem(index, item)
+        else:
+            parent.insertChild(index, item)
+
+    def get_dir_item(self, dirname):
+        """
+        Return the item of directory *dirname*, creating it and its parent
+        directories if needed
+
+        Returns None if *dirname* doesn't belong to the tree's root paths.
+        """
+        item = self.dir_items.get(dirname)
+        if item is not None:
             return item
-        dirs = {}
-        for dirname in sorted(list(dir_set)):
-            if dirname in root_path_list:
-                parent = self
-            else:
-                parent_dirname = abspardir(dirname)
-                parent = dirs.get(parent_dirname)
-                if parent is None:
-                    # This is related to directories which contain found
-                    # results only in some of their children directories
-                    if osp.commonprefix([dirname]+root_path_list):
-                        # create new root path
-                        pass
-                    items_to_create = []
-                    while dirs.get(parent_dirname) is None:
-                        items_to_create.append(parent_dirname)
-                        parent_dirname = abspardir(parent_dirname)
-                    items_to_create.reverse()
-                    for item_dir in items_to_create:
-                        item_parent = dirs[abspardir(item_dir)]
-                        dirs[item_dir] = create_dir_item(item_dir, item_parent)
-                    parent_dirname = abspardir(dirname)
-                    parent = dirs[parent_dirname]
-            dirs[dirname] = create_dir_item(dirname, parent)
-        self.root_items = [dirs[_root_path] for _root_path in root_path_list]
-        # Populating tree: files
-        for filename in sorted(self.results.keys()):
-            parent_item = dirs[osp.dirname(filename)]
-            file_item = QTreeWidgetItem(parent_item, [osp.basename(filename)],
+        if dirname in self.root_path_list:
+            parent, displayed_name = self, dirname
+        else:
+            parent_dirname = abspardir(dirname)
+            if parent_dirname == dirname:
+                return
+            parent = self.get_dir_item(parent_dirname)
+            if parent is None:
+                return
+            displayed_name = osp.basename(dirname)
+        item = QTreeWidgetItem([displayed_name], QTreeWidgetItem.Type)
+        self.insert_item(parent, item, (0, dirname))
+        item.setIcon(0, ima.icon('DirClosedIcon'))
+        set_item_user_text(item, dirname)
+        self.dir_items[dirname] = item
+        if parent is self:
+            self.root_items.append(item)
+        return item
+
+    def add_results_to_tree(self, results):
+        """Add the files of *results* and their matches to the tree"""
+        for filename in sorted(results.keys()):
+            parent_item = self.get_dir_item(
+                                    osp.abspath(osp.dirname(filename)))
+            if parent_item is None:
+                continue
+            file_item = QTreeWidgetItem([osp.basename(filename)],
                                         QTreeWidgetItem.Type)
+            self.insert_item(parent_item, file_item, (1, filename))
             file_item.setIcon(0, get_filetype_icon(filename))
+            set_item_user_text(file_item, filename)
             colno_dict = {}
             fname_res = []
-            for lineno, colno, line in self.results[filename]:
+            for lineno, colno, line in results[filename]:
                 if lineno not in colno_dict:
                     fname_res.append((lineno, colno, line))
                 colno_dict[lineno] = colno_dict.get(lineno, [])+[str(colno)]
@@ -665,12 +840,6 @@ class ResultsBrowser(OneColumnTree):
                            QTreeWidgetItem.Type)
                 item.setIcon(0, ima.icon('arrow'))
                 self.data[id(item)] = (filename, lineno)
-        # Removing empty directories
-        top_level_items = [self.topLevelItem(index)
-                           for index in range(self.topLevelItemCount())]
-        for item in top_level_items:
-            if not item.childCount():
-                self.takeTopLevelItem(self.indexOfTopLevelItem(item))
 
 
 class FindInFilesWidget(QWidget):
@@ -684,7 +853,8 @@ class FindInFilesWidget(QWidget):
                  exclude=r"\.pyc$|\.orig$|\.hg|\.svn", exclude_idx=None,
                  exclude_regexp=True,
                  supported_encodings=("utf-8", "iso-8859-1", "cp1252"),
-                 in_python_path=False, more_options=False):
+                 in_python_path=False, more_options=False, use_index=False,
+                 gitignore=True):
         QWidget.__init__(self, parent)
         
         self.setWindowTitle(_('Find in files'))
@@ -697,9 +867,9 @@ class FindInFilesWidget(QWidget):
                                         include, include_idx, include_regexp,
                                         exclude, exclude_idx, exclude_regexp,
                                         supported_encodings, in_python_path,
-                                        more_options)
+                                        more_options, use_index, gitignore)
         self.find_options.find.connect(self.find)
-        self.find_options.stop.connect(self.stop_and_reset_thread)
+        self.find_options.stop.connect(self.stop_search)
         
         self.result_browser = ResultsBrowser(self)
         
@@ -747,7 +917,11 @@ class FindInFilesWidget(QWidget):
         self.search_thread.get_pythonpath_callback = \
                                                 self.get_pythonpath_callback
         self.search_thread.sig_finished.connect(self.search_complete)
+        self.search_thread.sig_current_results.connect(self.current_results)
         self.search_thread.initialize(*options)
+        search_text = to_text_string(
+                                self.find_options.search_text.currentText())
+        self.result_browser.start_search(search_text, [options[0]])
         self.search_thread.start()
         self.find_options.ok_button.setEnabled(False)
         self.find_options.stop_button.setEnabled(True)
@@ -764,10 +938,24 @@ class FindInFilesWidget(QWidget):
             self.search_thread.setParent(None)
             self.search_thread = None
         
+    def stop_search(self):
+        """Stop the current search, showing the results found so far"""
+        if self.search_thread is not None and self.search_thread.isRunning():
+            self.search_thread.sig_finished.disconnect(self.search_complete)
+            self.search_thread.stop()
+            self.search_thread.wait()
+            self.search_complete(False)
+
     def closing_widget(self):
         """Perform actions before widget is closed"""
         self.stop_and_reset_thread(ignore_results=True)
         
+    def current_results(self, results, nb):
+        """Current search thread has found new results"""
+        if self.search_thread is not None \
+          and self.sender() is self.search_thread:
+            self.result_browser.append_results(results, nb)
+
     def search_complete(self, completed):
         """Current search thread has finished"""
         self.find_options.ok_button.setEnabled(True)
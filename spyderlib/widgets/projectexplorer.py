@@ -482,6 +482,7 @@ class IconProvider(QFileIconProvider):
     def __init__(self, treeview):
         super(IconProvider, self).__init__()
         self.treeview = treeview
+        self.ext_icons = {}  # {extension: icon path, or None}
         
     @Slot(int)
     @Slot(QFileInfo)
@@ -500,7 +501,10 @@ class IconProvider(QFileIconProvider):
                     return get_dir_icon(fname, project)
             else:
                 ext = osp.splitext(fname)[1][1:]
-                icon_path = get_image_path(ext+'.png', default=None)
+                if ext not in self.ext_icons:
+                    self.ext_icons[ext] = get_image_path(ext+'.png',
+                                                         default=None)
+                icon_path = self.ext_icons[ext]
                 if icon_path is not None:
                     return get_icon(icon_path)
                 else:
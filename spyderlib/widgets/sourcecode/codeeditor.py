@@ -283,12 +283,22 @@ class BlockUserData(QTextBlockUserData):
         self.breakpoint = False
         self.breakpoint_condition = None
         self.code_analysis = []
+        self.code_analysis_selections = []
         self.todo = ''
+        self.block = None
         self.editor.blockuserdata_list.append(self)
 
     def is_empty(self):
         return not self.breakpoint and not self.code_analysis and not self.todo
 
+    def get_line_number(self):
+        """Return the line number of the block holding this data, or None
+        if it is not known anymore"""
+        block = self.block
+        if block is None or not block.isValid() or block.userData() is not self:
+            return
+        return block.blockNumber()+1
+
     def __del__(self):
         bud_list = self.editor.blockuserdata_list
         bud_list.pop(bud_list.index(self))
@@ -453,6 +463,12 @@ class CodeEditor(TextEditBaseWidget):
         self.error_color = "#EA2B0E"
         self.todo_color = "#B4D4F3"
         self.breakpoint_color = "#30E62E"
+        # Sorted (line number, color) flags, computed when needed (shared
+        # with clones like the block user data)
+        self.markers_cache = {}
+        self.blockCountChanged.connect(self.invalidate_scrollflag_markers)
+        self.document().contentsChange.connect(
+                                        self.__scrollflag_contents_changed)
 
         self.update_linenumberarea_width()
 
@@ -632,6 +648,10 @@ class CodeEditor(TextEditBaseWidget):
     def set_as_clone(self, editor):
         """Set as clone editor"""
         self.setDocument(editor.document())
+        self.document().contentsChange.connect(
+                                        self.__scrollflag_contents_changed)
+        self.blockuserdata_list = editor.blockuserdata_list
+        self.markers_cache = editor.markers_cache
         self.document_id = editor.get_document_id()
         self.highlighter = editor.highlighter
         self._apply_highlighter_color_scheme()
@@ -972,6 +992,18 @@ class CodeEditor(TextEditBaseWidget):
                         underline_style=QTextCharFormat.SpellCheckUnderline,
                         update=False):
         extra_selections = self.get_extra_selections(key)
+        selection = self.__create_selection(cursor, foreground_color,
+                                            background_color, underline_color,
+                                            underline_style)
+        extra_selections.append(selection)
+        self.set_extra_selections(key, extra_selections)
+        if update:
+            self.update_extra_selections()
+
+    def __create_selection(self, cursor, foreground_color=None,
+                        background_color=None, underline_color=None,
+                        underline_style=QTextCharFormat.SpellCheckUnderline):
+        """Return an extra selection of *cursor* with the given format"""
         selection = QTextEdit.ExtraSelection()
         if foreground_color is not None:
             selection.format.setForeground(foreground_color)
@@ -985,10 +1017,7 @@ class CodeEditor(TextEditBaseWidget):
         selection.format.setProperty(QTextFormat.FullWidthSelection,
                                      to_qvariant(True))
         selection.cursor = cursor
-        extra_selections.append(selection)
-        self.set_extra_selections(key, extra_selections)
-        if update:
-            self.update_extra_selections()
+        return selection
 
     def __mark_occurences(self):
         """Marking occurences of the currently selected word"""
@@ -1293,7 +1322,9 @@ class CodeEditor(TextEditBaseWidget):
             if len(text) == 0 or text.startswith('#') or text.startswith('"') \
                or text.startswith("'"):
                 data.breakpoint = False
+        data.block = block
         block.setUserData(data)
+        self.invalidate_scrollflag_markers()
         self.linenumberarea.update()
         self.scrollflagarea.update()
         self.breakpoints_changed.emit()
@@ -1317,6 +1348,7 @@ class CodeEditor(TextEditBaseWidget):
             # data.breakpoint_condition = None  # not necessary, but logical
             if data.is_empty():
                 del data
+        self.invalidate_scrollflag_markers()
 
     def set_breakpoints(self, breakpoints):
         """Set breakpoints"""
@@ -1391,31 +1423,12 @@ class CodeEditor(TextEditBaseWidget):
         # Filling the whole painting area
         painter = QPainter(self.scrollflagarea)
         painter.fillRect(event.rect(), self.sideareas_color)
-        block = self.document().firstBlock()
 
-        # Painting warnings and todos
-        for line_number in range(1, self.document().blockCount()+1):
-            data = block.userData()
-            if data:
-                position = self.scrollflagarea.value_to_position(line_number)
-                if data.code_analysis:
-                    # Warnings
-                    color = self.warning_color
-                    for _message, error in data.code_analysis:
-                        if error:
-                            color = self.error_color
-                            break
-                    set_scrollflagarea_painter(painter, color)
-                    painter.drawRect(make_flag(position))
-                if data.todo:
-                    # TODOs
-                    set_scrollflagarea_painter(painter, self.todo_color)
-                    painter.drawRect(make_flag(position))
-                if data.breakpoint:
-                    # Breakpoints
-                    set_scrollflagarea_painter(painter, self.breakpoint_color)
-                    painter.drawRect(make_flag(position))
-            block = block.next()
+        # Painting warnings, todos and breakpoints
+        for line_number, color in self.get_scrollflag_markers():
+            position = self.scrollflagarea.value_to_position(line_number)
+            set_scrollflagarea_painter(painter, color)
+            painter.drawRect(make_flag(position))
 
         # Occurences
         if self.occurences:
@@ -1440,6 +1453,51 @@ class CodeEditor(TextEditBaseWidget):
         painter.setBrush(QBrush(brush_color))
         painter.drawRect(make_slider(self.firstVisibleBlock().blockNumber()))
 
+    def get_scrollflag_markers(self):
+        """Return the sorted (line number, color) flags of the warnings,
+        todos and breakpoints"""
+        if 'scrollflag' not in self.markers_cache:
+            markers = []
+            for data in self.blockuserdata_list:
+                if data.is_empty():
+                    continue
+                line_number = data.get_line_number()
+                if line_number is None:
+                    continue
+                if data.code_analysis:
+                    color = self.warning_color
+                    for _message, error in data.code_analysis:
+                        if error:
+                            color = self.error_color
+                            break
+                    markers.append((line_number, 0, color))
+                if data.todo:
+                    markers.append((line_number, 1, self.todo_color))
+                if data.breakpoint:
+                    markers.append((line_number, 2, self.breakpoint_color))
+            self.markers_cache['scrollflag'] = [(line_number, color) for
+                                                line_number, _order, color in
+                                                sorted(markers)]
+        return self.markers_cache['scrollflag']
+
+    def invalidate_scrollflag_markers(self, new_block_count=None):
+        """
+        Forget the scroll flags: they will be computed again when painting
+
+        new_block_count is needed to handle blockCountChanged(int) signal
+        """
+        self.markers_cache.clear()
+
+    def __scrollflag_contents_changed(self, position, chars_removed,
+                                      chars_added):
+        """Forget the scroll flags if lines may have moved"""
+        if 'scrollflag' not in self.markers_cache or not chars_added:
+            return
+        document = self.document()
+        if document.findBlock(position).blockNumber() != \
+           document.findBlock(position+chars_added).blockNumber():
+            self.invalidate_scrollflag_markers()
+
     def resizeEvent(self, event):
         """Reimplemented Qt method to handle line number area resizing"""
         TextEditBaseWidget.resizeEvent(self, event)
@@ -1615,8 +1673,10 @@ class CodeEditor(TextEditBaseWidget):
         self.clear_extra_selections('code_analysis')
         for data in self.blockuserdata_list[:]:
             data.code_analysis = []
+            data.code_analysis_selections = []
             if data.is_empty():
                 del data
+        self.invalidate_scrollflag_markers()
         self.setUpdatesEnabled(True)
         # When the new code analysis results are empty, it is necessary
         # to update manually the scrollflag and linenumber areas (otherwise,
@@ -1626,57 +1686,82 @@ class CodeEditor(TextEditBaseWidget):
 
     def process_code_analysis(self, check_results):
         """Analyze filename code with pyflakes"""
-        self.cleanup_code_analysis()
         if check_results is None:
             # Not able to compile module
+            self.cleanup_code_analysis()
             return
-        self.setUpdatesEnabled(False)
-        cursor = self.textCursor()
-        document = self.document()
-        flags = QTextDocument.FindCaseSensitively|QTextDocument.FindWholeWords
+        results = {}
         for message, line_number in check_results:
             error = 'syntax' in message
             # Note: line_number start from 1 (not 0)
-            block = self.document().findBlockByNumber(line_number-1)
+            results.setdefault(line_number, []).append( (message, error) )
+        self.setUpdatesEnabled(False)
+        # Only the lines whose results changed are updated
+        for data in self.blockuserdata_list[:]:
+            if not data.code_analysis:
+                continue
+            line_number = data.get_line_number()
+            if line_number is not None \
+              and results.get(line_number) == data.code_analysis:
+                results.pop(line_number)
+                continue
+            data.code_analysis = []
+            data.code_analysis_selections = []
+            if data.is_empty():
+                del data
+        document = self.document()
+        for line_number, code_analysis in sorted(results.items()):
+            block = document.findBlockByNumber(line_number-1)
+            if not block.isValid():
+                continue
             data = block.userData()
             if not data:
                 data = BlockUserData(self)
-            data.code_analysis.append( (message, error) )
+            data.code_analysis = code_analysis
+            data.code_analysis_selections = \
+                        self.__get_code_analysis_selections(block, code_analysis)
+            data.block = block
             block.setUserData(data)
-            refs = re.findall(r"\'[a-zA-Z0-9_]*\'", message)
-            for ref in refs:
-                # Highlighting found references
-                text = ref[1:-1]
-                # Scanning line number *line* and following lines if continued
-                def is_line_splitted(line_no):
-                    text = to_text_string(
-                                document.findBlockByNumber(line_no).text())
-                    stripped = text.strip()
-                    return stripped.endswith('\\') or stripped.endswith(',') \
-                           or len(stripped) == 0
-                line2 = line_number-1
-                while line2 < self.blockCount()-1 and is_line_splitted(line2):
-                    line2 += 1
-                cursor.setPosition(block.position())
-                cursor.movePosition(QTextCursor.StartOfBlock)
-                regexp = QRegExp(r"\b%s\b" % QRegExp.escape(text),
-                                 Qt.CaseSensitive)
-                color = self.error_color if error else self.warning_color
-                # Highlighting all occurences (this is a compromise as pyflakes
-                # do not provide the column number -- see Issue 709 on Spyder's
-                # GoogleCode project website)
-                cursor = document.find(regexp, cursor, flags)
-                if cursor:
-                    while cursor and cursor.blockNumber() <= line2 \
-                          and cursor.blockNumber() >= line_number-1 \
-                          and cursor.position() > 0:
-                        self.__highlight_selection('code_analysis', cursor,
-                                       underline_color=QColor(color))
-                        cursor = document.find(text, cursor, flags)
+        selections = []
+        for data in self.blockuserdata_list:
+            selections += data.code_analysis_selections
+        self.set_extra_selections('code_analysis', selections)
         self.update_extra_selections()
+        self.invalidate_scrollflag_markers()
         self.setUpdatesEnabled(True)
+        self.scrollflagarea.update()
         self.linenumberarea.update()
 
+    def __get_code_analysis_selections(self, block, code_analysis):
+        """Return the selections underlining the names quoted in the
+        code analysis messages of *block*"""
+        # Scanning *block* and following lines if continued
+        blocks = [block]
+        while blocks[-1].next().isValid():
+            stripped = to_text_string(blocks[-1].text()).strip()
+            if not (stripped.endswith('\\') or stripped.endswith(',')
+                    or len(stripped) == 0):
+                break
+            blocks.append(blocks[-1].next())
+        selections = []
+        for message, error in code_analysis:
+            color = QColor(self.error_color if error else self.warning_color)
+            for ref in re.findall(r"\'[a-zA-Z0-9_]*\'", message):
+                # Highlighting all occurences (this is a compromise as
+                # pyflakes do not provide the column number -- see Issue 709
+                # on Spyder's GoogleCode project website)
+                regexp = re.compile(r"\b%s\b" % re.escape(ref[1:-1]))
+                for line_block in blocks:
+                    text = to_text_string(line_block.text())
+                    for match in regexp.finditer(text):
+                        cursor = QTextCursor(line_block)
+                        cursor.setPosition(line_block.position()+match.start())
+                        cursor.setPosition(line_block.position()+match.end(),
+                                           QTextCursor.KeepAnchor)
+                        selections.append(self.__create_selection(cursor,
+                                                underline_color=color))
+        return selections
+
     def __show_code_analysis_results(self, line_number, code_analysis):
         """Show warning/error messages"""
         msglist = [ msg for msg, _error in code_analysis ]
@@ -1750,7 +1835,9 @@ class CodeEditor(TextEditBaseWidget):
             if not data:
                 data = BlockUserData(self)
             data.todo = message
+            data.block = block
             block.setUserData(data)
+        self.invalidate_scrollflag_markers()
         self.scrollflagarea.update()
 
 
@@ -15,6 +15,8 @@ NumPy Array Editor Dialog based on Qt
 
 from __future__ import print_function
 
+from collections import OrderedDict
+
 from spyderlib.qt.QtGui import (QHBoxLayout, QColor, QTableView, QItemDelegate,
                                 QLineEdit, QCheckBox, QGridLayout, QCursor,
                                 QDoubleValidator, QDialog, QDialogButtonBox,
@@ -117,6 +119,12 @@ class ArrayModel(QAbstractTableModel):
     ROWS_TO_LOAD = 500
     COLS_TO_LOAD = 40
 
+    # Cells are formatted and colored by tiles of TILE_ROWS x TILE_COLS,
+    # the last MAX_TILES tiles being cached
+    TILE_ROWS = 64
+    TILE_COLS = 16
+    MAX_TILES = 256
+
     def __init__(self, data, format="%.3f", xlabels=None, ylabels=None,
                  readonly=False, parent=None):
         QAbstractTableModel.__init__(self)
@@ -143,14 +151,19 @@ class ArrayModel(QAbstractTableModel):
 
         self._data = data
         self._format = format
+        self._tiles = OrderedDict()
         
         self.total_rows = self._data.shape[0]
         self.total_cols = self._data.shape[1]
         size = self.total_rows * self.total_cols
         
         try:
-            self.vmin = np.nanmin(self.color_func(data))
-            self.vmax = np.nanmax(self.color_func(data))
+            if hasattr(data, 'get_color_range'):
+                # Remote array (see remoteproxy.py)
+                self.vmin, self.vmax = data.get_color_range()
+            else:
+                self.vmin = np.nanmin(self.color_func(data))
+                self.vmax = np.nanmax(self.color_func(data))
             if self.vmax == self.vmin:
                 self.vmin -= 1
             self.hue0 = huerange[0]
@@ -190,8 +203,60 @@ class ArrayModel(QAbstractTableModel):
     def set_format(self, format):
         """Change display format"""
         self._format = format
+        self._tiles.clear()
         self.reset()
 
+    def get_tile(self, row, column):
+        """
+        Return the tile of cell *row*, *column* (see make_tile) and the
+        position of the cell in it
+        """
+        key = (row // self.TILE_ROWS, column // self.TILE_COLS)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = self.make_tile(key[0] * self.TILE_ROWS,
+                                  key[1] * self.TILE_COLS)
+            if len(self._tiles) >= self.MAX_TILES:
+                self._tiles.popitem(last=False)
+        self._tiles[key] = tile
+        return tile, row % self.TILE_ROWS, column % self.TILE_COLS
+
+    def make_tile(self, row0, col0):
+        """
+        Return the (texts, hues, mask) arrays of the tile starting at cell
+        *row0*, *col0*: texts are None if its values are formatted one at a
+        time, and hues are None if its cells can't be colored
+        """
+        try:
+            block = self._data[row0:row0 + self.TILE_ROWS,
+                               col0:col0 + self.TILE_COLS]
+        except ValueError:
+            # Remote array which can't be retrieved anymore
+            return None, None, None
+        mask = np.ma.getmaskarray(block)
+        values = np.ma.getdata(block)
+        texts = None
+        if values.dtype.kind in 'iuf':
+            # Formatting Python numbers is faster than formatting
+            # NumPy scalars, and gives the same results for these types
+            try:
+                texts = [[self._format % value for value in line]
+                         for line in values.tolist()]
+            except (TypeError, ValueError):
+                pass
+            else:
+                for i, j in zip(*np.nonzero(mask)):
+                    texts[i][j] = ''
+        hues = None
+        if self.vmin is not None:
+            try:
+                hues = np.abs(self.hue0 + self.dhue *
+                              (self.vmax - self.color_func(values)) /
+                              (self.vmax - self.vmin))
+            except TypeError:
+                pass
+        return texts, hues, mask
+
     def columnCount(self, qindex=QModelIndex()):
         """Array column number"""
         if self.total_cols <= self.cols_loaded:
@@ -248,6 +313,18 @@ class ArrayModel(QAbstractTableModel):
         """Cell content"""
         if not index.isValid():
             return to_qvariant()
+        if role in (Qt.DisplayRole, Qt.BackgroundColorRole) \
+          and (index.row(), index.column()) not in self.changes:
+            (texts, hues, mask), i, j = self.get_tile(index.row(),
+                                                      index.column())
+            if role == Qt.DisplayRole and texts is not None:
+                return to_qvariant(texts[i][j])
+            elif role == Qt.BackgroundColorRole and hues is not None:
+                if not self.bgcolor_enabled or mask[i, j]:
+                    return to_qvariant()
+                color = QColor.fromHsvF(float(hues[i, j]), self.sat,
+                                        self.val, self.alp)
+                return to_qvariant(color)
         value = self.get_value(index)
         if is_binary_string(value):
             try:
@@ -315,8 +392,10 @@ class ArrayModel(QAbstractTableModel):
         if not is_string(val):
             if val > self.vmax:
                 self.vmax = val
+                self._tiles.clear()
             if val < self.vmin:
                 self.vmin = val
+                self._tiles.clear()
         return True
 
     def flags(self, index):
@@ -47,6 +47,8 @@ if ndarray is not FakeObject:
     from spyderlib.widgets.variableexplorer.arrayeditor import ArrayEditor
 if DataFrame is not FakeObject:
     from spyderlib.widgets.variableexplorer.dataframeeditor import DataFrameEditor
+from spyderlib.widgets.variableexplorer.remoteproxy import (RemoteProxy,
+                                                RemoteArray, RemoteDataFrame)
 from spyderlib.widgets.variableexplorer.texteditor import TextEditor
 from spyderlib.widgets.variableexplorer.importwizard import ImportWizard
 from spyderlib.py3compat import (to_text_string, is_text_string, PY3, io,
@@ -141,6 +143,27 @@ class ReadOnlyCollectionsModel(QAbstractTableModel):
         self.set_size_and_type()
         self.reset()
 
+    def update_values(self, values):
+        """Update the values of existing keys, without resetting the model"""
+        for key, value in list(values.items()):
+            self._data[key] = value
+            if self.showndata is not self._data:
+                self.showndata[key] = value
+            try:
+                row = self.keys.index(key)
+            except ValueError:
+                continue
+            if row >= self.rows_loaded:
+                continue
+            if self.remote:
+                self.sizes[row] = value['size']
+                self.types[row] = value['type']
+            else:
+                self.sizes[row] = get_size(value)
+                self.types[row] = get_human_readable_type(value)
+            self.dataChanged.emit(self.createIndex(row, 0),
+                                  self.createIndex(row, self.columnCount()-1))
+
     def set_size_and_type(self, start=None, stop=None):
         data = self._data
         
@@ -401,6 +424,13 @@ class CollectionsDelegate(QItemDelegate):
         else:
             return False
 
+    def get_editor_value(self, index):
+        """
+        Return the value to be opened in an editor: the same as get_value,
+        unless it can be browsed without getting it as a whole
+        """
+        return self.get_value(index)
+
     def createEditor(self, parent, option, index):
         """Overriding method createEditor"""
         if index.column() < 3:
@@ -413,7 +443,7 @@ class CollectionsDelegate(QItemDelegate):
             if answer == QMessageBox.No:
                 return None
         try:
-            value = self.get_value(index)
+            value = self.get_editor_value(index)
         except Exception as msg:
             QMessageBox.critical(self.parent(), _("Edit item"),
                                  _("<b>Unable to retrieve data.</b>"
@@ -422,7 +452,8 @@ class CollectionsDelegate(QItemDelegate):
             return
         key = index.model().get_key(index)
         readonly = isinstance(value, tuple) or self.parent().readonly \
-                   or not is_known_type(value)
+                   or not (is_known_type(value)
+                           or isinstance(value, RemoteProxy))
         #---editor = CollectionsEditor
         if isinstance(value, (list, tuple, dict)):
             editor = CollectionsEditor()
@@ -432,7 +463,7 @@ class CollectionsDelegate(QItemDelegate):
                                             key=key, readonly=readonly))
             return None
         #---editor = ArrayEditor
-        elif isinstance(value, (ndarray, MaskedArray)) \
+        elif isinstance(value, (ndarray, MaskedArray, RemoteArray)) \
           and ndarray is not FakeObject:
             if value.size == 0:
                 return None
@@ -457,7 +488,7 @@ class CollectionsDelegate(QItemDelegate):
                                             conv=conv_func))
             return None
         #--editor = DataFrameEditor
-        elif isinstance(value, (DataFrame, Series)) \
+        elif isinstance(value, (DataFrame, Series, RemoteDataFrame)) \
           and DataFrame is not FakeObject:
             editor = DataFrameEditor()
             if not editor.setup_and_check(value, title=key):
@@ -1305,15 +1336,25 @@ class DictEditor(CollectionsEditor):
 #----Remote versions of CollectionsDelegate and CollectionsEditorTableView
 class RemoteCollectionsDelegate(CollectionsDelegate):
     """CollectionsEditor Item Delegate"""
-    def __init__(self, parent=None, get_value_func=None, set_value_func=None):
+    def __init__(self, parent=None, get_value_func=None, set_value_func=None,
+                 get_proxy_func=None):
         CollectionsDelegate.__init__(self, parent)
         self.get_value_func = get_value_func
         self.set_value_func = set_value_func
+        self.get_proxy_func = get_proxy_func
 
     def get_value(self, index):
         if index.isValid():
             name = index.model().keys[index.row()]
             return self.get_value_func(name)
+
+    def get_editor_value(self, index):
+        if index.isValid() and self.get_proxy_func is not None:
+            name = index.model().keys[index.row()]
+            proxy = self.get_proxy_func(name)
+            if proxy is not None:
+                return proxy
+        return self.get_value(index)
     
     def set_value(self, index, value):
         if index.isValid():
@@ -1331,7 +1372,8 @@ class RemoteCollectionsEditorTableView(BaseTableView):
                  get_array_shape_func=None, get_array_ndim_func=None,
                  oedit_func=None, plot_func=None, imshow_func=None,
                  is_data_frame_func=None, is_series_func=None,
-                 show_image_func=None, remote_editing=False):
+                 show_image_func=None, get_proxy_func=None,
+                 remote_editing=False):
         BaseTableView.__init__(self, parent)
 
         self.remote_editing_enabled = None
@@ -1363,7 +1405,8 @@ class RemoteCollectionsEditorTableView(BaseTableView):
                                       remote=True)
         self.setModel(self.model)
         self.delegate = RemoteCollectionsDelegate(self, get_value_func,
-                                                  set_value_func)
+                                                  set_value_func,
+                                                  get_proxy_func)
         self.setItemDelegate(self.delegate)
 
         self.setup_table()
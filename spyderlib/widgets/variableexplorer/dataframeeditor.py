@@ -13,7 +13,11 @@
 Pandas DataFrame Editor Dialog
 """
 
-from spyderlib.qt.QtCore import QAbstractTableModel, Qt, QModelIndex, Slot
+import threading
+from collections import OrderedDict
+
+from spyderlib.qt.QtCore import (QAbstractTableModel, Qt, QModelIndex, Slot,
+                                 Signal)
 from spyderlib.qt.QtGui import (QDialog, QTableView, QColor, QGridLayout,
                                 QDialogButtonBox, QHBoxLayout, QPushButton,
                                 QCheckBox, QMessageBox, QInputDialog, QCursor,
@@ -54,6 +58,36 @@ def bool_false_check(value):
     return value
 
 
+def color_value(value):
+    """
+    Return the number used to color the cell of *value*, or None if it
+    is not colored
+    """
+    if isinstance(value, _sup_com):
+        return abs(value)
+    elif isinstance(value, _sup_nr):
+        return float(value)
+
+
+def sort_rows(values, rows=None, ascending=True):
+    """
+    Return the row permutation *rows* (the identity if None) stably sorted
+    by *values*: rows with equal values keep their relative order, so that
+    sorting by several columns in turn sorts by all of them
+    """
+    values = np.asarray(values)
+    if rows is not None:
+        values = values[rows]
+    if ascending:
+        order = np.argsort(values, kind='mergesort')
+    else:
+        order = np.argsort(values[::-1], kind='mergesort')[::-1]
+        order = len(values) - 1 - order
+    if rows is None:
+        return order
+    return rows[order]
+
+
 def global_max(col_vals, index):
     """Returns the global maximum and minimum"""
     max_col, min_col = zip(*col_vals)
@@ -65,12 +99,27 @@ class DataFrameModel(QAbstractTableModel):
     
     ROWS_TO_LOAD = 500
     COLS_TO_LOAD = 40
+
+    # Cells are formatted and colored by tiles of TILE_ROWS x TILE_COLS,
+    # the last MAX_TILES tiles being cached
+    TILE_ROWS = 64
+    TILE_COLS = 16
+    MAX_TILES = 256
+
+    sig_sort_finished = Signal(bool)
+    sig_rows_sorted = Signal(object, object)
     
     def __init__(self, dataFrame, format="%.3g", parent=None):
         QAbstractTableModel.__init__(self)
         self.dialog = parent
         self.df = dataFrame
-        self.df_index = dataFrame.index.tolist()
+        self.df_index = dataFrame.index
+        # Rows are shown in the order of this permutation, if any, so that
+        # sorting leaves the DataFrame untouched
+        self.row_order = None
+        self._sort_id = 0
+        self._tiles = OrderedDict()
+        self.sig_rows_sorted.connect(self.rows_sorted)
         self.df_header = dataFrame.columns.tolist()
         self._format = format
         self.complex_intran = None
@@ -86,6 +135,7 @@ class DataFrameModel(QAbstractTableModel):
         self.hue0 = huerange[0]
         self.dhue = huerange[1]-huerange[0]
         self.max_min_col = None
+        self.max_min_col_raw = None
         if size < LARGE_SIZE:
             self.max_min_col_update()
             self.colum_avg_enabled = True
@@ -138,9 +188,66 @@ class DataFrameModel(QAbstractTableModel):
                                                    max_r]).max(skipna=True),
                                         DataFrame([min_c,
                                                    min_r]).min(skipna=True)))
-        self.max_min_col = [[vmax, vmin-1] if vmax == vmin else [vmax, vmin]
+        self.max_min_col_raw = [[vmax, vmin]
+                                for vmax, vmin in self.max_min_col]
+        self.max_min_col = [self.get_color_range(vmax, vmin)
                             for vmax, vmin in self.max_min_col]
 
+    def get_color_range(self, vmax, vmin):
+        """Return the color range of a column from its maximum and minimum"""
+        if vmax == vmin:
+            return [vmax, vmin-1]
+        return [vmax, vmin]
+
+    def column_max_min(self, column):
+        """Return the maximum and minimum number of *column*"""
+        values = self.df.iloc[:, column]
+        kind = values.dtype.kind
+        if kind == 'c':
+            values = values.abs()
+        elif kind not in 'biuf':
+            # Cells of any type: only numbers are colored
+            values = [color_value(value) for value in values]
+            values = [value for value in values
+                      if value is not None and value == value]
+            if not values:
+                return [np.nan, np.nan]
+            return [max(values), min(values)]
+        return [float(values.max()), float(values.min())]
+
+    def max_min_col_cell_update(self, row, column, old_value):
+        """
+        Update the maximum and minimum of *column* after its value at *row*
+        was changed from *old_value*
+
+        The column is only looked at as a whole if one of its extrema has
+        been overwritten.
+        """
+        if self.max_min_col is None:
+            return
+        value = self.get_value(row, column)
+        is_complex = isinstance(value, _sup_com)
+        if self.complex_intran is not None:
+            self.complex_intran.iloc[self.df_row(row), column] = is_complex
+        elif is_complex:
+            self.complex_intran = DataFrame(False, index=self.df.index,
+                                            columns=self.df.columns)
+            self.complex_intran.iloc[self.df_row(row), column] = True
+        old, new = color_value(old_value), color_value(value)
+        if new is None:
+            new = np.nan
+        vmax, vmin = self.max_min_col_raw[column]
+        if old is not None and ((old == vmax and not new >= old) or
+                                (old == vmin and not new <= old)):
+            vmax, vmin = self.column_max_min(column)
+        elif new == new:
+            if vmax != vmax or new > vmax:
+                vmax = new
+            if vmin != vmin or new < vmin:
+                vmin = new
+        self.max_min_col_raw[column] = [vmax, vmin]
+        self.max_min_col[column] = self.get_color_range(vmax, vmin)
+
     def get_format(self):
         """Return current format"""
         # Avoid accessing the private attribute _format from outside
@@ -190,6 +297,61 @@ class DataFrameModel(QAbstractTableModel):
         else:
             return to_qvariant()
 
+    def get_tile(self, row, column):
+        """
+        Return the tile of cell *row*, *column* of the DataFrame (see
+        make_tile) and the position of the cell in it
+        """
+        key = (row // self.TILE_ROWS, column // self.TILE_COLS)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = self.make_tile(key[0] * self.TILE_ROWS,
+                                  key[1] * self.TILE_COLS)
+            if len(self._tiles) >= self.MAX_TILES:
+                self._tiles.popitem(last=False)
+        self._tiles[key] = tile
+        return tile, row % self.TILE_ROWS, column % self.TILE_COLS
+
+    def make_tile(self, row0, col0):
+        """
+        Return the (texts, hues) of the tile starting at cell *row0*, *col0*
+        of the DataFrame, as lists with an item per column
+
+        Items are None for the columns whose cells are formatted or colored
+        one at a time. Hues are None if background colors are disabled.
+        """
+        rows = self.df_rows(row0, min(row0 + self.TILE_ROWS, self.total_rows))
+        ncols = min(self.TILE_COLS, self.total_cols - col0)
+        try:
+            block = self.df.iloc[rows, col0:col0 + ncols]
+        except ValueError:
+            # Remote DataFrame which can't be retrieved anymore
+            return [None] * ncols, None
+        colored = self.bgcolor_enabled and self.max_min_col is not None
+        texts, hues = [], []
+        for column in range(ncols):
+            values = block.iloc[:, column].values
+            kind = values.dtype.kind
+            if issubclass(values.dtype.type, float):
+                texts.append([self._format % value
+                              for value in values.tolist()])
+            elif kind in 'iub':
+                texts.append([to_text_string(value)
+                              for value in values.tolist()])
+            else:
+                texts.append(None)
+            if colored and kind in 'iufc' \
+              and isinstance(values.dtype.type(0), _sup_nr + _sup_com):
+                vmax, vmin = self.return_max(self.max_min_col, col0 + column)
+                if kind == 'c':
+                    values = np.abs(values)
+                hues.append(np.abs(self.hue0 + self.dhue *
+                                   (vmax - values.astype(float)) /
+                                   (vmax - vmin)))
+            else:
+                hues.append(None)
+        return texts, hues if colored else None
+
     def get_bgcolor(self, index):
         """Background color depending on value"""
         column = index.column()
@@ -199,6 +361,10 @@ class DataFrameModel(QAbstractTableModel):
             return color
         if not self.bgcolor_enabled:
             return
+        (_texts, hues), i, j = self.get_tile(index.row(), column-1)
+        if hues is not None and hues[j] is not None:
+            return QColor.fromHsvF(float(hues[j][i]), self.sat, self.val,
+                                   self.alp)
         value = self.get_value(index.row(), column-1)
         if isinstance(value, _sup_com):
             color_func = abs
@@ -217,8 +383,21 @@ class DataFrameModel(QAbstractTableModel):
             color.setAlphaF(.3)
         return color
 
+    def df_row(self, row):
+        """Return the position in the DataFrame of the row shown at *row*"""
+        if self.row_order is None:
+            return row
+        return self.row_order[row]
+
+    def df_rows(self, start, stop):
+        """Return the positions in the DataFrame of rows *start*:*stop*"""
+        if self.row_order is None:
+            return slice(start, stop)
+        return self.row_order[start:stop]
+
     def get_value(self, row, column):
         """Returns the value of the DataFrame"""
+        row = self.df_row(row)
         # To increase the performance iat is used but that requires error
         # handling, so fallback uses iloc
         try:
@@ -227,10 +406,6 @@ class DataFrameModel(QAbstractTableModel):
             value = self.df.iloc[row, column]
         return value
 
-    def update_df_index(self):
-        """"Update the DataFrame index"""
-        self.df_index = self.df.index.tolist()
-
     def data(self, index, role=Qt.DisplayRole):
         """Cell content"""
         if not index.isValid():
@@ -239,8 +414,12 @@ class DataFrameModel(QAbstractTableModel):
             column = index.column()
             row = index.row()
             if column == 0:
-                return to_qvariant(to_text_string(self.df_index[row]))
+                label = self.df_index[self.df_row(row)]
+                return to_qvariant(to_text_string(label))
             else:
+                (texts, _hues), i, j = self.get_tile(row, column-1)
+                if texts[j] is not None:
+                    return to_qvariant(texts[j][i])
                 value = self.get_value(row, column-1)
                 if isinstance(value, float):
                     return to_qvariant(self._format % value)
@@ -256,28 +435,57 @@ class DataFrameModel(QAbstractTableModel):
         return to_qvariant()
 
     def sort(self, column, order=Qt.AscendingOrder):
-        """Overriding sort method"""
-        if self.complex_intran is not None:
+        """
+        Overriding sort method
+
+        Rows are sorted in a thread: sig_sort_finished is emitted when they
+        are shown in their new order. The DataFrame itself is not changed.
+        """
+        if self.complex_intran is not None and column > 0:
             if self.complex_intran.any(axis=0).iloc[column-1]:
                 QMessageBox.critical(self.dialog, "Error",
                                      "TypeError error: no ordering "
                                      "relation is defined for complex numbers")
                 return False
-        try:
-            if column > 0:
-                self.df.sort(columns=self.df.columns[column-1],
-                             ascending=order, inplace=True)
-                self.update_df_index()
-            else:
-                self.df.sort_index(inplace=True, ascending=order)
-                self.update_df_index()
-        except TypeError as e:
+        if not isinstance(self.df, DataFrame):
+            # Remote DataFrame (see remoteproxy.py)
             QMessageBox.critical(self.dialog, "Error",
-                                 "TypeError error: %s" % str(e))
+                                 _("Large DataFrames of a console can't be "
+                                   "sorted in the editor"))
             return False
+        if column > 0:
+            values = self.df.iloc[:, column-1].values
+        else:
+            values = self.df.index.values
+        self._sort_id += 1
+        thread = threading.Thread(target=self._sort_rows,
+                                  args=(self._sort_id, values,
+                                        self.row_order, order))
+        thread.setDaemon(True)
+        thread.start()
+        return True
 
+    def _sort_rows(self, sort_id, values, rows, ascending):
+        """Sort rows, in a thread"""
+        try:
+            result = sort_rows(values, rows, ascending)
+        except TypeError as error:
+            result = error
+        self.sig_rows_sorted.emit(sort_id, result)
+
+    def rows_sorted(self, sort_id, result):
+        """Show rows in the order computed by a sort thread"""
+        if sort_id != self._sort_id:
+            # Another sort was started meanwhile
+            return
+        if isinstance(result, Exception):
+            QMessageBox.critical(self.dialog, "Error",
+                                 "TypeError error: %s" % str(result))
+            self.sig_sort_finished.emit(False)
+            return
+        self.row_order = result
         self.reset()
-        return True
+        self.sig_sort_finished.emit(True)
 
     def flags(self, index):
         """Set flags"""
@@ -290,6 +498,8 @@ class DataFrameModel(QAbstractTableModel):
         """Cell content change"""
         column = index.column()
         row = index.row()
+        old_value = self.get_value(row, column-1)
+        df_row = self.df_row(row)
 
         if change_type is not None:
             try:
@@ -297,18 +507,17 @@ class DataFrameModel(QAbstractTableModel):
                 val = from_qvariant(value, str)
                 if change_type is bool:
                     val = bool_false_check(val)
-                self.df.iloc[row, column - 1] = change_type(val)
+                self.df.iloc[df_row, column - 1] = change_type(val)
             except ValueError:
-                self.df.iloc[row, column - 1] = change_type('0')
+                self.df.iloc[df_row, column - 1] = change_type('0')
         else:
             val = from_qvariant(value, str)
-            current_value = self.get_value(row, column-1)
-            if isinstance(current_value, bool):
+            if isinstance(old_value, bool):
                 val = bool_false_check(val)
-            if isinstance(current_value, ((bool,) + _sup_nr + _sup_com)) or \
-               is_text_string(current_value):
+            if isinstance(old_value, ((bool,) + _sup_nr + _sup_com)) or \
+               is_text_string(old_value):
                 try:
-                    self.df.iloc[row, column-1] = current_value.__class__(val)
+                    self.df.iloc[df_row, column-1] = old_value.__class__(val)
                 except ValueError as e:
                     QMessageBox.critical(self.dialog, "Error",
                                          "Value error: %s" % str(e))
@@ -318,7 +527,8 @@ class DataFrameModel(QAbstractTableModel):
                                      "The type of the cell is not a supported "
                                      "type")
                 return False
-        self.max_min_col_update()
+        self.max_min_col_cell_update(row, column-1, old_value)
+        self._tiles.clear()
         return True
 
     def get_data(self):
@@ -371,6 +581,7 @@ class DataFrameModel(QAbstractTableModel):
             return self.cols_loaded + 1
 
     def reset(self):
+        self._tiles.clear()
         self.beginResetModel()
         self.endResetModel()
 
@@ -384,6 +595,7 @@ class DataFrameView(QTableView):
         self.sort_old = [None]
         self.header_class = self.horizontalHeader()
         self.header_class.sectionClicked.connect(self.sortByColumn)
+        model.sig_sort_finished.connect(self.sort_finished)
         self.menu = self.setup_menu()
         new_shortcut(QKeySequence.Copy, self, self.copy)
         self.horizontalScrollBar().valueChanged.connect(
@@ -403,13 +615,18 @@ class DataFrameView(QTableView):
             self.header_class.setSortIndicatorShown(True)
         sort_order = self.header_class.sortIndicatorOrder()
         if not self.model().sort(index, sort_order):
-            if len(self.sort_old) != 2:
-                self.header_class.setSortIndicatorShown(False)
-            else:
-                self.header_class.setSortIndicator(self.sort_old[0],
-                                                   self.sort_old[1])
-            return
-        self.sort_old = [index, self.header_class.sortIndicatorOrder()]
+            self.sort_finished(False)
+
+    def sort_finished(self, success):
+        """Keep the sort indicator if sorting succeeded, restore it if not"""
+        if success:
+            self.sort_old = [self.header_class.sortIndicatorSection(),
+                             self.header_class.sortIndicatorOrder()]
+        elif len(self.sort_old) != 2:
+            self.header_class.setSortIndicatorShown(False)
+        else:
+            self.header_class.setSortIndicator(self.sort_old[0],
+                                               self.sort_old[1])
 
     def contextMenuEvent(self, event):
         """Reimplement Qt method"""
@@ -454,13 +671,13 @@ class DataFrameView(QTableView):
             col_min = 1
             index = True
         df = self.model().df
+        rows = self.model().df_rows(row_min, row_max+1)
         if col_max == 0:  # To copy indices
-            contents = '\n'.join(map(str, df.index.tolist()[slice(row_min,
-                                                            row_max+1)]))
+            contents = '\n'.join(map(str, df.index[rows]))
         else:  # To copy DataFrame
             if (col_min == 0 or col_min == 1) and (df.shape[1] == col_max):
                 header = True
-            obj = df.iloc[slice(row_min, row_max+1), slice(col_min-1, col_max)]
+            obj = df.iloc[rows, slice(col_min-1, col_max)]
             output = io.StringIO()
             obj.to_csv(output, sep='\t', index=index, header=header)
             if not PY2:
@@ -24,9 +24,11 @@ import spyderlib.utils.icon_manager as ima
 from spyderlib.widgets.externalshell.monitor import (
             monitor_set_global, monitor_get_global, monitor_del_global,
             monitor_copy_global, monitor_save_globals, monitor_load_globals,
-            communicate, REMOTE_SETTINGS)
+            monitor_get_proxy_info, communicate, REMOTE_SETTINGS)
 from spyderlib.widgets.variableexplorer.collectionseditor import (
                   RemoteCollectionsEditorTableView, CollectionsEditorTableView)
+from spyderlib.widgets.variableexplorer.remoteproxy import (RemoteProxy,
+                                                            get_remote_proxy)
 from spyderlib.widgets.variableexplorer.utils import globalsfilter
 from spyderlib.utils import encoding
 from spyderlib.utils.misc import fix_reference_name
@@ -68,6 +70,7 @@ class NamespaceBrowser(QWidget):
         self.excluded_names = None
         self.truncate = None
         self.minmax = None
+        self.minmax_threshold = None
         self.remote_editing = None
         self.autorefresh = None
         
@@ -82,8 +85,8 @@ class NamespaceBrowser(QWidget):
     def setup(self, check_all=None, exclude_private=None,
               exclude_uppercase=None, exclude_capitalized=None,
               exclude_unsupported=None, excluded_names=None,
-              truncate=None, minmax=None, remote_editing=None,
-              autorefresh=None):
+              truncate=None, minmax=None, minmax_threshold=None,
+              remote_editing=None, autorefresh=None):
         """Setup the namespace browser"""
         assert self.shellwidget is not None
         
@@ -95,6 +98,7 @@ class NamespaceBrowser(QWidget):
         self.excluded_names = excluded_names
         self.truncate = truncate
         self.minmax = minmax
+        self.minmax_threshold = minmax_threshold
         self.remote_editing = remote_editing
         self.autorefresh = autorefresh
         
@@ -136,7 +140,8 @@ class NamespaceBrowser(QWidget):
                             get_array_ndim_func=self.get_array_ndim,
                             oedit_func=self.oedit,
                             plot_func=self.plot, imshow_func=self.imshow,
-                            show_image_func=self.show_image)
+                            show_image_func=self.show_image,
+                            get_proxy_func=self.get_proxy)
         self.editor.sig_option_changed.connect(self.sig_option_changed.emit)
         self.editor.sig_files_dropped.connect(self.import_data)
 
@@ -343,6 +348,20 @@ class NamespaceBrowser(QWidget):
         """Process remote view"""
         if remote_view is not None:
             self.set_data(remote_view)
+
+    def process_remote_view_delta(self, delta):
+        """Process the changes of the remote view since the previous one"""
+        changed, removed = delta
+        model = self.editor.model
+        data = model.get_data()
+        if not removed and all([key in data for key in changed]):
+            model.update_values(changed)
+        else:
+            data = data.copy()
+            data.update(changed)
+            for key in removed:
+                data.pop(key, None)
+            self.set_data(data)
         
     #------ Remote Python process commands ------------------------------------
     def get_value(self, name):
@@ -355,8 +374,20 @@ class NamespaceBrowser(QWidget):
                 raise pickle.PicklingError(msg)
         return value
         
+    def get_proxy(self, name):
+        """
+        Return a proxy of variable *name* if it is a large array or
+        DataFrame, so that it may be browsed without getting its value
+        """
+        info = monitor_get_proxy_info(self._get_sock(), name)
+        if info is not None:
+            return get_remote_proxy(self._get_sock(), name, info)
+        
     def set_value(self, name, value):
-        monitor_set_global(self._get_sock(), name, value)
+        if isinstance(value, RemoteProxy):
+            value.commit()
+        else:
+            monitor_set_global(self._get_sock(), name, value)
         self.refresh_table()
         
     def remove_values(self, names):
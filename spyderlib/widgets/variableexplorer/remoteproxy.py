@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2015 The Spyder Development Team
+# Licensed under the terms of the MIT License
+# (see spyderlib/__init__.py for details)
+
+"""
+Proxies of large arrays and DataFrames living in an external console
+
+The array and DataFrame editors only show a few hundred rows and columns at
+a time: instead of transferring the whole object from the console, these
+proxies get the tiles of rows and columns which are actually shown, when
+they are shown (see the __get_tile__ command of the monitor).
+"""
+
+from collections import OrderedDict
+
+# Local imports
+from spyderlib.config.base import _
+from spyderlib.widgets.externalshell.monitor import (monitor_get_tile,
+                    monitor_get_index, monitor_get_color_range,
+                    monitor_set_items)
+
+
+def get_remote_proxy(sock, name, info):
+    """
+    Return the proxy of variable *name*, described by *info*
+    (see monitor_get_proxy_info)
+    """
+    if info['kind'] == 'array':
+        return RemoteArray(sock, name, info)
+    elif info['kind'] == 'dataframe':
+        return RemoteDataFrame(sock, name, info)
+
+
+class RemoteProxy(object):
+    """
+    Base class of the proxies of remote objects
+
+    Tiles of TILE_ROWS rows and TILE_COLS columns are fetched on demand, and
+    the MAX_TILES tiles used most recently are kept. Changes are kept
+    locally until they are committed.
+    """
+    TILE_ROWS = 256
+    TILE_COLS = 32
+    MAX_TILES = 64
+
+    def __init__(self, sock, name, info):
+        self.sock = sock
+        self.name = name
+        self.shape = tuple(info['shape'])
+        self.changes = {}
+        self._tiles = OrderedDict()
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        size = 1
+        for length in self.shape:
+            size *= length
+        return size
+
+    def _get_cached(self, key, fetch):
+        """Return cached tile *key*, getting it with *fetch* if necessary"""
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = fetch()
+            if tile is None:
+                # The variable is gone or can't be sent anymore
+                return
+            if len(self._tiles) >= self.MAX_TILES:
+                self._tiles.popitem(last=False)
+        self._tiles[key] = tile
+        return tile
+
+    def fetch(self, row0, row1, col0, col1):
+        """Get rows *row0*:*row1* and columns *col0*:*col1* from the console"""
+        return monitor_get_tile(self.sock, self.name, row0, row1, col0, col1)
+
+    def get_item(self, row, col):
+        """Return the value at *row*, *col*"""
+        if (row, col) in self.changes:
+            return self.changes[(row, col)]
+        trow, tcol = row // self.TILE_ROWS, col // self.TILE_COLS
+        row0, col0 = trow * self.TILE_ROWS, tcol * self.TILE_COLS
+        tile = self._get_cached((trow, tcol), lambda: self.fetch(
+                                row0, row0 + self.TILE_ROWS,
+                                col0, col0 + self.TILE_COLS))
+        if tile is None:
+            import numpy as np
+            return np.ma.masked
+        return self.get_tile_item(tile, row - row0, col - col0)
+
+    def set_item(self, row, col, value):
+        """Set the value at *row*, *col*"""
+        self.changes[(row, col)] = value
+
+    def get_region(self, rows, cols):
+        """Return the region of slices *rows*, *cols*, changes included"""
+        ncols = self.shape[1] if self.ndim == 2 else 1
+        row0, row1, _step = rows.indices(self.shape[0])
+        col0, col1, _step = cols.indices(ncols)
+        region = self.fetch(row0, row1, col0, col1)
+        if region is None:
+            raise ValueError(_("Unable to retrieve data."))
+        region = self.reshape_region(region)
+        for (row, col), value in list(self.changes.items()):
+            if row0 <= row < row1 and col0 <= col < col1:
+                self.set_region_item(region, row - row0, col - col0, value)
+        return region
+
+    def commit(self):
+        """Apply changes to the remote object"""
+        if self.changes:
+            monitor_set_items(self.sock, self.name, self.changes)
+            self.changes = {}
+            self._tiles.clear()
+
+    def _split_key(self, key):
+        if isinstance(key, tuple) and len(key) == 2:
+            return key
+        return key, 0
+
+    def _is_region(self, row, col):
+        return isinstance(row, slice) or isinstance(col, slice)
+
+    def _to_slice(self, index):
+        if isinstance(index, slice):
+            return index
+        return slice(index, index + 1)
+
+    #------ To be reimplemented
+    def get_tile_item(self, tile, row, col):
+        """Return the item of *tile* at *row*, *col*"""
+        raise NotImplementedError
+
+    def reshape_region(self, region):
+        """Return *region* as a local view of the object would show it"""
+        return region
+
+    def set_region_item(self, region, row, col, value):
+        """Set the item of *region* at *row*, *col*"""
+        raise NotImplementedError
+
+
+class RemoteArray(RemoteProxy):
+    """
+    Proxy of a 1-D or 2-D NumPy array
+
+    As for arrays, the shape of the proxy may be set to (n, 1) for a 1-D
+    array of length n.
+    """
+    def __init__(self, sock, name, info):
+        RemoteProxy.__init__(self, sock, name, info)
+        import numpy as np
+        self.dtype = np.dtype(info['dtype'])
+
+    def __getitem__(self, key):
+        row, col = self._split_key(key)
+        if self._is_region(row, col):
+            region = self.get_region(self._to_slice(row), self._to_slice(col))
+            if self.ndim == 2:
+                # Dimensions indexed by an integer are dropped
+                if not isinstance(col, slice):
+                    region = region[:, 0]
+                if not isinstance(row, slice):
+                    region = region[0]
+            return region
+        return self.get_item(row, col)
+
+    def __setitem__(self, key, value):
+        row, col = self._split_key(key)
+        self.set_item(row, col, value)
+
+    def get_color_range(self):
+        """Return the (min, max) range of values used to color cells"""
+        vrange = monitor_get_color_range(self.sock, self.name)
+        if vrange is None:
+            raise TypeError(_("Unable to compute the range of values"))
+        return vrange
+
+    def get_tile_item(self, tile, row, col):
+        if tile.ndim == 1:
+            return tile[row]
+        return tile[row, col]
+
+    def reshape_region(self, region):
+        if region.ndim == 1 and self.ndim == 2:
+            region = region.reshape((region.shape[0], 1))
+        return region
+
+    def set_region_item(self, region, row, col, value):
+        if region.ndim == 1:
+            region[row] = value
+        else:
+            region[row, col] = value
+
+
+class RemoteIndex(object):
+    """Index labels of a remote DataFrame, fetched on demand"""
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    def __len__(self):
+        return self.proxy.shape[0]
+
+    def __getitem__(self, key):
+        proxy = self.proxy
+        if isinstance(key, slice):
+            row0, row1, step = key.indices(len(self))
+            labels = monitor_get_index(proxy.sock, proxy.name, row0, row1)
+            return (labels or [])[::step]
+        chunk = key // proxy.TILE_ROWS
+        row0 = chunk * proxy.TILE_ROWS
+        fetch = lambda: monitor_get_index(proxy.sock, proxy.name,
+                                          row0, row0 + proxy.TILE_ROWS)
+        labels = proxy._get_cached(('index', chunk), fetch)
+        if labels is None:
+            return ''
+        return labels[key - row0]
+
+
+class RemoteIndexer(object):
+    """Positional indexer of a remote DataFrame (see DataFrame.iloc)"""
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    def __getitem__(self, key):
+        row, col = key
+        if self.proxy._is_region(row, col):
+            return self.proxy.get_region(self.proxy._to_slice(row),
+                                         self.proxy._to_slice(col))
+        return self.proxy.get_item(row, col)
+
+    def __setitem__(self, key, value):
+        row, col = key
+        self.proxy.set_item(row, col, value)
+
+
+class RemoteDataFrame(RemoteProxy):
+    """Proxy of a pandas DataFrame"""
+    def __init__(self, sock, name, info):
+        RemoteProxy.__init__(self, sock, name, info)
+        from pandas import Index
+        self.columns = Index(info['columns'])
+        self.index = RemoteIndex(self)
+        self.iat = self.iloc = RemoteIndexer(self)
+
+    def get_tile_item(self, tile, row, col):
+        return tile.iat[row, col]
+
+    def set_region_item(self, region, row, col, value):
+        region.iat[row, col] = value
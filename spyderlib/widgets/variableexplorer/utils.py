@@ -11,6 +11,9 @@ Utilities for the Collections editor widget and dialog
 from __future__ import print_function
 
 import re
+import weakref
+import zlib
+from collections import OrderedDict
 
 # Local imports
 from spyderlib.py3compat import (NUMERIC_TYPES, TEXT_TYPES, to_text_string,
@@ -165,6 +168,82 @@ def datestr_to_datetime(value):
     return v
 
 
+#==============================================================================
+# Arrays min/max
+#==============================================================================
+# Arrays with more elements than this get min/max values estimated from a
+# strided sample of about this number of elements
+MINMAX_THRESHOLD = 1000000
+
+# Number of elements used to detect changes of the arrays whose estimated
+# min/max values are cached
+MINMAX_VERSION_SAMPLES = 1024
+
+# Number of arrays whose estimated min/max values are cached
+MINMAX_CACHE_SIZE = 32
+
+_MINMAX_CACHE = OrderedDict()
+
+
+def _sample_checksum(value, samples):
+    """Return the checksum of a strided sample of array *value*"""
+    sample = value.flat[::max(value.size // samples, 1)]
+    if hasattr(sample, 'tobytes'):
+        return zlib.crc32(sample.tobytes())
+    else:
+        return zlib.crc32(sample.tostring())
+
+
+def get_array_version(value):
+    """
+    Return a cheap version of array *value*
+
+    The version changes when the array is reshaped or reallocated, and when
+    one of the elements of a strided sample of it changes.
+    """
+    from numpy.ma import getmask, nomask
+    version = (value.shape, value.strides, value.dtype.str,
+               value.__array_interface__['data'][0],
+               _sample_checksum(value, MINMAX_VERSION_SAMPLES))
+    mask = getmask(value)
+    if mask is not nomask:
+        version += (_sample_checksum(mask, MINMAX_VERSION_SAMPLES),)
+    return version
+
+
+def get_minmax(value, threshold=MINMAX_THRESHOLD):
+    """
+    Return the (min, max, estimated) values of array *value*
+
+    Arrays with more than *threshold* elements get values *estimated* from a
+    strided sample of their elements. Estimates are cached per array and
+    computed again when its version changes (see get_array_version), so
+    they may miss changes of the elements left out of the version. Exact
+    values are always computed.
+    """
+    if value.size <= threshold or value.dtype.hasobject:
+        return value.min(), value.max(), False
+    key = id(value)
+    version = get_array_version(value)
+    cached = _MINMAX_CACHE.pop(key, None)
+    if cached is not None:
+        ref, cached_version, cached_threshold, result = cached
+        if ref() is value and cached_version == version \
+          and cached_threshold == threshold:
+            _MINMAX_CACHE[key] = cached
+            return result
+    sample = value.flat[::-(-value.size // threshold)]
+    result = (sample.min(), sample.max(), True)
+    try:
+        ref = weakref.ref(value)
+    except TypeError:
+        return result
+    _MINMAX_CACHE[key] = (ref, version, threshold, result)
+    while len(_MINMAX_CACHE) > MINMAX_CACHE_SIZE:
+        _MINMAX_CACHE.popitem(last=False)
+    return result
+
+
 #==============================================================================
 # Background colors for supported types
 #==============================================================================
@@ -230,7 +309,8 @@ def unsorted_unique(lista):
 #==============================================================================
 # Display <--> Value
 #==============================================================================
-def value_to_display(value, truncate=False, trunc_len=80, minmax=False):
+def value_to_display(value, truncate=False, trunc_len=80, minmax=False,
+                     minmax_threshold=MINMAX_THRESHOLD):
     """Convert value for display purpose"""
     try:
         if isinstance(value, recarray):
@@ -240,7 +320,11 @@ def value_to_display(value, truncate=False, trunc_len=80, minmax=False):
             if value.size == 0:
                 display = repr(value)
             try:
-                display = 'Min: %r\nMax: %r' % (value.min(), value.max())
+                vmin, vmax, estimated = get_minmax(value, minmax_threshold)
+                if estimated:
+                    display = 'Min: ~%r\nMax: ~%r' % (vmin, vmax)
+                else:
+                    display = 'Min: %r\nMax: %r' % (vmin, vmax)
             except TypeError:
                 pass
             except ValueError: